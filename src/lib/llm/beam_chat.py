@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any, Union, Callable
+from typing import Dict, List, Optional, Any, Union, Callable, AsyncIterator, Awaitable
 import logging
 import asyncio
 from enum import Enum
@@ -6,7 +6,15 @@ from dataclasses import dataclass, field
 
 from ..llm.persona_llm_manager import LLMProvider, LLMConfig, PersonaTraits
 from ..messaging.message_broker import MessageBroker
-from ..messaging.shared_memory import SharedMemoryManager
+from ..messaging.shared_memory import SharedMemoryManager, WriteMode
+from .latency_tracker import LatencyTracker
+from .provider_pool import ProviderClientPool, get_default_client_pool
+from .response_cache import ResponseCache
+from .resilience import CircuitBreaker, CircuitState, AIMDLimiter
+from .model_router import ModelRouter, RoutingBudget
+from .beam_request_queue import BeamRequestQueue, BeamRequestBatch, QueuedBeamRequest
+from .fusion_scoring import FusionScorer, FusionScores
+from .context_packer import ContextPacker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,6 +41,34 @@ class ModelResponse:
     latency: float = 0.0
 
 
+@dataclass
+class ResponseChunk:
+    """Partial token chunk streamed from a single model"""
+    model_id: str
+    provider: LLMProvider
+    delta: str
+    index: int = 0
+
+
+@dataclass
+class QuorumPolicy:
+    """Early-cutoff and hedging policy for a BeamChat fan-out"""
+    min_responses: Optional[int] = None     # Return once this many models have answered
+    latency_budget: Optional[float] = None  # Return after this many seconds regardless
+    hedge_models: Dict[str, str] = field(default_factory=dict)  # model_id -> backup model_id
+    hedge_percentile: float = 95.0          # Hedge once a model is slower than this percentile
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuorumPolicy':
+        """Create from dictionary"""
+        return cls(
+            min_responses=data.get("min_responses"),
+            latency_budget=data.get("latency_budget"),
+            hedge_models=data.get("hedge_models", {}),
+            hedge_percentile=data.get("hedge_percentile", 95.0)
+        )
+
+
 @dataclass
 class FusionResult:
     """Result of fusing multiple model responses"""
@@ -46,10 +82,22 @@ class FusionResult:
 class BeamChat:
     """Multi-model decision-making framework for orchestrating AI personas"""
     
-    def __init__(self, broker: MessageBroker):
+    def __init__(self, broker: MessageBroker, client_pool: Optional[ProviderClientPool] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 fusion_scorer: Optional[FusionScorer] = None,
+                 context_packer: Optional[ContextPacker] = None):
         self.broker = broker
         self.memory = SharedMemoryManager(broker, "beam_chat")
+        self.client_pool = client_pool or get_default_client_pool()
+        self.response_cache = response_cache  # Opt-in; see ResponseCache for which requests it keeps
         self.models: Dict[str, LLMConfig] = {}
+        self.latency_tracker = LatencyTracker()
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self.concurrency_limiters: Dict[str, AIMDLimiter] = {}
+        self.router = ModelRouter(self.latency_tracker)
+        self.request_queue = BeamRequestQueue(self._process_queued_request, self._reject_queued_request)
+        self.fusion_scorer = fusion_scorer or FusionScorer()
+        self.context_packer = context_packer or ContextPacker()
         self.fusion_strategies: Dict[str, Callable] = {
             FusionStrategy.AUTO_SELECT.value: self._auto_select_fusion,
             FusionStrategy.CHECKLIST.value: self._checklist_fusion,
@@ -60,9 +108,21 @@ class BeamChat:
         # Subscribe to relevant message topics
         self.broker.subscribe_to_context("beam_chat_request", self._handle_beam_chat_request)
     
-    def register_model(self, model_id: str, config: LLMConfig) -> None:
-        """Register a model with BeamChat"""
+    def register_model(self, model_id: str, config: LLMConfig,
+                       circuit_breaker: Optional[CircuitBreaker] = None,
+                       concurrency_limiter: Optional[AIMDLimiter] = None) -> None:
+        """Register a model with BeamChat
+        
+        A circuit_breaker passed in also reports its transitions as
+        model_circuit_state broadcasts, after any on_state_change it already has.
+        """
         self.models[model_id] = config
+        self.router.register_model(model_id, config)
+        if circuit_breaker:
+            self._attach_circuit_breaker(circuit_breaker)
+            self.circuit_breakers[model_id] = circuit_breaker
+        if concurrency_limiter:
+            self.concurrency_limiters[model_id] = concurrency_limiter
         logger.info(f"Registered model {model_id} with BeamChat")
     
     def register_fusion_strategy(self, strategy_id: str, strategy_func: Callable) -> None:
@@ -70,104 +130,408 @@ class BeamChat:
         self.fusion_strategies[strategy_id] = strategy_func
         logger.info(f"Registered fusion strategy {strategy_id}")
     
-    async def generate_responses(self, prompt: str, system_message: Optional[str] = None, 
-                               model_ids: Optional[List[str]] = None) -> List[ModelResponse]:
-        """Generate responses from multiple models in parallel"""
+    def _get_circuit_breaker(self, model_id: str) -> CircuitBreaker:
+        """Get the circuit breaker for a model, creating a default one on first use"""
+        if model_id not in self.circuit_breakers:
+            self.circuit_breakers[model_id] = CircuitBreaker(
+                model_id, on_state_change=self._handle_circuit_state_change
+            )
+        return self.circuit_breakers[model_id]
+    
+    def _attach_circuit_breaker(self, breaker: CircuitBreaker) -> None:
+        """Broadcast a caller-supplied breaker's transitions, keeping its own callback"""
+        callback = breaker.on_state_change
+        if callback is None or callback == self._handle_circuit_state_change:
+            breaker.on_state_change = self._handle_circuit_state_change
+            return
+        
+        def on_state_change(model_id: str, old_state: CircuitState, new_state: CircuitState) -> None:
+            callback(model_id, old_state, new_state)
+            self._handle_circuit_state_change(model_id, old_state, new_state)
+        
+        breaker.on_state_change = on_state_change
+    
+    def _get_concurrency_limiter(self, model_id: str) -> AIMDLimiter:
+        """Get the AIMD concurrency limiter for a model, creating a default one on first use"""
+        if model_id not in self.concurrency_limiters:
+            self.concurrency_limiters[model_id] = AIMDLimiter()
+        return self.concurrency_limiters[model_id]
+    
+    def _handle_circuit_state_change(self, model_id: str, old_state: CircuitState,
+                                     new_state: CircuitState) -> None:
+        """Export circuit breaker transitions to the rest of the system"""
+        self.broker.broadcast_system_message(
+            'model_circuit_state',
+            {
+                'model_id': model_id,
+                'old_state': old_state.value,
+                'state': new_state.value
+            }
+        )
+    
+    def _available_model_ids(self, model_ids: List[str]) -> List[str]:
+        """Filter to registered models whose circuit is not open"""
+        available = []
+        for model_id in model_ids:
+            if model_id not in self.models:
+                continue
+            if self._get_circuit_breaker(model_id).is_open():
+                logger.info(f"Skipping model {model_id}: circuit open")
+                continue
+            available.append(model_id)
+        return available
+    
+    def _resolve_model_ids(self, prompt: str, model_ids: Optional[List[str]],
+                           budget: Optional[RoutingBudget]) -> List[str]:
+        """Pick the models for a request: explicit ids as given, otherwise routed within the budget"""
+        routed = not model_ids or budget is not None
         if not model_ids:
             model_ids = list(self.models.keys())
+        model_ids = self._available_model_ids(model_ids)
+        if routed and model_ids:
+            model_ids = self.router.select(model_ids, prompt, budget)
+        return model_ids
+    
+    def get_model_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get circuit breaker, concurrency and latency metrics for every registered model"""
+        return {
+            model_id: {
+                "circuit": self._get_circuit_breaker(model_id).to_dict(),
+                "concurrency": self._get_concurrency_limiter(model_id).to_dict(),
+                "latency": {
+                    "p50": self.latency_tracker.p50(model_id),
+                    "p95": self.latency_tracker.p95(model_id),
+                    "p99": self.latency_tracker.p99(model_id)
+                }
+            }
+            for model_id in self.models
+        }
+    
+    async def generate_responses(self, prompt: str, system_message: Optional[str] = None, 
+                               model_ids: Optional[List[str]] = None,
+                               quorum: Optional[QuorumPolicy] = None,
+                               use_cache: bool = True,
+                               budget: Optional[RoutingBudget] = None) -> List[ModelResponse]:
+        """Generate responses from multiple models in parallel"""
+        model_ids = self._resolve_model_ids(prompt, model_ids, budget)
+        
+        if quorum:
+            return await self._generate_with_quorum(
+                prompt, system_message, model_ids, quorum, use_cache
+            )
         
         tasks = []
         for model_id in model_ids:
-            if model_id in self.models:
-                tasks.append(self._generate_response(model_id, prompt, system_message))
+            tasks.append(self._generate_response(model_id, prompt, system_message, use_cache=use_cache))
         
         responses = await asyncio.gather(*tasks)
         return [r for r in responses if r is not None]
     
+    async def _generate_with_quorum(self, prompt: str, system_message: Optional[str],
+                                    model_ids: List[str], quorum: QuorumPolicy,
+                                    use_cache: bool = True) -> List[ModelResponse]:
+        """Generate responses until the quorum is met or the latency budget runs out
+        
+        Each requested model owns a slot. When a model is still running past its
+        rolling latency percentile and has a backup in quorum.hedge_models, a
+        duplicate request is sent to the backup; whichever answers first fills
+        the slot and the other is cancelled. Anything still running when the
+        quorum is met or the budget expires is cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        deadline = start_time + quorum.latency_budget if quorum.latency_budget is not None else None
+        needed = min(quorum.min_responses or len(model_ids), len(model_ids))
+        
+        pending: Dict[asyncio.Task, str] = {}  # task -> slot (primary model_id)
+        for model_id in model_ids:
+            pending[asyncio.create_task(
+                self._generate_response(model_id, prompt, system_message, use_cache=use_cache)
+            )] = model_id
+        
+        responses: List[ModelResponse] = []
+        answered = set()
+        hedged = set()
+        
+        try:
+            while pending and len(responses) < needed:
+                # Work out when a slot becomes eligible for hedging
+                hedge_at: Dict[str, float] = {}
+                for slot in set(pending.values()):
+                    backup = quorum.hedge_models.get(slot)
+                    if slot in hedged or not backup or backup not in self.models:
+                        continue
+                    threshold = self.latency_tracker.percentile(slot, quorum.hedge_percentile)
+                    if threshold is not None:
+                        hedge_at[slot] = start_time + threshold
+                
+                wake_times = list(hedge_at.values()) + ([deadline] if deadline is not None else [])
+                timeout = max(0.0, min(wake_times) - loop.time()) if wake_times else None
+                
+                done, _ = await asyncio.wait(list(pending), timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    slot = pending.pop(task)
+                    response = task.result()
+                    if response is None or slot in answered:
+                        continue
+                    answered.add(slot)
+                    responses.append(response)
+                    # Cancel the hedge (or primary) still racing for this slot
+                    for other, other_slot in list(pending.items()):
+                        if other_slot == slot:
+                            other.cancel()
+                            del pending[other]
+                
+                now = loop.time()
+                if deadline is not None and now >= deadline:
+                    logger.info(f"Latency budget exhausted with {len(responses)}/{needed} responses")
+                    break
+                
+                for slot, hedge_time in hedge_at.items():
+                    if now >= hedge_time and slot not in answered and slot in pending.values():
+                        backup = quorum.hedge_models[slot]
+                        hedged.add(slot)
+                        logger.info(f"Hedging slow model {slot} with {backup}")
+                        pending[asyncio.create_task(
+                            self._generate_response(backup, prompt, system_message, use_cache=use_cache)
+                        )] = slot
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        return responses
+    
+    async def stream_responses(self, prompt: str, system_message: Optional[str] = None,
+                               model_ids: Optional[List[str]] = None,
+                               stream_tokens: bool = False,
+                               use_cache: bool = True,
+                               budget: Optional[RoutingBudget] = None) -> AsyncIterator[Union[ModelResponse, ResponseChunk]]:
+        """Yield model responses (and optionally token chunks) as soon as each one arrives
+        
+        Unlike generate_responses, nothing waits for the slowest model: each
+        ModelResponse is yielded in completion order. With stream_tokens=True,
+        ResponseChunk items are yielded as providers stream them, followed by
+        the complete ModelResponse for that model. Models still running when
+        the consumer stops iterating are cancelled.
+        """
+        model_ids = self._resolve_model_ids(prompt, model_ids, budget)
+        if not model_ids:
+            return
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        done_marker = object()
+        
+        async def produce(model_id: str) -> None:
+            chunk_index = 0
+            
+            def on_chunk(delta: str) -> None:
+                nonlocal chunk_index
+                queue.put_nowait(ResponseChunk(
+                    model_id=model_id,
+                    provider=self.models[model_id].provider,
+                    delta=delta,
+                    index=chunk_index
+                ))
+                chunk_index += 1
+            
+            try:
+                response = await self._generate_response(
+                    model_id, prompt, system_message,
+                    on_chunk=on_chunk if stream_tokens else None,
+                    use_cache=use_cache
+                )
+                if response is not None:
+                    queue.put_nowait(response)
+            finally:
+                queue.put_nowait(done_marker)
+        
+        tasks = [asyncio.create_task(produce(model_id)) for model_id in model_ids]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                item = await queue.get()
+                if item is done_marker:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
     async def _generate_response(self, model_id: str, prompt: str, 
-                              system_message: Optional[str] = None) -> Optional[ModelResponse]:
+                              system_message: Optional[str] = None,
+                              on_chunk: Optional[Callable[[str], None]] = None,
+                              use_cache: bool = True) -> Optional[ModelResponse]:
         """Generate response from a single model"""
         try:
             config = self.models[model_id]
             
-            # Implementation depends on the provider
-            if config.provider == LLMProvider.OPENAI:
-                return await self._generate_openai_response(model_id, config, prompt, system_message)
-            elif config.provider == LLMProvider.ANTHROPIC:
-                return await self._generate_anthropic_response(model_id, config, prompt, system_message)
-            else:
+            # Fit the prompt to this model's context window; packing is shared by models with the same budget
+            prompt = self.context_packer.pack_for_model(prompt, config, system_message).text
+            
+            cacheable = (use_cache and self.response_cache is not None
+                         and self.response_cache.is_cacheable(config.parameters))
+            if cacheable:
+                cached = await self.response_cache.aget(model_id, system_message, prompt, config.parameters)
+                if cached is not None:
+                    if on_chunk:
+                        on_chunk(cached["content"])
+                    return ModelResponse(
+                        model_id=model_id,
+                        provider=config.provider,
+                        content=cached["content"],
+                        metadata={"cached": True},
+                        confidence=cached.get("confidence", 1.0),
+                        latency=0.0
+                    )
+            
+            if config.provider not in (LLMProvider.OPENAI, LLMProvider.ANTHROPIC):
                 logger.warning(f"Unsupported provider {config.provider} for model {model_id}")
                 return None
+            
+            # Wait for a slot first: a HALF_OPEN trial reserved by allow_request() must
+            # not be held across an await that a quorum or hedge cancel can interrupt
+            limiter = self._get_concurrency_limiter(model_id)
+            await limiter.acquire()
+            
+            # Fail fast instead of paying a full timeout on a provider that keeps failing
+            breaker = self._get_circuit_breaker(model_id)
+            if not breaker.allow_request():
+                limiter.release(None)
+                logger.info(f"Circuit open for model {model_id}, skipping request")
+                return None
+            
+            success: Optional[bool] = None
+            latency: Optional[float] = None
+            try:
+                # Implementation depends on the provider
+                if config.provider == LLMProvider.OPENAI:
+                    response = await self._generate_openai_response(model_id, config, prompt, system_message, on_chunk)
+                else:
+                    response = await self._generate_anthropic_response(model_id, config, prompt, system_message, on_chunk)
+                success, latency = True, response.latency
+            except asyncio.CancelledError:
+                breaker.record_cancelled()
+                raise
+            except Exception:
+                success = False
+                breaker.record_failure()
+                raise
+            finally:
+                limiter.release(success, latency)
+            
+            breaker.record_success()
+            self.latency_tracker.record(model_id, response.latency)
+            if cacheable:
+                await self.response_cache.aset(model_id, system_message, prompt, config.parameters, {
+                    "content": response.content,
+                    "confidence": response.confidence
+                })
+            return response
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Error generating response from model {model_id}: {str(e)}")
             return None
     
     async def _generate_openai_response(self, model_id: str, config: LLMConfig, 
-                                     prompt: str, system_message: Optional[str] = None) -> ModelResponse:
+                                     prompt: str, system_message: Optional[str] = None,
+                                     on_chunk: Optional[Callable[[str], None]] = None) -> ModelResponse:
         """Generate response using OpenAI"""
-        import openai
         import time
         
-        # Set API key
-        openai.api_key = config.api_key
-        
-        # Set custom endpoint if provided
-        if config.endpoint:
-            openai.api_base = config.endpoint
-        
         # Prepare messages
         messages = []
         if system_message:
             messages.append({"role": "system", "content": system_message})
         messages.append({"role": "user", "content": prompt})
         
-        # Generate response
+        # Generate response on the pooled client for this key/endpoint
         start_time = time.time()
-        response = await openai.ChatCompletion.acreate(
-            model=config.model_name,
-            messages=messages,
-            **config.parameters
-        )
+        async with self.client_pool.acquire(config) as client:
+            if on_chunk:
+                # Stream tokens and assemble the full content as they arrive
+                parts = []
+                stream = await client.chat.completions.create(
+                    model=config.model_name,
+                    messages=messages,
+                    stream=True,
+                    **config.parameters
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        on_chunk(delta)
+                response = None
+                content = "".join(parts)
+            else:
+                response = await client.chat.completions.create(
+                    model=config.model_name,
+                    messages=messages,
+                    **config.parameters
+                )
+                content = response.choices[0].message.content
         end_time = time.time()
         
         return ModelResponse(
             model_id=model_id,
             provider=config.provider,
-            content=response.choices[0].message.content,
+            content=content,
             metadata={"response": response},
             confidence=1.0,  # OpenAI doesn't provide confidence scores
             latency=end_time - start_time
         )
     
     async def _generate_anthropic_response(self, model_id: str, config: LLMConfig, 
-                                        prompt: str, system_message: Optional[str] = None) -> ModelResponse:
+                                        prompt: str, system_message: Optional[str] = None,
+                                        on_chunk: Optional[Callable[[str], None]] = None) -> ModelResponse:
         """Generate response using Anthropic"""
-        import anthropic
         import time
         
-        # Initialize client
-        client = anthropic.Anthropic(api_key=config.api_key)
-        
         # Prepare system prompt
         if not system_message:
             system_message = ""
         
-        # Generate response
+        # Generate response on the pooled client for this key/endpoint
         start_time = time.time()
-        response = await client.messages.create(
-            model=config.model_name,
-            system=system_message,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            **config.parameters
-        )
+        async with self.client_pool.acquire(config) as client:
+            if on_chunk:
+                # Stream text deltas and assemble the full content as they arrive
+                parts = []
+                stream = await client.messages.create(
+                    model=config.model_name,
+                    system=system_message,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    stream=True,
+                    **config.parameters
+                )
+                async for event in stream:
+                    if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                        parts.append(event.delta.text)
+                        on_chunk(event.delta.text)
+                response = None
+                content = "".join(parts)
+            else:
+                response = await client.messages.create(
+                    model=config.model_name,
+                    system=system_message,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    **config.parameters
+                )
+                content = response.content[0].text
         end_time = time.time()
         
         return ModelResponse(
             model_id=model_id,
             provider=config.provider,
-            content=response.content[0].text,
+            content=content,
             metadata={"response": response},
             confidence=1.0,  # Anthropic doesn't provide confidence scores
             latency=end_time - start_time
@@ -191,7 +555,60 @@ class BeamChat:
         if not strategy_func:
             raise ValueError(f"Unknown fusion strategy: {strategy}")
         
-        return await strategy_func(responses)
+        result = await strategy_func(responses)
+        self._record_fusion_outcome(result)
+        return result
+    
+    def _record_fusion_outcome(self, result: FusionResult) -> None:
+        """Credit the models that the fusion strategy preferred so routing can learn from it"""
+        responses = result.source_responses
+        evidence = result.metadata.get("evidence")
+        if evidence:
+            # Scored strategies use router quality as a prior; crediting that choice
+            # would let a model's prior win it more credit, so use the prior-free ranking
+            best = max(evidence, key=evidence.get)
+            credits = {r.model_id: (1.0 if i == best else 0.0) for i, r in enumerate(responses)}
+        else:
+            winners = [r.model_id for r in responses if r.content == result.content]
+            if not winners:
+                # Combined output (e.g. ensemble): no single model to credit
+                return
+            if result.strategy == FusionStrategy.AUTO_SELECT and any(
+                    r.confidence >= result.confidence and r.content != result.content for r in responses):
+                # Tied confidences (e.g. Anthropic's fixed 1.0): the pick was just the first arrival
+                return
+            credits = {r.model_id: (1.0 if r.model_id in winners else 0.0) for r in responses}
+        self.router.record_outcome(credits)
+    
+    async def fuse_stream(self, stream: AsyncIterator[Union[ModelResponse, ResponseChunk]],
+                          strategy: FusionStrategy = FusionStrategy.AUTO_SELECT,
+                          on_partial: Optional[Callable[[FusionResult], Awaitable[None]]] = None) -> FusionResult:
+        """Fuse responses incrementally while consuming a stream from stream_responses
+        
+        For AUTO_SELECT, on_partial is awaited with a provisional result every time
+        a better response arrives, so callers can publish a first answer before
+        the remaining models finish. Token chunks in the stream are ignored.
+        """
+        responses: List[ModelResponse] = []
+        best: Optional[ModelResponse] = None
+        
+        async for item in stream:
+            if not isinstance(item, ModelResponse):
+                continue
+            responses.append(item)
+            
+            if strategy == FusionStrategy.AUTO_SELECT and on_partial:
+                if best is None or item.confidence > best.confidence:
+                    best = item
+                    await on_partial(FusionResult(
+                        content=best.content,
+                        source_responses=list(responses),
+                        strategy=strategy,
+                        confidence=best.confidence,
+                        metadata={"partial": True}
+                    ))
+        
+        return await self.fuse_responses(responses, strategy)
     
     async def _auto_select_fusion(self, responses: List[ModelResponse]) -> FusionResult:
         """Automatically select the best response based on confidence and latency"""
@@ -205,44 +622,46 @@ class BeamChat:
             confidence=best_response.confidence
         )
     
+    def _score_responses(self, responses: List[ModelResponse]) -> FusionScores:
+        """Score responses with the fusion scorer, using learned router quality as model priors"""
+        priors = {
+            r.model_id: self.router.profiles[r.model_id].quality
+            for r in responses if r.model_id in self.router.profiles
+        }
+        return self.fusion_scorer.score_responses(responses, priors=priors)
+    
     async def _checklist_fusion(self, responses: List[ModelResponse]) -> FusionResult:
-        """Evaluate responses against a checklist of criteria"""
-        # This would typically use another LLM to evaluate responses against criteria
-        # Simplified implementation for now
-        scores = {}
-        for i, response in enumerate(responses):
-            # Placeholder for actual evaluation logic
-            scores[i] = response.confidence
+        """Evaluate responses against a checklist of criteria
         
-        best_idx = max(scores.items(), key=lambda x: x[1])[0]
+        Responses are scored on checklist keyword coverage (fusion_scorer.checklist),
+        agreement with the other responses, length, confidence and model priors.
+        """
+        scored = self._score_responses(responses)
+        best_idx = scored.best_index
         best_response = responses[best_idx]
         
         return FusionResult(
             content=best_response.content,
             source_responses=responses,
             strategy=FusionStrategy.CHECKLIST,
-            confidence=scores[best_idx],
-            metadata={"scores": scores}
+            confidence=float(scored.scores[best_idx]),
+            metadata={
+                "scores": {i: float(s) for i, s in enumerate(scored.scores)},
+                "evidence": {i: float(s) for i, s in enumerate(scored.evidence)},
+                "features": {i: scored.to_dict(i) for i in range(len(responses))}
+            }
         )
     
     async def _weighted_fusion(self, responses: List[ModelResponse]) -> FusionResult:
-        """Weight responses based on model capabilities"""
-        # This would typically use a weighted combination of responses
-        # Simplified implementation for now
-        weights = {}
-        for i, response in enumerate(responses):
-            # Placeholder for actual weighting logic
-            weights[i] = response.confidence
+        """Weight responses based on their fusion scores"""
+        scored = self._score_responses(responses)
+        weights = {i: float(w) for i, w in enumerate(scored.weights())}
         
-        # Normalize weights
-        total_weight = sum(weights.values())
-        if total_weight > 0:
-            weights = {k: v / total_weight for k, v in weights.items()}
-        
-        # Combine responses (simplified - in reality would be more sophisticated)
+        # Highest-weighted responses first
+        order = sorted(weights, key=weights.get, reverse=True)
         combined_content = "\n\n---\n\n".join(
-            [f"Model {responses[i].model_id} (weight: {w:.2f}):\n{responses[i].content}" 
-             for i, w in weights.items()]
+            [f"Model {responses[i].model_id} (weight: {weights[i]:.2f}):\n{responses[i].content}" 
+             for i in order]
         )
         
         return FusionResult(
@@ -250,7 +669,11 @@ class BeamChat:
             source_responses=responses,
             strategy=FusionStrategy.WEIGHTED,
             confidence=sum(r.confidence * weights[i] for i, r in enumerate(responses)),
-            metadata={"weights": weights}
+            metadata={
+                "weights": weights,
+                "scores": {i: float(s) for i, s in enumerate(scored.scores)},
+                "evidence": {i: float(s) for i, s in enumerate(scored.evidence)}
+            }
         )
     
     async def _ensemble_fusion(self, responses: List[ModelResponse]) -> FusionResult:
@@ -272,57 +695,172 @@ class BeamChat:
         """Handle incoming BeamChat requests"""
         payload = message.get('payload', {})
         prompt = payload.get('prompt')
-        system_message = payload.get('system_message')
-        model_ids = payload.get('model_ids')
-        strategy = FusionStrategy(payload.get('strategy', FusionStrategy.AUTO_SELECT.value))
         request_id = payload.get('request_id')
         
         if not prompt or not request_id:
             logger.error("Invalid BeamChat request: missing prompt or request_id")
             return
         
-        # Process request asynchronously
-        asyncio.create_task(self._process_beam_chat_request(
-            request_id, prompt, system_message, model_ids, strategy
+        # Queue the request; bounded workers process it and identical requests are coalesced
+        self.request_queue.submit(QueuedBeamRequest(
+            request_id=request_id,
+            prompt=prompt,
+            system_message=payload.get('system_message'),
+            model_ids=payload.get('model_ids'),
+            options={
+                'strategy': payload.get('strategy', FusionStrategy.AUTO_SELECT.value),
+                'quorum': payload.get('quorum'),
+                'use_cache': payload.get('use_cache', True),
+                'budget': payload.get('budget')
+            }
         ))
     
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Run broker requests on `loop` (default: the running loop, else a background loop)
+        
+        Broker handlers run on worker threads without an event loop, so
+        requests are handed to this loop; if start() is never called, the
+        first request starts a background loop.
+        """
+        self.request_queue.start(loop)
+    
+    async def stop(self) -> None:
+        """Stop the request queue workers"""
+        await self.request_queue.stop()
+    
+    async def _process_queued_request(self, batch: BeamRequestBatch) -> None:
+        """Run a queued batch: one model fan-out, fused once per requested strategy"""
+        request = batch.primary
+        options = request.options
+        groups: Dict[str, List[str]] = {}
+        for queued in batch.requests:
+            groups.setdefault(queued.options.get('strategy', FusionStrategy.AUTO_SELECT.value), []).append(
+                queued.request_id)
+        
+        strategies: Dict[FusionStrategy, List[str]] = {}
+        for value, request_ids in groups.items():
+            try:
+                strategies[FusionStrategy(value)] = request_ids
+            except ValueError as e:
+                for request_id in request_ids:
+                    self._publish_beam_chat_error(request_id, str(e))
+        if not strategies:
+            return
+        
+        quorum = QuorumPolicy.from_dict(options['quorum']) if options.get('quorum') else None
+        use_cache = options.get('use_cache', True)
+        budget = RoutingBudget.from_dict(options['budget']) if options.get('budget') else None
+        
+        if len(strategies) == 1:
+            strategy, request_ids = next(iter(strategies.items()))
+            await self._process_beam_chat_request(
+                request.request_id, request.prompt, request.system_message, request.model_ids, strategy,
+                quorum=quorum, use_cache=use_cache, budget=budget, request_ids=request_ids
+            )
+            return
+        
+        # Several strategies over the same fan-out: collect the responses once, fuse each way
+        try:
+            responses = await self.generate_responses(request.prompt, request.system_message, request.model_ids,
+                                                      quorum, use_cache, budget)
+        except Exception as e:
+            logger.error(f"Error processing BeamChat request {request.request_id}: {str(e)}")
+            for request_ids in strategies.values():
+                for request_id in request_ids:
+                    self._publish_beam_chat_error(request_id, str(e))
+            return
+        for strategy, request_ids in strategies.items():
+            try:
+                result = await self.fuse_responses(responses, strategy)
+                self._publish_beam_chat_result(request_ids, result)
+            except Exception as e:
+                logger.error(f"Error fusing BeamChat request {request.request_id}: {str(e)}")
+                for request_id in request_ids:
+                    self._publish_beam_chat_error(request_id, str(e))
+    
+    def _reject_queued_request(self, request: QueuedBeamRequest, reason: str) -> None:
+        """Report a request the queue could not accept"""
+        self._publish_beam_chat_error(request.request_id, reason)
+    
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """Get request queue depth, wait-time and throughput metrics"""
+        return self.request_queue.get_metrics()
+    
+    def _publish_beam_chat_error(self, request_id: str, error: str) -> None:
+        self.broker.broadcast_system_message(
+            'beam_chat_error',
+            {
+                'request_id': request_id,
+                'error': error
+            }
+        )
+    
     async def _process_beam_chat_request(self, request_id: str, prompt: str, 
                                        system_message: Optional[str] = None,
                                        model_ids: Optional[List[str]] = None,
-                                       strategy: FusionStrategy = FusionStrategy.AUTO_SELECT) -> None:
-        """Process a BeamChat request asynchronously"""
+                                       strategy: FusionStrategy = FusionStrategy.AUTO_SELECT,
+                                       quorum: Optional[QuorumPolicy] = None,
+                                       use_cache: bool = True,
+                                       budget: Optional[RoutingBudget] = None,
+                                       request_ids: Optional[List[str]] = None) -> None:
+        """Process a BeamChat request asynchronously
+        
+        request_ids lists every coalesced request sharing this run; results are
+        published for each of them (defaults to just request_id).
+        """
+        if request_ids is None:
+            request_ids = [request_id]
+        
+        async def publish_partial(partial: FusionResult) -> None:
+            for rid in list(request_ids):
+                self.broker.broadcast_system_message(
+                    'beam_chat_partial_result',
+                    {
+                        'request_id': rid,
+                        'content': partial.content,
+                        'confidence': partial.confidence,
+                        'strategy': partial.strategy.value,
+                        'models': [r.model_id for r in partial.source_responses]
+                    }
+                )
+        
         try:
-            # Generate responses from multiple models
-            responses = await self.generate_responses(prompt, system_message, model_ids)
-            
-            # Fuse responses
-            result = await self.fuse_responses(responses, strategy)
+            if quorum:
+                # Cut off at the quorum / latency budget, hedging slow models
+                responses = await self.generate_responses(prompt, system_message, model_ids, quorum,
+                                                          use_cache, budget)
+                result = await self.fuse_responses(responses, strategy)
+            else:
+                # Consume model responses as they arrive, publishing early results when possible
+                stream = self.stream_responses(prompt, system_message, model_ids,
+                                               use_cache=use_cache, budget=budget)
+                result = await self.fuse_stream(stream, strategy, on_partial=publish_partial)
             
+            self._publish_beam_chat_result(request_ids, result)
+        except Exception as e:
+            logger.error(f"Error processing BeamChat request {request_id}: {str(e)}")
+            for rid in list(request_ids):
+                self._publish_beam_chat_error(rid, str(e))
+    
+    def _publish_beam_chat_result(self, request_ids: List[str], result: FusionResult) -> None:
+        """Store and broadcast a fused result for each request that shares it"""
+        for rid in list(request_ids):
             # Store result in memory
-            self.memory.write(f"result:{request_id}", {
+            self.memory.write(f"result:{rid}", {
                 "content": result.content,
                 "confidence": result.confidence,
                 "strategy": result.strategy.value,
                 "models": [r.model_id for r in result.source_responses]
-            })
+            }, mode=WriteMode.SINGLE_WRITER)
             
             # Broadcast result
             self.broker.broadcast_system_message(
                 'beam_chat_result',
                 {
-                    'request_id': request_id,
+                    'request_id': rid,
                     'content': result.content,
                     'confidence': result.confidence,
                     'strategy': result.strategy.value,
                     'models': [r.model_id for r in result.source_responses]
                 }
             )
-        except Exception as e:
-            logger.error(f"Error processing BeamChat request {request_id}: {str(e)}")
-            self.broker.broadcast_system_message(
-                'beam_chat_error',
-                {
-                    'request_id': request_id,
-                    'error': str(e)
-                }
-            )
\ No newline at end of file
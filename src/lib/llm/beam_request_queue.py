@@ -0,0 +1,222 @@
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+import logging
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .latency_tracker import LatencyTracker
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Options that only affect how responses are fused, not the model fan-out
+FUSION_OPTIONS = ("strategy",)
+
+
+@dataclass
+class QueuedBeamRequest:
+    """A BeamChat request waiting for a worker"""
+    request_id: str
+    prompt: str
+    system_message: Optional[str] = None
+    model_ids: Optional[List[str]] = None
+    options: Dict[str, Any] = field(default_factory=dict)  # strategy, quorum, use_cache, budget, ...
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    def coalesce_key(self) -> str:
+        """Requests with the same key send the same calls to the same models and can share them"""
+        return json.dumps([
+            self.prompt,
+            self.system_message,
+            sorted(self.model_ids) if self.model_ids else None,
+            {k: v for k, v in self.options.items() if k not in FUSION_OPTIONS}
+        ], sort_keys=True, default=str)
+
+
+@dataclass
+class BeamRequestBatch:
+    """Compatible requests coalesced into a single fan-out"""
+    primary: QueuedBeamRequest
+    requests: List[QueuedBeamRequest] = field(default_factory=list)
+
+    @property
+    def request_ids(self) -> List[str]:
+        return [request.request_id for request in self.requests]
+
+
+class BeamRequestQueue:
+    """Bounded async work queue in front of BeamChat request processing
+
+    A fixed set of workers drains the queue, so a burst of broker messages
+    cannot start an unbounded number of provider calls. Requests that would
+    send the same calls to the same models (they may differ in fusion
+    strategy) join a queued batch if they arrive before it starts, at least
+    coalesce_window after its first request, and share one fan-out. When the
+    queue is full, new requests are rejected through `reject`.
+
+    Workers run on the loop given to start(). submit() may be called from
+    any thread; if nothing started the queue, the first submit starts it on
+    a background event loop thread.
+    """
+
+    def __init__(self, process: Callable[[BeamRequestBatch], Awaitable[None]],
+                 reject: Callable[[QueuedBeamRequest, str], None],
+                 max_size: int = 1000, workers: int = 8, coalesce_window: float = 0.005):
+        self.process = process
+        self.reject = reject
+        self.max_size = max_size
+        self.workers = workers
+        self.coalesce_window = coalesce_window
+        self.queue: Optional[asyncio.Queue] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.worker_tasks: List[asyncio.Task] = []
+        self.batches: Dict[str, BeamRequestBatch] = {}
+        self.wait_times = LatencyTracker(window_size=1000, min_samples=1)
+        self.counters: Dict[str, int] = {
+            "submitted": 0, "processed": 0, "rejected": 0, "coalesced": 0, "failed": 0
+        }
+        self.in_flight = 0
+        self._owned_loop_thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.loop is not None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Start the workers on `loop`, the running loop, or a new background loop"""
+        with self._start_lock:
+            if self.loop is not None:
+                return
+            if loop is None:
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    loop = self._start_background_loop()
+            self.loop = loop
+        # Runs before anything submit() schedules afterwards (call_soon is FIFO)
+        self._on_loop(self._start_workers)
+
+    def _start_background_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.new_event_loop()
+        self._owned_loop_thread = threading.Thread(target=self._run_background_loop, args=(loop,),
+                                                   daemon=True, name="beam-request-queue")
+        self._owned_loop_thread.start()
+        return loop
+
+    @staticmethod
+    def _run_background_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+            # Let per-loop resources (e.g. pooled provider clients) close on this loop
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+    def _start_workers(self) -> None:
+        self.queue = asyncio.Queue(maxsize=self.max_size)
+        self.worker_tasks = [
+            self.loop.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Started BeamChat request queue with {self.workers} workers")
+
+    def _on_loop(self, callback: Callable[..., None], *args: Any) -> None:
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        if current_loop is self.loop:
+            callback(*args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    async def stop(self) -> None:
+        """Cancel the workers (queued requests are dropped)"""
+        loop = self.loop
+        if loop is None:
+            return
+        if asyncio.get_running_loop() is loop:
+            await self._stop_workers()
+        else:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._stop_workers(), loop))
+        if self._owned_loop_thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            self._owned_loop_thread.join(timeout=1.0)
+            self._owned_loop_thread = None
+        self.loop = None
+
+    async def _stop_workers(self) -> None:
+        for task in self.worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        self.worker_tasks = []
+        self.batches.clear()
+
+    def submit(self, request: QueuedBeamRequest) -> None:
+        """Queue a request from any thread; overload is reported through reject"""
+        if self.loop is None:
+            self.start()
+        self._on_loop(self._enqueue, request)
+
+    def _enqueue(self, request: QueuedBeamRequest) -> None:
+        self.counters["submitted"] += 1
+        key = request.coalesce_key()
+
+        batch = self.batches.get(key)
+        if batch is not None:
+            batch.requests.append(request)
+            self.counters["coalesced"] += 1
+            return
+
+        batch = BeamRequestBatch(primary=request, requests=[request])
+        try:
+            self.queue.put_nowait((key, batch))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            logger.warning(f"BeamChat request queue full, rejecting {request.request_id}")
+            self.reject(request, "BeamChat request queue is full")
+            return
+        self.batches[key] = batch
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            key, batch = await self.queue.get()
+            try:
+                # Give compatible requests in the same burst a chance to join
+                remaining = batch.primary.enqueued_at + self.coalesce_window - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+            finally:
+                # Closed from here on: later requests start a new batch
+                if self.batches.get(key) is batch:
+                    del self.batches[key]
+
+            try:
+                self.wait_times.record("queue_wait", time.monotonic() - batch.primary.enqueued_at)
+                self.in_flight += 1
+                try:
+                    await self.process(batch)
+                    self.counters["processed"] += len(batch.requests)
+                except Exception as e:
+                    self.counters["failed"] += len(batch.requests)
+                    logger.error(f"BeamChat worker {worker_id} failed on {batch.primary.request_id}: {str(e)}")
+                finally:
+                    self.in_flight -= 1
+            finally:
+                self.queue.task_done()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, wait-time percentiles and counters"""
+        return {
+            **self.counters,
+            "depth": self.queue.qsize() if self.queue else 0,
+            "in_flight": self.in_flight,
+            "workers": len(self.worker_tasks),
+            "wait_p50": self.wait_times.p50("queue_wait"),
+            "wait_p95": self.wait_times.p95("queue_wait"),
+            "wait_p99": self.wait_times.p99("queue_wait")
+        }
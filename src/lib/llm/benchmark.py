@@ -0,0 +1,296 @@
+from typing import Dict, List, Optional, Any, Awaitable, Callable
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+
+from .persona_llm_manager import LLMProvider, LLMConfig
+from .beam_chat import BeamChat, FusionStrategy, ModelResponse
+from .hierarchical_agent_system import HierarchicalAgentSystem
+from .mock_provider import MockModelSpec, MockProviderClientPool
+from ..messaging.message_broker import MessageBroker
+from ..messaging.local_broker import LocalMessageBroker
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ("generate_responses", "fuse_responses", "collaborate_on_task")
+
+DEFAULT_MODELS: Dict[str, MockModelSpec] = {
+    "mock-fast": MockModelSpec(latency_mean=0.05, latency_stddev=0.01, output_tokens=80),
+    "mock-balanced": MockModelSpec(latency_mean=0.15, latency_stddev=0.05, output_tokens=150),
+    "mock-slow": MockModelSpec(latency_mean=0.4, latency_stddev=0.2, error_rate=0.02, output_tokens=300),
+}
+
+DEFAULT_PROMPT = (
+    "Develop a rollout plan for a multilingual customer service assistant, covering "
+    "architecture, escalation to human agents, cost controls and delivery milestones."
+)
+
+
+class _LocalBroker(LocalMessageBroker):
+    """In-process broker that also counts published messages"""
+
+    def __init__(self):
+        super().__init__()
+        self.published = 0
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self.published += 1
+        super().publish(channel, message)
+
+
+@dataclass
+class BenchmarkConfig:
+    """What to run and how hard to drive it"""
+    concurrency_levels: List[int] = field(default_factory=lambda: [1, 4, 16])
+    requests_per_level: int = 50
+    models: Dict[str, MockModelSpec] = field(default_factory=lambda: dict(DEFAULT_MODELS))
+    scenarios: List[str] = field(default_factory=lambda: list(SCENARIOS))
+    fusion_strategy: FusionStrategy = FusionStrategy.CHECKLIST
+    prompt: str = DEFAULT_PROMPT
+    seed: int = 0
+    trace_memory: bool = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for serialization"""
+        return {
+            "concurrency_levels": self.concurrency_levels,
+            "requests_per_level": self.requests_per_level,
+            "models": {name: asdict(spec) for name, spec in self.models.items()},
+            "scenarios": self.scenarios,
+            "fusion_strategy": self.fusion_strategy.value,
+            "seed": self.seed,
+            "trace_memory": self.trace_memory
+        }
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements for one scenario at one concurrency level"""
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    partial: int                  # Requests answered by fewer models than were asked
+    duration: float               # Seconds
+    throughput: float             # Requests per second
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+    p99_ms: Optional[float]
+    peak_memory_bytes: Optional[int] = None
+
+
+def _percentile(ordered: List[float], percentile: float) -> Optional[float]:
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, math.ceil(percentile / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class BenchmarkRunner:
+    """Drives BeamChat and HierarchicalAgentSystem with mock providers
+
+    Runs generate_responses, fuse_responses and collaborate_on_task at fixed
+    concurrency levels, with every model call served by a
+    MockProviderClientPool, and reports throughput, p50/p95/p99 latency and
+    peak traced memory. Reports are plain JSON so runs can be compared
+    between releases:
+
+        python -m src.lib.llm.benchmark --concurrency 1,8,32 --requests 200 --output bench.json
+    """
+
+    def __init__(self, config: Optional[BenchmarkConfig] = None):
+        self.config = config or BenchmarkConfig()
+
+    def _model_configs(self) -> Dict[str, LLMConfig]:
+        # Alternate SDK shapes so both provider code paths are exercised
+        providers = (LLMProvider.OPENAI, LLMProvider.ANTHROPIC)
+        return {
+            name: LLMConfig(provider=providers[i % 2], model_name=name, api_key=f"mock-{name}")
+            for i, name in enumerate(self.config.models)
+        }
+
+    def _client_pool(self) -> MockProviderClientPool:
+        return MockProviderClientPool(self.config.models, seed=self.config.seed, max_concurrency_per_key=1024)
+
+    def _beam_chat(self, broker: MessageBroker) -> BeamChat:
+        beam_chat = BeamChat(broker, client_pool=self._client_pool())
+        for model_id, config in self._model_configs().items():
+            beam_chat.register_model(model_id, config)
+        return beam_chat
+
+    def _agent_system(self, broker: MessageBroker) -> HierarchicalAgentSystem:
+        system = HierarchicalAgentSystem(broker)
+        system.beam_chat.client_pool = self._client_pool()
+        system.collaboration_cache = None
+        for model_id, config in self._model_configs().items():
+            system.beam_chat.register_model(model_id, config)
+        return system
+
+    async def _drive(self, scenario: str, concurrency: int,
+                     request: Callable[[int], Awaitable[int]]) -> BenchmarkResult:
+        """Run requests_per_level requests with at most `concurrency` in flight
+
+        request(i) returns the number of model responses it got back.
+        """
+        total = self.config.requests_per_level
+        expected = len(self.config.models)
+        latencies: List[float] = []
+        errors = 0
+        partial = 0
+        next_index = 0
+
+        async def worker() -> None:
+            nonlocal errors, partial, next_index
+            while next_index < total:
+                index = next_index
+                next_index += 1
+                start = time.perf_counter()
+                try:
+                    answered = await request(index)
+                except Exception as e:
+                    logger.debug(f"{scenario} request {index} failed: {e}")
+                    answered = 0
+                latencies.append(time.perf_counter() - start)
+                if answered == 0:
+                    errors += 1
+                elif answered < expected:
+                    partial += 1
+
+        if self.config.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+        duration = time.perf_counter() - start
+        peak = None
+        if self.config.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        ordered = sorted(latencies)
+        return BenchmarkResult(
+            scenario=scenario,
+            concurrency=concurrency,
+            requests=len(latencies),
+            errors=errors,
+            partial=partial,
+            duration=duration,
+            throughput=len(latencies) / duration if duration > 0 else 0.0,
+            p50_ms=_ms(_percentile(ordered, 50)),
+            p95_ms=_ms(_percentile(ordered, 95)),
+            p99_ms=_ms(_percentile(ordered, 99)),
+            peak_memory_bytes=peak
+        )
+
+    async def bench_generate_responses(self, concurrency: int) -> BenchmarkResult:
+        beam_chat = self._beam_chat(_LocalBroker())
+
+        async def request(i: int) -> int:
+            responses = await beam_chat.generate_responses(f"{self.config.prompt} (request {i})")
+            return len(responses)
+
+        return await self._drive("generate_responses", concurrency, request)
+
+    async def bench_fuse_responses(self, concurrency: int) -> BenchmarkResult:
+        beam_chat = self._beam_chat(_LocalBroker())
+        # Fusion alone: generate one candidate set up front and fuse it repeatedly
+        responses: List[ModelResponse] = await beam_chat.generate_responses(self.config.prompt)
+        await beam_chat.fuse_responses(responses, self.config.fusion_strategy)  # Warm-up
+
+        async def request(i: int) -> int:
+            await beam_chat.fuse_responses(responses, self.config.fusion_strategy)
+            return len(responses)
+
+        return await self._drive("fuse_responses", concurrency, request)
+
+    async def bench_collaborate_on_task(self, concurrency: int) -> BenchmarkResult:
+        system = self._agent_system(_LocalBroker())
+        agent_ids = list(self.config.models)
+
+        async def request(i: int) -> int:
+            task_id = system.create_task(f"{self.config.prompt} (task {i})", assigned_to=agent_ids[0])
+            result = await system.collaborate_on_task(task_id, agent_ids, self.config.fusion_strategy)
+            return len(result.source_responses) if result else 0
+
+        return await self._drive("collaborate_on_task", concurrency, request)
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every configured scenario at every concurrency level and build a report"""
+        results: List[BenchmarkResult] = []
+        for scenario in self.config.scenarios:
+            if scenario not in SCENARIOS:
+                raise ValueError(f"Unknown benchmark scenario: {scenario}")
+            bench = getattr(self, f"bench_{scenario}")
+            for concurrency in self.config.concurrency_levels:
+                result = await bench(concurrency)
+                logger.info(
+                    f"{scenario} c={concurrency}: {result.throughput:.1f} req/s, "
+                    f"p50={result.p50_ms}ms p95={result.p95_ms}ms p99={result.p99_ms}ms"
+                )
+                results.append(result)
+
+        return {
+            "timestamp": time.time(),
+            "environment": {
+                "python": sys.version.split()[0],
+                "platform": platform.platform()
+            },
+            "config": self.config.to_dict(),
+            "results": [asdict(r) for r in results]
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000.0, 3) if seconds is not None else None
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    """Write a benchmark report as JSON"""
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark BeamChat orchestration against mock providers")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per concurrency level")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--strategy", default=FusionStrategy.CHECKLIST.value, help="Fusion strategy")
+    parser.add_argument("--models", help="JSON file mapping model names to MockModelSpec fields")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc peak-memory tracking")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(
+        concurrency_levels=[int(c) for c in args.concurrency.split(",")],
+        requests_per_level=args.requests,
+        scenarios=args.scenarios.split(","),
+        fusion_strategy=FusionStrategy(args.strategy),
+        seed=args.seed,
+        trace_memory=not args.no_memory
+    )
+    if args.models:
+        with open(args.models) as f:
+            config.models = {name: MockModelSpec.from_dict(spec) for name, spec in json.load(f).items()}
+
+    report = asyncio.run(BenchmarkRunner(config).run())
+    if args.output:
+        save_report(report, args.output)
+    else:
+        print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+from typing import Dict, List, Optional, Any, Awaitable, Callable, Iterable, Tuple
+from collections import OrderedDict
+import asyncio
+import logging
+import threading
+import time
+
+from .beam_chat import FusionStrategy, FusionResult, ModelResponse
+from .persona_llm_manager import LLMProvider
+from .response_cache import _digest
+from ..messaging.shared_memory import WriteMode
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CollaborationCache:
+    """Content-addressed cache of fused collaboration results
+
+    Keyed by (task description, sorted agent_ids, fusion strategy), so a
+    structurally identical subtask in another DAG or client project reuses
+    the earlier fusion instead of fanning out to every agent again.
+    Identical collaborations that run at the same time share one fan-out.
+    Entries expire after ttl seconds and can optionally be mirrored to
+    Redis through a SharedMemoryManager (results must then be encodable by
+    its codec).
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: Optional[float] = 3600.0,
+                 memory: Optional[Any] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.memory = memory  # Optional SharedMemoryManager for the Redis tier
+        self.entries: "OrderedDict[str, Tuple[Optional[float], FusionResult]]" = OrderedDict()
+        self.key_agents: Dict[str, Tuple[str, ...]] = {}
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.stats_counters: Dict[str, int] = {
+            "hits": 0, "remote_hits": 0, "coalesced": 0, "misses": 0, "evictions": 0
+        }
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(description: str, agent_ids: Iterable[str], strategy: FusionStrategy) -> str:
+        return _digest(description, sorted(set(agent_ids)), strategy.value)
+
+    def get(self, key: str) -> Optional[FusionResult]:
+        """Look up a cached result, or None on a miss"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at is None or expires_at >= time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.stats_counters["hits"] += 1
+                    return result
+                self._remove(key)
+
+        remote = self._get_remote(key)
+        if remote is not None:
+            self.stats_counters["remote_hits"] += 1
+            result, agent_ids = remote
+            self._set_local(key, result, agent_ids)
+            return result
+
+        self.stats_counters["misses"] += 1
+        return None
+
+    def set(self, key: str, result: FusionResult, agent_ids: Iterable[str]) -> None:
+        self._set_local(key, result, agent_ids)
+        if self.memory is not None:
+            try:
+                value = {**self._serialize(result), "agent_ids": sorted(set(agent_ids))}
+                self.memory.write(f"collaboration_cache:{key}", value, sync=False, mode=WriteMode.SINGLE_WRITER,
+                                  ttl=self.ttl, cache=False)
+            except Exception as e:
+                logger.warning(f"Failed to write collaboration cache entry to Redis: {str(e)}")
+
+    async def get_or_run(self, key: str, agent_ids: List[str],
+                         run: Callable[[], Awaitable[Optional[FusionResult]]]) -> Tuple[Optional[FusionResult], bool]:
+        """(result, served_from_cache); `run` is only awaited if no cached or in-flight result exists"""
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.stats_counters["coalesced"] += 1
+            return await asyncio.shield(pending), True
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await run()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn when there are none
+            raise
+        else:
+            future.set_result(result)
+            if result is not None:
+                self.set(key, result, agent_ids)
+            return result, False
+        finally:
+            self.inflight.pop(key, None)
+
+    def _set_local(self, key: str, result: FusionResult, agent_ids: Iterable[str]) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self.entries[key] = (expires_at, result)
+            self.entries.move_to_end(key)
+            self.key_agents[key] = tuple(agent_ids)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.stats_counters["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        """Drop a key (caller holds the lock)"""
+        self.entries.pop(key, None)
+        self.key_agents.pop(key, None)
+
+    def invalidate(self, description: Optional[str] = None, agent_ids: Optional[Iterable[str]] = None,
+                   strategy: Optional[FusionStrategy] = None) -> int:
+        """Drop one collaboration (all three arguments), or everything when called without arguments"""
+        if description is None and agent_ids is None and strategy is None:
+            with self._lock:
+                count = len(self.entries)
+                self.entries.clear()
+                self.key_agents.clear()
+            return count
+        if description is None or agent_ids is None or strategy is None:
+            raise ValueError("Pass description, agent_ids and strategy together, or nothing")
+
+        key = self.make_key(description, agent_ids, strategy)
+        with self._lock:
+            found = key in self.entries
+            self._remove(key)
+        if self.memory is not None:
+            try:
+                self.memory.delete(f"collaboration_cache:{key}")
+            except Exception as e:
+                logger.warning(f"Failed to delete collaboration cache entry from Redis: {str(e)}")
+        return int(found)
+
+    def invalidate_agent(self, agent_id: str) -> int:
+        """Drop in-process results any agent_id took part in; Redis entries expire by TTL"""
+        with self._lock:
+            keys = [key for key, agents in self.key_agents.items() if agent_id in agents]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def _get_remote(self, key: str) -> Optional[Tuple[FusionResult, List[str]]]:
+        if self.memory is None:
+            return None
+        try:
+            data = self.memory.read(f"collaboration_cache:{key}", cache=False)
+            if data is None:
+                return None
+            return self._deserialize(data), data["agent_ids"]
+        except Exception as e:
+            logger.warning(f"Failed to read collaboration cache entry from Redis: {str(e)}")
+            return None
+
+    @staticmethod
+    def _serialize(result: FusionResult) -> Dict[str, Any]:
+        return {
+            "content": result.content,
+            "strategy": result.strategy.value,
+            "confidence": result.confidence,
+            "metadata": result.metadata,
+            "source_responses": [
+                {"model_id": r.model_id, "provider": r.provider.value, "content": r.content,
+                 "confidence": r.confidence, "latency": r.latency}
+                for r in result.source_responses
+            ]
+        }
+
+    @staticmethod
+    def _deserialize(data: Dict[str, Any]) -> FusionResult:
+        return FusionResult(
+            content=data["content"],
+            source_responses=[
+                ModelResponse(model_id=r["model_id"], provider=LLMProvider(r["provider"]), content=r["content"],
+                              confidence=r["confidence"], latency=r["latency"])
+                for r in data["source_responses"]
+            ],
+            strategy=FusionStrategy(data["strategy"]),
+            confidence=data["confidence"],
+            metadata=data["metadata"]
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        lookups = sum(self.stats_counters[k] for k in ("hits", "remote_hits", "coalesced", "misses"))
+        hits = lookups - self.stats_counters["misses"]
+        return {
+            **self.stats_counters,
+            "size": len(self.entries),
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
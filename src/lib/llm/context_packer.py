@@ -0,0 +1,219 @@
+from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass
+
+from .persona_llm_manager import LLMConfig
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Context windows in tokens; longest prefix of config.model_name wins, override with set_context_window
+DEFAULT_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-3.5-turbo": 16385,
+    "claude-2": 100000,
+    "claude-3": 200000,
+}
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_SECTION_RE = re.compile(r"\n\s*\n")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+TRUNCATION_MARKER = " [...]"
+
+
+def _omission_marker(count: int) -> str:
+    return f"[... {count} section(s) omitted ...]"
+
+
+@dataclass
+class PackedPrompt:
+    """A prompt fitted to a token budget"""
+    text: str
+    original_tokens: int
+    packed_tokens: int
+    budget: Optional[int]
+
+    @property
+    def truncated(self) -> bool:
+        return self.packed_tokens < self.original_tokens
+
+
+class ContextPacker:
+    """Fits prompts into each model's context window before BeamChat fans them out
+
+    Token counts come from a local estimate (word and punctuation pieces, long
+    words counted as ~4 characters per token) cached per text. Prompts that
+    exceed a model's budget (context window minus max_tokens reserved for the
+    output and the system message) are packed section by section: the first
+    and last sections (usually the instruction and the question) are kept
+    whole when possible, middle sections are kept in order until the budget
+    runs out, and the section that crosses the budget is cut at a sentence
+    boundary. Packed results are cached by (prompt, budget), so models with
+    the same limit share one packing pass.
+    """
+
+    def __init__(self, context_windows: Optional[Dict[str, int]] = None,
+                 default_output_tokens: int = 1024, max_entries: int = 512):
+        self.context_windows = dict(DEFAULT_CONTEXT_WINDOWS)
+        if context_windows:
+            self.context_windows.update(context_windows)
+        self.default_output_tokens = default_output_tokens
+        self.max_entries = max_entries
+        self.token_counts: "OrderedDict[str, int]" = OrderedDict()
+        self.packed: "OrderedDict[Tuple[str, int], PackedPrompt]" = OrderedDict()
+        self.stats_counters: Dict[str, int] = {"packed": 0, "pack_hits": 0, "tokens_saved": 0}
+        self._lock = threading.Lock()
+
+    def set_context_window(self, model_name: str, tokens: int) -> None:
+        """Set the context window for model names starting with model_name"""
+        self.context_windows[model_name] = tokens
+
+    def context_window(self, config: LLMConfig) -> Optional[int]:
+        """Context window for a model, or None when it is unknown"""
+        for name in sorted(self.context_windows, key=len, reverse=True):
+            if config.model_name.startswith(name):
+                return self.context_windows[name]
+        return None
+
+    @staticmethod
+    def _estimate(text: str) -> int:
+        return sum(max(1, math.ceil(len(piece) / 4)) for piece in _PIECE_RE.findall(text))
+
+    def count_tokens(self, text: Optional[str]) -> int:
+        """Estimated token count, cached per text"""
+        if not text:
+            return 0
+        with self._lock:
+            count = self.token_counts.get(text)
+            if count is not None:
+                self.token_counts.move_to_end(text)
+                return count
+        count = self._estimate(text)
+        with self._lock:
+            self.token_counts[text] = count
+            while len(self.token_counts) > self.max_entries:
+                self.token_counts.popitem(last=False)
+        return count
+
+    def budget_for(self, config: LLMConfig, system_message: Optional[str] = None) -> Optional[int]:
+        """Prompt token budget for a model, or None when its window is unknown"""
+        window = self.context_window(config)
+        if window is None:
+            return None
+        output_tokens = config.parameters.get("max_tokens", self.default_output_tokens)
+        return max(0, window - output_tokens - self.count_tokens(system_message))
+
+    def pack_for_model(self, prompt: str, config: LLMConfig,
+                       system_message: Optional[str] = None) -> PackedPrompt:
+        """Fit a prompt into a model's budget"""
+        return self.pack(prompt, self.budget_for(config, system_message))
+
+    def pack(self, prompt: str, budget: Optional[int]) -> PackedPrompt:
+        """Fit a prompt into a token budget (None means unlimited)
+
+        Raises ValueError if the prompt is over a budget too small to hold
+        anything but the omission markers.
+        """
+        original = self.count_tokens(prompt)
+        if budget is None or original <= budget:
+            return PackedPrompt(text=prompt, original_tokens=original, packed_tokens=original, budget=budget)
+
+        if budget - self._estimate(_omission_marker(1)) <= self._estimate(TRUNCATION_MARKER):
+            # Packing would leave nothing but markers; let the caller skip this model instead
+            raise ValueError(f"Prompt of {original} tokens cannot be packed into a budget of {budget} tokens")
+
+        key = (prompt, budget)
+        with self._lock:
+            cached = self.packed.get(key)
+            if cached is not None:
+                self.packed.move_to_end(key)
+                self.stats_counters["pack_hits"] += 1
+                return cached
+
+        text = self._pack_sections(prompt, budget)
+        packed = PackedPrompt(text=text, original_tokens=original,
+                              packed_tokens=self.count_tokens(text), budget=budget)
+        with self._lock:
+            self.packed[key] = packed
+            while len(self.packed) > self.max_entries:
+                self.packed.popitem(last=False)
+            self.stats_counters["packed"] += 1
+            self.stats_counters["tokens_saved"] += original - packed.packed_tokens
+        logger.debug(f"Packed prompt from {original} to {packed.packed_tokens} tokens (budget {budget})")
+        return packed
+
+    def _pack_sections(self, prompt: str, budget: int) -> str:
+        sections = [s for s in _SECTION_RE.split(prompt.strip()) if s.strip()]
+        costs = [self._estimate(s) for s in sections]
+        marker_cost = self._estimate(TRUNCATION_MARKER)
+        # Kept sections form a prefix plus the last section, so at most one omission marker is needed
+        omission_cost = self._estimate(_omission_marker(len(sections)))
+
+        # Instruction and question first, then the middle in reading order
+        if len(sections) > 1:
+            priority = [0, len(sections) - 1] + list(range(1, len(sections) - 1))
+        else:
+            priority = [0]
+
+        kept: Dict[int, str] = {}
+        remaining = budget - omission_cost
+        for index in priority:
+            if remaining <= marker_cost:
+                break
+            if costs[index] <= remaining:
+                kept[index] = sections[index]
+                remaining -= costs[index]
+            else:
+                kept[index] = self._truncate(sections[index], remaining - marker_cost) + TRUNCATION_MARKER
+                remaining = 0
+
+        parts: List[str] = []
+        omitted = 0
+        for index in range(len(sections)):
+            if index in kept:
+                if omitted:
+                    parts.append(_omission_marker(omitted))
+                    omitted = 0
+                parts.append(kept[index])
+            else:
+                omitted += 1
+        if omitted:
+            parts.append(_omission_marker(omitted))
+        return "\n\n".join(parts)
+
+    def _truncate(self, section: str, budget: int) -> str:
+        """Longest prefix of whole sentences (or words, for a single long sentence) within budget"""
+        kept: List[str] = []
+        used = 0
+        for sentence in _SENTENCE_END_RE.split(section):
+            cost = self._estimate(sentence)
+            if used + cost > budget:
+                if not kept:
+                    # Not even one sentence fits: fall back to words
+                    for word in sentence.split():
+                        word_cost = self._estimate(word)
+                        if used + word_cost > budget:
+                            break
+                        kept.append(word)
+                        used += word_cost
+                break
+            kept.append(sentence)
+            used += cost
+        return " ".join(kept)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get packing counters and cache sizes"""
+        return {
+            **self.stats_counters,
+            "token_cache_size": len(self.token_counts),
+            "packed_cache_size": len(self.packed)
+        }
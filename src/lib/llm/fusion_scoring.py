@@ -0,0 +1,233 @@
+from typing import Dict, List, Optional, Any, Sequence, Tuple
+import logging
+import string
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Punctuation, control characters and Unicode whitespace become a space, so
+# after translation every byte <= 0x20 of the UTF-8 encoding separates tokens
+_SEPARATORS = string.punctuation + "".join(chr(i) for i in range(0x3001) if i <= 0x20 or chr(i).isspace())
+_SEPARATOR_TABLE = str.maketrans({c: " " for c in _SEPARATORS})
+
+# Polynomial token hashing on uint64 (wrapping). The multiplier is odd, so it has an
+# inverse mod 2**64 and a token's hash can be cut out of the prefix sums at any offset
+_HASH_MULTIPLIER = 0x100000001B3
+_HASH_INVERSE = pow(_HASH_MULTIPLIER, -1, 2 ** 64)
+_hash_powers = (np.ones(1, dtype=np.uint64), np.ones(1, dtype=np.uint64))
+# Per-thread prefix-sum buffer: a fresh one costs more in page faults than the hashing
+_scratch = threading.local()
+
+FEATURES = ("confidence", "length", "agreement", "checklist", "prior")
+
+
+def _powers(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Multiplier powers and inverse powers for the first `size` byte offsets"""
+    global _hash_powers
+    powers, inverses = _hash_powers
+    if len(powers) < size:
+        capacity = 1 << (size - 1).bit_length()
+        powers = np.full(capacity, _HASH_MULTIPLIER, dtype=np.uint64)
+        inverses = np.full(capacity, _HASH_INVERSE, dtype=np.uint64)
+        powers[0] = inverses[0] = 1
+        np.cumprod(powers, out=powers)
+        np.cumprod(inverses, out=inverses)
+        _hash_powers = (powers, inverses)
+    return powers[:size], inverses[:size]
+
+
+def _scratch_buffer(name: str, size: int, dtype: Any) -> np.ndarray:
+    """Per-thread reusable buffer of `size` elements, with stale contents"""
+    buffer = getattr(_scratch, name, None)
+    if buffer is None or len(buffer) < size:
+        buffer = np.empty(1 << max(size - 1, 0).bit_length(), dtype=dtype)
+        setattr(_scratch, name, buffer)
+    return buffer[:size]
+
+
+def hash_tokens(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash every token of every text without creating per-token Python objects
+
+    Tokens are those of FusionScorer.tokenize. Returns the token hashes in
+    order and the number of tokens in each text.
+    """
+    encoded = [text.lower().translate(_SEPARATOR_TABLE).encode("utf-8") for text in texts]
+    buf = np.frombuffer(b" ".join(encoded), dtype=np.uint8)
+    # Token boundaries are where the text switches between separators and word bytes
+    in_word = np.zeros(len(buf) + 2, dtype=bool)
+    np.greater(buf, 0x20, out=in_word[1:-1])
+    edges = np.flatnonzero(in_word[1:] != in_word[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+
+    powers, inverses = _powers(len(buf))
+    prefix = _scratch_buffer("prefix", len(buf) + 1, np.uint64)
+    prefix[0] = 0
+    np.multiply(buf, powers, out=prefix[1:])
+    np.cumsum(prefix[1:], out=prefix[1:])
+    hashes = (prefix[ends] - prefix[starts]) * inverses[starts]
+
+    text_ends = np.cumsum(np.fromiter((len(e) + 1 for e in encoded), dtype=np.int64, count=len(encoded)))
+    return hashes, np.diff(np.searchsorted(starts, text_ends), prepend=0)
+
+
+@dataclass
+class FusionScores:
+    """Per-response scores from a FusionScorer"""
+    scores: np.ndarray                       # Combined score per response
+    features: Dict[str, np.ndarray] = field(default_factory=dict)
+    evidence: Optional[np.ndarray] = None    # Combined score without the prior
+
+    @property
+    def best_index(self) -> int:
+        return int(np.argmax(self.scores))
+
+    def weights(self) -> np.ndarray:
+        """Scores normalized to sum to 1"""
+        total = float(self.scores.sum())
+        if total <= 0:
+            return np.full(len(self.scores), 1.0 / len(self.scores))
+        return self.scores / total
+
+    def to_dict(self, index: int) -> Dict[str, float]:
+        """Feature breakdown for one response"""
+        breakdown = {name: float(values[index]) for name, values in self.features.items()}
+        breakdown["score"] = float(self.scores[index])
+        return breakdown
+
+
+class FusionScorer:
+    """Scores a batch of candidate responses for the checklist and weighted fusion strategies
+
+    All responses are tokenized and hashed in one vectorized pass over their
+    UTF-8 bytes, and the hashes are sorted into a 0/1 term-incidence matrix
+    over a shared vocabulary. All features are then computed on that matrix
+    in a handful of NumPy operations:
+
+    - confidence: the provider-reported confidence
+    - length: closeness of the (log) length to the batch median
+    - agreement: mean Jaccard overlap with the other responses
+    - checklist: fraction of checklist keywords the response mentions
+    - prior: per-model prior (e.g. ModelRouter quality), 0.5 when unknown
+
+    The combined score is the weighted mean of the features, in [0, 1].
+    The evidence score leaves the prior out, for callers that learn priors
+    from the outcome and must not feed them back into themselves.
+    """
+
+    DEFAULT_WEIGHTS: Dict[str, float] = {
+        "confidence": 1.0,
+        "length": 0.5,
+        "agreement": 1.5,
+        "checklist": 2.0,
+        "prior": 1.0,
+    }
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 checklist: Optional[Sequence[str]] = None):
+        self.weights = dict(self.DEFAULT_WEIGHTS)
+        if weights:
+            unknown = set(weights) - set(FEATURES)
+            if unknown:
+                raise ValueError(f"Unknown fusion features: {sorted(unknown)}")
+            self.weights.update(weights)
+        self.checklist: List[str] = list(checklist or [])
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return text.lower().translate(_SEPARATOR_TABLE).split()
+
+    def score(self, contents: Sequence[str], confidences: Optional[Sequence[float]] = None,
+              priors: Optional[Sequence[Optional[float]]] = None,
+              checklist: Optional[Sequence[str]] = None) -> FusionScores:
+        """Score candidate contents; priors and confidences are aligned with contents"""
+        n = len(contents)
+        if n == 0:
+            raise ValueError("No responses to score")
+
+        checklist = list(checklist) if checklist is not None else self.checklist
+        # The checklist keywords are hashed as one extra text after the responses
+        token_hashes, counts = hash_tokens(list(contents) + [" ".join(checklist)])
+        lengths = counts[:n]
+        has_checklist = bool(counts[n])
+
+        # Term incidence over responses plus the checklist as a last row. The row
+        # replaces the low bits of each hash, so one sort groups equal tokens and
+        # carries the row along without an argsort
+        row_bits = np.uint64(n.bit_length())
+        row_mask = np.uint64((1 << n.bit_length()) - 1)
+        keys = np.sort((token_hashes & ~row_mask) | np.repeat(np.arange(n + 1, dtype=np.uint64), counts))
+        is_new = np.empty(len(keys), dtype=bool)
+        is_new[:1] = True
+        np.not_equal(keys[1:] >> row_bits, keys[:-1] >> row_bits, out=is_new[1:])
+        columns = np.cumsum(is_new) - 1
+        incidence = np.zeros((n + 1, int(columns[-1]) + 1 if len(keys) else 0), dtype=np.float32)
+        incidence[(keys & row_mask).astype(np.intp), columns] = 1.0
+        keywords, incidence_f = incidence[n], incidence[:n]
+
+        features: Dict[str, np.ndarray] = {}
+
+        if confidences is None:
+            features["confidence"] = np.full(n, 0.5)
+        else:
+            features["confidence"] = np.clip(np.asarray(confidences, dtype=np.float64), 0.0, 1.0)
+
+        # Length: 1.0 at the batch median, falling off with log-distance
+        log_len = np.log1p(lengths.astype(np.float64))
+        sorted_len = np.sort(log_len)
+        median = (sorted_len[(n - 1) // 2] + sorted_len[n // 2]) / 2
+        features["length"] = np.exp(-np.abs(log_len - median))
+        features["length"][lengths == 0] = 0.0
+
+        # Agreement: pairwise Jaccard from one matrix product
+        if n > 1:
+            intersection = incidence_f @ incidence_f.T
+            set_sizes = incidence_f.sum(axis=1)
+            union = set_sizes[:, None] + set_sizes[None, :] - intersection
+            jaccard = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+            np.fill_diagonal(jaccard, 0.0)
+            features["agreement"] = jaccard.sum(axis=1) / (n - 1)
+        else:
+            features["agreement"] = np.ones(n)
+
+        # Checklist coverage over the distinct checklist keywords
+        if has_checklist:
+            features["checklist"] = (incidence_f @ keywords) / keywords.sum()
+        else:
+            features["checklist"] = np.zeros(n)
+
+        if priors is None:
+            features["prior"] = np.full(n, 0.5)
+        else:
+            features["prior"] = np.array([0.5 if p is None else p for p in priors], dtype=np.float64)
+
+        # Features without a signal don't dilute the others
+        active = {name: w for name, w in self.weights.items() if w}
+        if not has_checklist:
+            active.pop("checklist", None)
+        evidence_weights = {name: w for name, w in active.items() if name != "prior"}
+        return FusionScores(scores=self._combine(features, active, n), features=features,
+                            evidence=self._combine(features, evidence_weights, n))
+
+    @staticmethod
+    def _combine(features: Dict[str, np.ndarray], weights: Dict[str, float], n: int) -> np.ndarray:
+        total_weight = sum(weights.values())
+        if total_weight <= 0:
+            return np.zeros(n)
+        scores = sum(features[name] * w for name, w in weights.items()) / total_weight
+        return np.asarray(scores, dtype=np.float64)
+
+    def score_responses(self, responses: List[Any], priors: Optional[Dict[str, float]] = None,
+                        checklist: Optional[Sequence[str]] = None) -> FusionScores:
+        """Score ModelResponse objects, looking priors up by model_id"""
+        priors = priors or {}
+        return self.score(
+            [r.content for r in responses],
+            confidences=[r.confidence for r in responses],
+            priors=[priors.get(r.model_id) for r in responses],
+            checklist=checklist
+        )
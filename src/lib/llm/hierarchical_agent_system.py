@@ -2,13 +2,15 @@ from typing import Dict, List, Optional, Any, Union, Callable
 import logging
 import asyncio
 from enum import Enum
-from dataclasses import dataclass, field
 
 from ..llm.persona_llm_manager import LLMProvider, LLMConfig, PersonaTraits
 from ..llm.beam_chat import BeamChat, FusionStrategy, ModelResponse, FusionResult
+from .collaboration_cache import CollaborationCache
 from ..messaging.message_broker import MessageBroker
-from ..messaging.shared_memory import SharedMemoryManager
+from ..messaging.shared_memory import SharedMemoryManager, WriteMode
 from ..personas.enhanced_ai_persona import EnhancedAIPersona
+from .task_graph import TaskGraph, TaskCycleError
+from .task_store import AgentTask, TaskStore, InMemoryTaskStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,27 +26,27 @@ class AgentRole(Enum):
     EXECUTOR = "executor"        # Implements actions
 
 
-@dataclass
-class AgentTask:
-    """Task assigned to an agent"""
-    task_id: str
-    description: str
-    assigned_to: str  # persona_id
-    status: str = "pending"  # pending, in_progress, completed, failed
-    result: Optional[Any] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    dependencies: List[str] = field(default_factory=list)  # List of task_ids this task depends on
+TERMINAL_TASK_STATUSES = ("completed", "failed")
 
 
 class HierarchicalAgentSystem:
     """Manages a hierarchical system of AI agents with different roles"""
     
-    def __init__(self, broker: MessageBroker):
+    def __init__(self, broker: MessageBroker, task_store: Optional[TaskStore] = None,
+                 collaboration_cache: Optional[CollaborationCache] = None):
         self.broker = broker
         self.memory = SharedMemoryManager(broker, "hierarchical_agents")
         self.beam_chat = BeamChat(broker)
+        self.collaboration_cache = collaboration_cache if collaboration_cache is not None else CollaborationCache()
         self.agents: Dict[str, Dict[str, Any]] = {}  # persona_id -> {persona, role, capabilities}
-        self.tasks: Dict[str, AgentTask] = {}
+        # Inverted indexes (dicts used as insertion-ordered sets) for agent lookup
+        self.agents_by_role: Dict[AgentRole, Dict[str, None]] = {}
+        self.agents_by_capability: Dict[str, Dict[str, None]] = {}
+        self.outstanding_tasks: Dict[str, int] = {}  # agent_id -> assigned tasks not yet completed or failed
+        self.tasks: TaskStore = task_store if task_store is not None else InMemoryTaskStore()
+        self.task_graph = TaskGraph()
+        self.runnable_listeners: List[Callable[[str], None]] = []  # Called with task_ids that can start
+        self._restore_tasks()
         
         # Subscribe to relevant message topics
         self.broker.subscribe_to_context("agent_task_request", self._handle_task_request)
@@ -54,11 +56,26 @@ class HierarchicalAgentSystem:
     def register_agent(self, persona: EnhancedAIPersona, role: AgentRole, 
                       capabilities: List[str] = None) -> None:
         """Register an agent with the system"""
-        self.agents[persona.persona_id] = {
+        agent_id = persona.persona_id
+        previous = self.agents.get(agent_id)
+        if previous:
+            # Re-registration may change the role or capabilities
+            self.agents_by_role[previous["role"]].pop(agent_id, None)
+            for capability in previous["capabilities"]:
+                self.agents_by_capability[capability].pop(agent_id, None)
+            # Its earlier answers may not match its new configuration
+            if self.collaboration_cache is not None:
+                self.collaboration_cache.invalidate_agent(agent_id)
+        
+        self.agents[agent_id] = {
             "persona": persona,
             "role": role,
             "capabilities": capabilities or []
         }
+        self.agents_by_role.setdefault(role, {})[agent_id] = None
+        for capability in capabilities or []:
+            self.agents_by_capability.setdefault(capability, {})[agent_id] = None
+        self.outstanding_tasks.setdefault(agent_id, 0)
         
         # Register the agent's LLM configuration with BeamChat
         llm_config = persona.get_llm_config()
@@ -69,25 +86,88 @@ class HierarchicalAgentSystem:
     
     def get_agents_by_role(self, role: AgentRole) -> List[str]:
         """Get all agent IDs with a specific role"""
-        return [agent_id for agent_id, info in self.agents.items() if info["role"] == role]
+        return list(self.agents_by_role.get(role, ()))
     
     def get_agents_by_capability(self, capability: str) -> List[str]:
         """Get all agent IDs with a specific capability"""
-        return [agent_id for agent_id, info in self.agents.items() 
-                if capability in info["capabilities"]]
+        return list(self.agents_by_capability.get(capability, ()))
+    
+    def pick_agent(self, role: Optional[AgentRole] = None,
+                   capability: Optional[str] = None) -> Optional[str]:
+        """Agent with the fewest outstanding tasks among those matching role and capability
+        
+        Ties go to the agent registered first. Returns None if nothing matches.
+        """
+        if role is not None and capability is not None:
+            by_capability = self.agents_by_capability.get(capability, {})
+            candidates = [a for a in self.agents_by_role.get(role, ()) if a in by_capability]
+        elif role is not None:
+            candidates = self.agents_by_role.get(role, ())
+        elif capability is not None:
+            candidates = self.agents_by_capability.get(capability, ())
+        else:
+            candidates = self.agents
+        return min(candidates, key=lambda agent_id: self.outstanding_tasks.get(agent_id, 0), default=None)
+    
+    def reassign_task(self, task_id: str, agent_id: str) -> bool:
+        """Move a task to another agent, keeping outstanding-task counts in step"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            logger.warning(f"Task {task_id} not found")
+            return False
+        if task.status not in TERMINAL_TASK_STATUSES:
+            self._adjust_outstanding(task.assigned_to, -1)
+            self._adjust_outstanding(agent_id, 1)
+        task.assigned_to = agent_id
+        self.tasks.save(task)
+        return True
+    
+    def _adjust_outstanding(self, agent_id: str, delta: int) -> None:
+        self.outstanding_tasks[agent_id] = self.outstanding_tasks.get(agent_id, 0) + delta
+    
+    def _restore_tasks(self) -> None:
+        """Rebuild the dependency graph and load counts from tasks already in the store"""
+        for task in self.tasks.values():
+            self.task_graph.add_task(task.task_id, task.dependencies, task.estimated_duration)
+            if task.status not in TERMINAL_TASK_STATUSES:
+                self._adjust_outstanding(task.assigned_to, 1)
+        # Every completion first, so readiness doesn't depend on the store's iteration order
+        unblocked = set()
+        for task in self.tasks.values():
+            if task.status == "completed":
+                unblocked.update(self.task_graph.mark_completed(task.task_id))
+        for task in self.tasks.values():
+            if task.status == "in_progress":
+                # Whoever was running it went away with the crash
+                task.status = "pending"
+                self.tasks.save(task)
+                if task.dependencies and self.task_graph.is_ready(task.task_id):
+                    unblocked.add(task.task_id)
+        # Includes dependents a crash caught between saving a completion and readying them
+        for task_id in unblocked:
+            self._mark_ready(task_id)
     
     def create_task(self, description: str, assigned_to: Optional[str] = None, 
-                   dependencies: List[str] = None) -> str:
-        """Create a new task and optionally assign it to an agent"""
+                   dependencies: List[str] = None, task_id: Optional[str] = None,
+                   estimated_duration: float = 1.0, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Create a new task and optionally assign it to an agent
+        
+        Dependencies may name tasks that will be created later (pass their
+        task_id explicitly). Raises TaskCycleError if the new task would make
+        the dependency graph cyclic. TaskExecutor reads "priority",
+        "agent_ids" (run as a collaboration), "fusion_strategy" and "pinned"
+        (never stolen by another agent) from metadata.
+        """
         import uuid
-        task_id = str(uuid.uuid4())
+        task_id = task_id or str(uuid.uuid4())
+        if task_id in self.tasks:
+            raise ValueError(f"Task {task_id} already exists")
+        self.task_graph.add_task(task_id, dependencies, estimated_duration)
         
-        # If no agent specified, assign to a coordinator
+        # If no agent specified, assign to the least busy coordinator
         if not assigned_to:
-            coordinators = self.get_agents_by_role(AgentRole.COORDINATOR)
-            if coordinators:
-                assigned_to = coordinators[0]
-            else:
+            assigned_to = self.pick_agent(AgentRole.COORDINATOR)
+            if not assigned_to:
                 logger.warning("No coordinator agents available for task assignment")
                 assigned_to = "unassigned"
         
@@ -95,10 +175,13 @@ class HierarchicalAgentSystem:
             task_id=task_id,
             description=description,
             assigned_to=assigned_to,
-            dependencies=dependencies or []
+            metadata=metadata,
+            dependencies=dependencies or [],
+            estimated_duration=estimated_duration
         )
         
-        self.tasks[task_id] = task
+        self.tasks.add(task)
+        self._adjust_outstanding(assigned_to, 1)
         
         # Notify the assigned agent
         if assigned_to != "unassigned":
@@ -112,6 +195,12 @@ class HierarchicalAgentSystem:
                 }
             )
         
+        # Dependencies that already completed don't need to wait for an update
+        if dependencies and self.task_graph.is_ready(task_id):
+            self._mark_ready(task_id)
+        elif not dependencies:
+            self._notify_runnable(task_id)
+        
         return task_id
     
     def update_task_status(self, task_id: str, status: str, result: Optional[Any] = None) -> bool:
@@ -120,9 +209,15 @@ class HierarchicalAgentSystem:
             logger.warning(f"Task {task_id} not found")
             return False
         
-        self.tasks[task_id].status = status
+        task = self.tasks[task_id]
+        previous_status = task.status
+        task.status = status
+        was_open = previous_status not in TERMINAL_TASK_STATUSES
+        if was_open != (status not in TERMINAL_TASK_STATUSES):
+            self._adjust_outstanding(task.assigned_to, -1 if was_open else 1)
         if result is not None:
-            self.tasks[task_id].result = result
+            task.result = result
+        self.tasks.save(task)
         
         # Broadcast task update
         self.broker.broadcast_system_message(
@@ -135,52 +230,100 @@ class HierarchicalAgentSystem:
         )
         
         # Check if any dependent tasks can now be started
-        self._check_dependent_tasks(task_id)
+        if status == "completed":
+            self._check_dependent_tasks(task_id)
+        elif previous_status == "completed":
+            self.task_graph.mark_incomplete(task_id)
         
         return True
     
     def _check_dependent_tasks(self, completed_task_id: str) -> None:
-        """Check if any tasks depending on the completed task can now be started"""
-        for task_id, task in self.tasks.items():
-            if (task.status == "pending" and 
-                completed_task_id in task.dependencies and
-                all(self.tasks[dep].status == "completed" for dep in task.dependencies)):
-                
-                # All dependencies are completed, task can be started
-                self.update_task_status(task_id, "ready")
-                
-                # Notify the assigned agent
-                self.broker.route_message(
-                    "system",
-                    "agent_task_ready",
-                    {
-                        "task_id": task_id,
-                        "description": task.description
-                    }
-                )
+        """Ready the tasks whose last outstanding dependency was the completed task"""
+        for task_id in self.task_graph.mark_completed(completed_task_id):
+            self._mark_ready(task_id)
+    
+    def _mark_ready(self, task_id: str) -> None:
+        """Move a pending task whose dependencies are all completed to ready"""
+        task = self.tasks.get(task_id)
+        if task is None or task.status != "pending":
+            return
+        
+        # All dependencies are completed, task can be started
+        task.status = "ready"
+        self.tasks.save(task)
+        self.broker.broadcast_system_message(
+            "task_status_update",
+            {
+                "task_id": task_id,
+                "status": "ready",
+                "result": None
+            }
+        )
+        
+        # Notify the assigned agent
+        self.broker.route_message(
+            "system",
+            "agent_task_ready",
+            {
+                "task_id": task_id,
+                "description": task.description
+            }
+        )
+        self._notify_runnable(task_id)
+    
+    def _notify_runnable(self, task_id: str) -> None:
+        for listener in self.runnable_listeners:
+            listener(task_id)
+    
+    def get_runnable_tasks(self) -> List[str]:
+        """Pending or ready tasks whose dependencies have all completed"""
+        return [task_id for task_id, task in self.tasks.items()
+                if task.status in ("pending", "ready") and self.task_graph.is_ready(task_id)]
+    
+    def get_critical_path(self) -> Dict[str, Any]:
+        """Longest dependency chain by estimated duration ({"tasks": [...], "length": float})"""
+        return self.task_graph.critical_path()
     
     async def collaborate_on_task(self, task_id: str, agent_ids: List[str], 
-                               fusion_strategy: FusionStrategy = FusionStrategy.ENSEMBLE) -> Optional[FusionResult]:
-        """Have multiple agents collaborate on a task using BeamChat"""
+                               fusion_strategy: FusionStrategy = FusionStrategy.ENSEMBLE,
+                               use_cache: bool = True) -> Optional[FusionResult]:
+        """Have multiple agents collaborate on a task using BeamChat
+        
+        Results are memoized in collaboration_cache by (description, agent_ids,
+        strategy); pass use_cache=False, or set metadata "memoize" to False on
+        the task, to always run the agents.
+        """
         if task_id not in self.tasks:
             logger.warning(f"Task {task_id} not found")
             return None
         
         task = self.tasks[task_id]
         
-        # Generate responses from all specified agents
-        responses = await self.beam_chat.generate_responses(
-            prompt=task.description,
-            system_message=f"Collaborate on this task: {task.description}",
-            model_ids=agent_ids
-        )
+        async def run() -> Optional[FusionResult]:
+            # Generate responses from all specified agents
+            responses = await self.beam_chat.generate_responses(
+                prompt=task.description,
+                system_message=f"Collaborate on this task: {task.description}",
+                model_ids=agent_ids
+            )
+            
+            if not responses:
+                logger.warning(f"No responses generated for task {task_id}")
+                return None
+            
+            # Fuse responses using the specified strategy
+            return await self.beam_chat.fuse_responses(responses, fusion_strategy)
         
-        if not responses:
-            logger.warning(f"No responses generated for task {task_id}")
-            return None
+        if use_cache and task.metadata.get("memoize", True) and self.collaboration_cache is not None:
+            key = self.collaboration_cache.make_key(task.description, agent_ids, fusion_strategy)
+            result, cached = await self.collaboration_cache.get_or_run(key, agent_ids, run)
+            if cached and result is not None:
+                logger.info(f"Reused memoized collaboration result for task {task_id}")
+        else:
+            result = await run()
         
-        # Fuse responses using the specified strategy
-        result = await self.beam_chat.fuse_responses(responses, fusion_strategy)
+        if result is None:
+            return None
         
         # Update task with the result
         self.update_task_status(task_id, "completed", result.content)
@@ -198,7 +341,12 @@ class HierarchicalAgentSystem:
             logger.error("Invalid task request: missing description")
             return
         
-        task_id = self.create_task(description, assigned_to, dependencies)
+        try:
+            task_id = self.create_task(description, assigned_to, dependencies,
+                                       payload.get('task_id'), payload.get('estimated_duration', 1.0))
+        except ValueError as e:
+            logger.error(f"Invalid task request: {str(e)}")
+            return
         
         # Respond with the created task ID
         self.broker.route_message(
@@ -229,6 +377,7 @@ class HierarchicalAgentSystem:
         task_id = payload.get('task_id')
         agent_ids = payload.get('agent_ids')
         strategy = payload.get('strategy', FusionStrategy.ENSEMBLE.value)
+        use_cache = payload.get('use_cache', True)
         
         if not task_id or not agent_ids:
             logger.error("Invalid collaboration request: missing task_id or agent_ids")
@@ -236,14 +385,14 @@ class HierarchicalAgentSystem:
         
         # Process collaboration request asynchronously
         asyncio.create_task(self._process_collaboration_request(
-            task_id, agent_ids, FusionStrategy(strategy)
+            task_id, agent_ids, FusionStrategy(strategy), use_cache
         ))
     
     async def _process_collaboration_request(self, task_id: str, agent_ids: List[str],
-                                          strategy: FusionStrategy) -> None:
+                                          strategy: FusionStrategy, use_cache: bool = True) -> None:
         """Process a collaboration request asynchronously"""
         try:
-            result = await self.collaborate_on_task(task_id, agent_ids, strategy)
+            result = await self.collaborate_on_task(task_id, agent_ids, strategy, use_cache)
             
             if result:
                 # Store result in memory
@@ -252,7 +401,7 @@ class HierarchicalAgentSystem:
                     "confidence": result.confidence,
                     "strategy": result.strategy.value,
                     "agents": agent_ids
-                })
+                }, mode=WriteMode.SINGLE_WRITER)
                 
                 # Broadcast result
                 self.broker.broadcast_system_message(
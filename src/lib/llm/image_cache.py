@@ -0,0 +1,181 @@
+from typing import Dict, Optional, Any, Tuple, Union
+from collections import OrderedDict
+import base64
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_MAGIC_MEDIA_TYPES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def detect_media_type(data: bytes, default: str = "image/jpeg") -> str:
+    """Guess an image media type from its leading bytes"""
+    for magic, media_type in _MAGIC_MEDIA_TYPES:
+        if data.startswith(magic):
+            return media_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return default
+
+
+@dataclass
+class EncodedImage:
+    """Base64 payload for an image, ready to embed in a provider request"""
+    content_hash: str
+    media_type: str
+    data: str           # Base64 text
+    raw_size: int       # Bytes before encoding
+    variant: str = ""   # Preprocessing applied (e.g. resolution/format), empty for the original
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.content_hash}:{self.variant}" if self.variant else self.content_hash
+
+    @property
+    def size(self) -> int:
+        """Base64 bytes counted against the cache limit"""
+        return len(self.data)
+
+    @cached_property
+    def data_url(self) -> str:
+        """Data URL, built once and shared by every model that sends this image"""
+        return f"data:{self.media_type};base64,{self.data}"
+
+
+class EncodedImageCache:
+    """Content-hash keyed LRU cache of base64-encoded images, bounded by total bytes
+
+    MultiModalBeam encodes each image once per prompt through this cache and
+    shares the payload with every model in the fan-out; identical images in
+    later requests are served without re-encoding. File paths are also
+    indexed by (path, mtime, size) so an unchanged file is not even re-read.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, EncodedImage]" = OrderedDict()
+        self.path_index: Dict[Tuple[str, int, int, str], str] = {}  # (path, mtime_ns, size, variant) -> cache key
+        self.total_bytes = 0
+        self.stats_counters: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "bytes_encoded": 0}
+        self._lock = threading.Lock()
+
+    def get_or_encode(self, source: Union[str, bytes, os.PathLike]) -> EncodedImage:
+        """Encoded payload for raw image bytes or a file path, encoding only on a miss"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return self._get_or_encode_bytes(bytes(source))
+
+        path_key = self.path_key(source)
+        cached = self.get_path(path_key)
+        if cached is not None:
+            return cached
+
+        with open(path_key[0], "rb") as f:
+            encoded = self._get_or_encode_bytes(f.read())
+        self.remember_path(path_key, encoded)
+        return encoded
+
+    @staticmethod
+    def path_key(path: Union[str, os.PathLike], variant: str = "") -> Tuple[str, int, int, str]:
+        """Identity of a file's current contents, without reading it"""
+        path = os.fspath(path)
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, variant)
+
+    def get(self, cache_key: str) -> Optional[EncodedImage]:
+        """Look up an entry by cache key (content hash, plus variant if any)"""
+        with self._lock:
+            cached = self.entries.get(cache_key)
+            if cached is not None:
+                self.entries.move_to_end(cache_key)
+                self.stats_counters["hits"] += 1
+            return cached
+
+    def get_path(self, path_key: Tuple[str, int, int, str]) -> Optional[EncodedImage]:
+        """Look up the entry last produced for an unchanged file"""
+        with self._lock:
+            cache_key = self.path_index.get(path_key)
+        return self.get(cache_key) if cache_key is not None else None
+
+    def remember_path(self, path_key: Tuple[str, int, int, str], encoded: EncodedImage) -> None:
+        with self._lock:
+            self.path_index[path_key] = encoded.cache_key
+
+    def _get_or_encode_bytes(self, data: bytes) -> EncodedImage:
+        content_hash = hashlib.sha256(data).hexdigest()
+        cached = self.get(content_hash)
+        if cached is not None:
+            return cached
+
+        encoded = EncodedImage(
+            content_hash=content_hash,
+            media_type=detect_media_type(data),
+            data=base64.b64encode(data).decode("ascii"),
+            raw_size=len(data)
+        )
+        self.put(encoded)
+        return encoded
+
+    def put(self, encoded: EncodedImage) -> None:
+        """Insert an encoded image, evicting least recently used entries over max_bytes"""
+        with self._lock:
+            self.stats_counters["misses"] += 1
+            self.stats_counters["bytes_encoded"] += encoded.raw_size
+            if encoded.size > self.max_bytes:
+                # Too large to cache; the caller still gets its payload
+                return
+            previous = self.entries.pop(encoded.cache_key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self.entries[encoded.cache_key] = encoded
+            self.total_bytes += encoded.size
+
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+                self.stats_counters["evictions"] += 1
+
+            if len(self.path_index) > 4 * max(1, len(self.entries)):
+                # Drop path entries whose content was evicted
+                self.path_index = {k: h for k, h in self.path_index.items() if h in self.entries}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.path_index.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        lookups = self.stats_counters["hits"] + self.stats_counters["misses"]
+        return {
+            **self.stats_counters,
+            "entries": len(self.entries),
+            "total_bytes": self.total_bytes,
+            "hit_rate": self.stats_counters["hits"] / lookups if lookups else 0.0
+        }
+
+
+# Process-wide cache shared by every MultiModalBeam
+_default_cache: Optional[EncodedImageCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_image_cache() -> EncodedImageCache:
+    """Get the process-wide encoded image cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EncodedImageCache()
+        return _default_cache
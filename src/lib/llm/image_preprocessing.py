@@ -0,0 +1,157 @@
+from typing import Optional, Any, Tuple, Union
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+
+from .image_cache import EncodedImage, EncodedImageCache, detect_media_type, get_default_image_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_FORMAT_MEDIA_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png", "GIF": "image/gif"}
+
+
+@dataclass(frozen=True)
+class ImageSpec:
+    """How to prepare images for one model"""
+    max_resolution: Optional[int] = None  # Longest side in pixels; None keeps the original size
+    format: Optional[str] = None          # JPEG, WEBP or PNG; None keeps the original format (lossy is opt-in)
+    quality: int = 85
+
+    @property
+    def variant(self) -> str:
+        return f"{self.max_resolution or 'orig'}:{self.format or 'orig'}:{self.quality}"
+
+    @classmethod
+    def from_model_config(cls, model_config: Any, **overrides: Any) -> 'ImageSpec':
+        """Build a spec from anything with a vision_resolution (e.g. MagmaModelConfig)"""
+        return cls(max_resolution=getattr(model_config, "vision_resolution", None), **overrides)
+
+
+def _preprocess(source: Union[str, bytes], max_resolution: Optional[int], image_format: Optional[str],
+                quality: int) -> Tuple[str, str, str, int]:
+    """Decode, downscale, recompress and base64-encode one image
+
+    Runs in a worker process. Returns (content_hash, media_type, base64 data,
+    raw size). The original bytes are passed through untouched when no resize
+    or format change is needed, so already-small images don't lose quality.
+    Without an image_format, resized images keep their source format (PNG for
+    formats vision APIs don't take), so alpha and lossless detail survive.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            data = f.read()
+    else:
+        data = source
+    content_hash = hashlib.sha256(data).hexdigest()
+    media_type = detect_media_type(data)
+
+    try:
+        from PIL import Image
+        image = Image.open(io.BytesIO(data))
+    except Exception:
+        # No Pillow, or not an image Pillow can decode: send the bytes as-is
+        image = None
+
+    if image is not None:
+        with image:
+            source_format = (image.format or "").upper()
+            target_format = (image_format or (source_format if source_format in _FORMAT_MEDIA_TYPES
+                                              else "PNG")).upper()
+            too_large = max_resolution is not None and max(image.size) > max_resolution
+            if too_large or target_format != source_format:
+                if too_large:
+                    image.thumbnail((max_resolution, max_resolution), Image.LANCZOS)
+                if target_format == "JPEG" and image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                output = io.BytesIO()
+                image.save(output, format=target_format, quality=quality, optimize=True)
+                data = output.getvalue()
+                media_type = _FORMAT_MEDIA_TYPES.get(target_format, media_type)
+
+    return content_hash, media_type, base64.b64encode(data).decode("ascii"), len(data)
+
+
+class ImagePreprocessor:
+    """Prepares images for vision models off the event loop
+
+    Decoding, downscaling to the model's resolution, optional JPEG/WebP recompression
+    and base64 encoding all run in a process pool, so large images don't stall
+    other requests. Results are stored in an EncodedImageCache under a
+    (content, spec) variant, so models sharing a spec share one payload and
+    repeated images are prepared once. Without Pillow, images are encoded
+    unchanged.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, executor: Optional[Executor] = None,
+                 image_cache: Optional[EncodedImageCache] = None):
+        self.max_workers = max_workers
+        self.executor = executor
+        self.image_cache = image_cache or get_default_image_cache()
+        self.pillow_available = importlib.util.find_spec("PIL") is not None
+        self._lock = threading.Lock()
+        if not self.pillow_available:
+            logger.warning("Pillow is not installed; images will be sent without resizing or recompression")
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self.executor
+
+    async def prepare(self, source: Union[str, bytes, os.PathLike], spec: ImageSpec) -> EncodedImage:
+        """Ready-to-send payload for a local image file or raw bytes"""
+        loop = asyncio.get_running_loop()
+        path_key = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = bytes(source)
+            # Hash off-loop too; hashlib releases the GIL for large buffers
+            content_hash = await loop.run_in_executor(None, lambda: hashlib.sha256(source).hexdigest())
+            cached = self.image_cache.get(f"{content_hash}:{spec.variant}")
+            if cached is not None:
+                return cached
+        else:
+            path_key = await loop.run_in_executor(None, self.image_cache.path_key, source, spec.variant)
+            cached = self.image_cache.get_path(path_key)
+            if cached is not None:
+                return cached
+            source = path_key[0]
+
+        content_hash, media_type, data, raw_size = await loop.run_in_executor(
+            self._get_executor(), _preprocess, source, spec.max_resolution, spec.format, spec.quality
+        )
+        encoded = EncodedImage(content_hash=content_hash, media_type=media_type, data=data,
+                               raw_size=raw_size, variant=spec.variant)
+        self.image_cache.put(encoded)
+        if path_key is not None:
+            self.image_cache.remember_path(path_key, encoded)
+        return encoded
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Process-wide preprocessor shared by every MultiModalBeam
+_default_preprocessor: Optional[ImagePreprocessor] = None
+_default_preprocessor_lock = threading.Lock()
+
+
+def get_default_image_preprocessor() -> ImagePreprocessor:
+    """Get the process-wide image preprocessor"""
+    global _default_preprocessor
+    with _default_preprocessor_lock:
+        if _default_preprocessor is None:
+            _default_preprocessor = ImagePreprocessor()
+        return _default_preprocessor
@@ -0,0 +1,66 @@
+from typing import Dict, List, Optional
+from collections import deque
+import logging
+import math
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling per-model latency percentiles fed from ModelResponse.latency"""
+
+    def __init__(self, window_size: int = 200, min_samples: int = 5):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.samples: Dict[str, deque] = {}
+
+    def record(self, model_id: str, latency: float) -> None:
+        """Record a latency observation (in seconds) for a model"""
+        if model_id not in self.samples:
+            self.samples[model_id] = deque(maxlen=self.window_size)
+        self.samples[model_id].append(latency)
+
+    def percentile(self, model_id: str, percentile: float) -> Optional[float]:
+        """Get a latency percentile (0-100) for a model, or None if there is not enough data"""
+        window = self.samples.get(model_id)
+        if not window or len(window) < self.min_samples:
+            return None
+
+        ordered = sorted(window)
+        # Nearest-rank percentile over the rolling window
+        rank = max(0, min(len(ordered) - 1, math.ceil(percentile / 100.0 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def p50(self, model_id: str) -> Optional[float]:
+        """Median latency for a model"""
+        return self.percentile(model_id, 50)
+
+    def p95(self, model_id: str) -> Optional[float]:
+        """95th percentile latency for a model"""
+        return self.percentile(model_id, 95)
+
+    def p99(self, model_id: str) -> Optional[float]:
+        """99th percentile latency for a model"""
+        return self.percentile(model_id, 99)
+
+    def snapshot(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Get p50/p95/p99 for every tracked model"""
+        return {
+            model_id: {
+                "samples": len(window),
+                "p50": self.p50(model_id),
+                "p95": self.p95(model_id),
+                "p99": self.p99(model_id)
+            }
+            for model_id, window in self.samples.items()
+        }
+
+    def reset(self, model_ids: Optional[List[str]] = None) -> None:
+        """Forget samples for the given models (or all models)"""
+        if model_ids is None:
+            self.samples.clear()
+            return
+        for model_id in model_ids:
+            self.samples.pop(model_id, None)
@@ -0,0 +1,201 @@
+from typing import Dict, List, Optional, Any, Iterator, AsyncIterator, Union
+import base64
+import hashlib
+import json
+import logging
+import mimetypes
+import mmap
+import os
+import uuid
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Multiple of 3 so base64 chunks concatenate without padding in the middle
+DEFAULT_CHUNK_SIZE = 3 * 256 * 1024
+
+
+class MediaSource:
+    """Zero-copy handle on large media (audio, video, images) for multimodal prompts
+
+    File-backed sources are memory-mapped, so their bytes live in the page
+    cache rather than on the Python heap; buffer-backed sources wrap a
+    memoryview of the caller's bytes without copying. Content is read through
+    chunk views and base64-encoded chunk by chunk, so sending a 200 MB clip
+    never needs the raw bytes, a full base64 copy and a JSON copy at once.
+    """
+
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview, mmap.mmap],
+                 media_type: str = "application/octet-stream", path: Optional[str] = None):
+        self._mmap = buffer if isinstance(buffer, mmap.mmap) else None
+        self._file = None
+        self.view = memoryview(buffer)
+        self._size = self.view.nbytes
+        self.media_type = media_type
+        self.path = path
+        self._sha256: Optional[str] = None
+
+    @classmethod
+    def from_path(cls, path: Union[str, os.PathLike], media_type: Optional[str] = None) -> 'MediaSource':
+        """Memory-map a file read-only"""
+        path = os.fspath(path)
+        media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        f = open(path, "rb")
+        try:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files can't be mapped
+                source = cls(b"", media_type, path)
+                f.close()
+                return source
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            raise
+        source = cls(mapped, media_type, path)
+        source._file = f
+        return source
+
+    @classmethod
+    def from_buffer(cls, buffer: Union[bytes, bytearray, memoryview],
+                    media_type: str = "application/octet-stream") -> 'MediaSource':
+        """Wrap an in-memory buffer without copying it"""
+        return cls(buffer, media_type)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def base64_size(self) -> int:
+        """Length of the base64 encoding, without producing it"""
+        return 4 * ((self.size + 2) // 3)
+
+    @property
+    def format(self) -> str:
+        """Short format name (e.g. "wav", "mp3", "mp4") from the media type"""
+        subtype = self.media_type.split("/")[-1]
+        return {"mpeg": "mp3", "x-wav": "wav", "wave": "wav"}.get(subtype, subtype)
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[memoryview]:
+        """Successive views over the content; no bytes are copied"""
+        for start in range(0, self.size, chunk_size):
+            yield self.view[start:start + chunk_size]
+
+    def iter_base64(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Base64 encoding of the content, one chunk at a time"""
+        if chunk_size % 3:
+            raise ValueError("chunk_size must be a multiple of 3")
+        for chunk in self.iter_chunks(chunk_size):
+            yield base64.b64encode(chunk)
+
+    def sha256(self) -> str:
+        """Content hash, computed once by streaming over the views"""
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            for chunk in self.iter_chunks():
+                digest.update(chunk)
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+    def close(self) -> None:
+        """Release the mapping (and file); views handed out earlier become invalid"""
+        self.view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> 'MediaSource':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class Base64Field:
+    """Placeholder for a base64 string value in a StreamingJSONBody"""
+
+    def __init__(self, source: MediaSource, prefix: str = ""):
+        self.source = source
+        self.prefix = prefix  # e.g. "data:audio/wav;base64," for data URLs
+
+
+class StreamingJSONBody:
+    """JSON request body whose large base64 values are streamed from MediaSources
+
+    The payload is serialized with each Base64Field replaced by a unique
+    token; at send time the tokens are swapped for base64 chunks read straight
+    from the sources. Content-Length is known up front, so the HTTP client
+    does not need chunked transfer encoding.
+    """
+
+    def __init__(self, payload: Any, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.fields: Dict[str, Base64Field] = {}
+        template = json.dumps(self._substitute(payload), separators=(",", ":"))
+
+        # Split the serialized template into literal JSON and field tokens
+        self.parts: List[Union[bytes, Base64Field]] = []
+        remaining = template
+        while self.fields:
+            positions = [(remaining.find(token), token) for token in self.fields if token in remaining]
+            if not positions:
+                break
+            index, token = min(positions)
+            self.parts.append(remaining[:index].encode("utf-8"))
+            self.parts.append(self.fields[token])
+            remaining = remaining[index + len(token):]
+        self.parts.append(remaining.encode("utf-8"))
+
+    def _substitute(self, value: Any) -> Any:
+        if isinstance(value, Base64Field):
+            token = f"@@media-{uuid.uuid4().hex}@@"
+            self.fields[token] = value
+            return token
+        if isinstance(value, dict):
+            return {k: self._substitute(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._substitute(v) for v in value]
+        return value
+
+    @property
+    def content_length(self) -> int:
+        total = 0
+        for part in self.parts:
+            if isinstance(part, Base64Field):
+                total += len(part.prefix.encode("utf-8")) + part.source.base64_size
+            else:
+                total += len(part)
+        return total
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self.parts:
+            if isinstance(part, Base64Field):
+                if part.prefix:
+                    yield part.prefix.encode("utf-8")
+                yield from part.source.iter_base64(self.chunk_size)
+            elif part:
+                yield part
+
+    def aiter(self) -> 'AsyncStreamingBody':
+        """Async-only view of the body for async HTTP clients
+
+        httpx picks sync or async streaming from which iterator protocols the
+        content has, so an AsyncClient needs an object without __iter__.
+        """
+        return AsyncStreamingBody(self)
+
+    def headers(self) -> Dict[str, str]:
+        return {"Content-Type": "application/json", "Content-Length": str(self.content_length)}
+
+
+class AsyncStreamingBody:
+    """Async iterable over a StreamingJSONBody's chunks"""
+
+    def __init__(self, body: StreamingJSONBody):
+        self.body = body
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self.body:
+            yield chunk
@@ -0,0 +1,224 @@
+from typing import Dict, List, Optional, Any, AsyncIterator
+from types import SimpleNamespace
+import logging
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass
+
+from .persona_llm_manager import LLMConfig
+from .provider_pool import ProviderClientPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_FILLER_WORDS = (
+    "the", "model", "suggests", "a", "plan", "with", "clear", "steps", "for", "risk",
+    "cost", "and", "delivery", "across", "teams", "using", "data", "to", "guide", "decisions",
+)
+
+
+class MockProviderError(RuntimeError):
+    """Simulated provider failure raised according to MockModelSpec.error_rate"""
+
+
+@dataclass
+class MockModelSpec:
+    """Latency, error and streaming behaviour of one mock model"""
+    latency_distribution: str = "lognormal"  # constant, uniform, normal or lognormal
+    latency_mean: float = 0.2                # Seconds
+    latency_stddev: float = 0.05             # Seconds (half-width for uniform)
+    error_rate: float = 0.0
+    output_tokens: int = 100
+    chunk_tokens: int = 5                    # Tokens per streamed chunk
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MockModelSpec':
+        """Create from dictionary"""
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Draw one total response latency in seconds"""
+        if self.latency_distribution == "constant":
+            latency = self.latency_mean
+        elif self.latency_distribution == "uniform":
+            latency = rng.uniform(self.latency_mean - self.latency_stddev,
+                                  self.latency_mean + self.latency_stddev)
+        elif self.latency_distribution == "normal":
+            latency = rng.gauss(self.latency_mean, self.latency_stddev)
+        elif self.latency_distribution == "lognormal":
+            # Parameterised so the distribution has the requested mean and stddev
+            variance = self.latency_stddev ** 2
+            sigma2 = math.log(1 + variance / self.latency_mean ** 2) if self.latency_mean > 0 else 0.0
+            mu = math.log(self.latency_mean) - sigma2 / 2 if self.latency_mean > 0 else 0.0
+            latency = rng.lognormvariate(mu, math.sqrt(sigma2))
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+        return max(0.0, latency)
+
+
+class _MockCall:
+    """One simulated completion: its latency, outcome and output tokens"""
+
+    def __init__(self, spec: MockModelSpec, rng: random.Random, model: str, prompt: str):
+        self.spec = spec
+        self.latency = spec.sample_latency(rng)
+        self.failed = rng.random() < spec.error_rate
+        # Echo some prompt words so fusion scoring sees realistic overlap between models
+        vocabulary = [w for w in prompt.lower().split() if w.isalpha()][:50] or list(_FILLER_WORDS)
+        vocabulary = vocabulary + list(_FILLER_WORDS)
+        self.tokens = [rng.choice(vocabulary) for _ in range(spec.output_tokens)]
+        self.model = model
+
+    def chunks(self) -> List[str]:
+        size = max(1, self.spec.chunk_tokens)
+        return [" ".join(self.tokens[i:i + size]) + " " for i in range(0, len(self.tokens), size)]
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+    def usage(self, prompt: str) -> SimpleNamespace:
+        return SimpleNamespace(prompt_tokens=max(1, len(prompt) // 4),
+                               completion_tokens=len(self.tokens))
+
+
+class MockProviderClient:
+    """Stand-in for the OpenAI and Anthropic SDK clients
+
+    Exposes chat.completions.create (OpenAI shape) and messages.create
+    (Anthropic shape), both awaitable, with stream=True returning an async
+    iterator of chunks paced over the sampled latency. Each call draws from
+    its own RNG seeded by (seed, model, call number), so a run is reproducible
+    regardless of how concurrent calls interleave.
+    """
+
+    def __init__(self, specs: Dict[str, MockModelSpec], default_spec: MockModelSpec, seed: int = 0,
+                 blocking: bool = False):
+        self.specs = specs
+        self.default_spec = default_spec
+        self.seed = seed
+        self.blocking = blocking
+        self.call_counts: Dict[str, int] = {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._openai_create))
+        self.messages = SimpleNamespace(create=self._anthropic_create)
+
+    def _new_call(self, model: str, prompt: str) -> _MockCall:
+        count = self.call_counts.get(model, 0)
+        self.call_counts[model] = count + 1
+        rng = random.Random(f"{self.seed}:{model}:{count}")
+        return _MockCall(self.specs.get(model, self.default_spec), rng, model, prompt)
+
+    @staticmethod
+    def _prompt_text(messages: List[Dict[str, Any]], system: Optional[str] = None) -> str:
+        parts = [system] if system else []
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, str):
+                parts.append(content)
+            elif isinstance(content, list):
+                parts.extend(c.get("text", "") for c in content if isinstance(c, dict))
+        return "\n".join(parts)
+
+    async def _finish(self, call: _MockCall) -> None:
+        await asyncio.sleep(call.latency)
+        if call.failed:
+            raise MockProviderError(f"Simulated failure from mock model {call.model}")
+
+    async def _stream(self, call: _MockCall, make_chunk) -> AsyncIterator[Any]:
+        chunks = call.chunks()
+        delay = call.latency / max(1, len(chunks))
+        for i, text in enumerate(chunks):
+            await asyncio.sleep(delay)
+            # Fail partway through, like a dropped connection
+            if call.failed and i >= len(chunks) // 2:
+                raise MockProviderError(f"Simulated stream failure from mock model {call.model}")
+            yield make_chunk(text)
+
+    def _finish_blocking(self, call: _MockCall) -> None:
+        time.sleep(call.latency)
+        if call.failed:
+            raise MockProviderError(f"Simulated failure from mock model {call.model}")
+
+    def _openai_create(self, model: str, messages: List[Dict[str, Any]], stream: bool = False, **_: Any) -> Any:
+        prompt = self._prompt_text(messages)
+        call = self._new_call(model, prompt)
+
+        def completion() -> Any:
+            return SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=call.text),
+                                         finish_reason="stop")],
+                usage=call.usage(prompt)
+            )
+
+        if self.blocking:
+            self._finish_blocking(call)
+            return completion()
+
+        async def create() -> Any:
+            if stream:
+                return self._stream(call, lambda text: SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=text))]
+                ))
+            await self._finish(call)
+            return completion()
+
+        return create()
+
+    def _anthropic_create(self, model: str, messages: List[Dict[str, Any]], system: Optional[str] = None,
+                          stream: bool = False, **_: Any) -> Any:
+        prompt = self._prompt_text(messages, system)
+        call = self._new_call(model, prompt)
+
+        def message() -> Any:
+            return SimpleNamespace(
+                model=model,
+                content=[SimpleNamespace(type="text", text=call.text)],
+                stop_reason="end_turn",
+                usage=SimpleNamespace(input_tokens=call.usage(prompt).prompt_tokens,
+                                      output_tokens=len(call.tokens))
+            )
+
+        if self.blocking:
+            self._finish_blocking(call)
+            return message()
+
+        async def create() -> Any:
+            if stream:
+                return self._stream(call, lambda text: SimpleNamespace(
+                    type="content_block_delta", delta=SimpleNamespace(type="text_delta", text=text)
+                ))
+            await self._finish(call)
+            return message()
+
+        return create()
+
+    def close(self) -> Any:
+        """Nothing to release; awaitable for async clients, like the SDK close()"""
+        return None if self.blocking else asyncio.sleep(0)
+
+
+class MockProviderClientPool(ProviderClientPool):
+    """ProviderClientPool that hands out MockProviderClients instead of real SDK clients
+
+    Pass it as client_pool to BeamChat (or assign it to beam_chat.client_pool)
+    to exercise the whole orchestration path without network calls. Specs are
+    keyed by config.model_name; unknown models use default_spec.
+    """
+
+    def __init__(self, specs: Optional[Dict[str, MockModelSpec]] = None,
+                 default_spec: Optional[MockModelSpec] = None, seed: int = 0,
+                 max_concurrency_per_key: int = 16):
+        super().__init__(max_concurrency_per_key=max_concurrency_per_key)
+        self.specs = dict(specs or {})
+        self.default_spec = default_spec or MockModelSpec()
+        self.seed = seed
+
+    def _create_async_client(self, config: LLMConfig) -> Any:
+        return MockProviderClient(self.specs, self.default_spec, self.seed)
+
+    def _create_sync_client(self, config: LLMConfig) -> Any:
+        return MockProviderClient(self.specs, self.default_spec, self.seed, blocking=True)
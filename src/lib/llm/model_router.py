@@ -0,0 +1,194 @@
+from typing import Dict, List, Optional, Any
+import logging
+from dataclasses import dataclass
+
+from .persona_llm_manager import LLMConfig
+from .latency_tracker import LatencyTracker
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Approximate list prices in dollars per 1K tokens (input, output); override with set_profile
+DEFAULT_PRICING: Dict[str, tuple] = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "claude-3-opus": (0.015, 0.075),
+    "claude-3-sonnet": (0.003, 0.015),
+    "claude-3-haiku": (0.00025, 0.00125),
+}
+
+
+@dataclass
+class ModelProfile:
+    """Cost, latency and quality profile for a registered model"""
+    model_id: str
+    cost_per_1k_input: float = 0.0
+    cost_per_1k_output: float = 0.0
+    quality: float = 0.5           # Running estimate of how often fusion prefers this model
+    default_output_tokens: int = 500
+    selections: int = 0
+    wins: float = 0.0
+
+    def expected_cost(self, prompt_tokens: int, output_tokens: Optional[int] = None) -> float:
+        """Expected dollar cost of one call"""
+        output_tokens = output_tokens if output_tokens is not None else self.default_output_tokens
+        return (prompt_tokens * self.cost_per_1k_input + output_tokens * self.cost_per_1k_output) / 1000.0
+
+
+@dataclass
+class RoutingBudget:
+    """Per-request limits for model selection"""
+    max_cost: Optional[float] = None        # Dollars for the whole fan-out
+    max_latency_ms: Optional[float] = None  # Expected (p50) latency per model
+    max_models: Optional[int] = None
+    min_models: int = 1
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RoutingBudget':
+        """Create from dictionary"""
+        return cls(
+            max_cost=data.get("max_cost"),
+            max_latency_ms=data.get("max_latency_ms"),
+            max_models=data.get("max_models"),
+            min_models=data.get("min_models", 1)
+        )
+
+
+class ModelRouter:
+    """Picks the subset of BeamChat models to fan out to for each request
+
+    Models are ranked by quality per dollar, where quality is learned online
+    from fusion outcomes and latency comes from the shared LatencyTracker.
+    Models are added greedily until the request's cost, latency or model-count
+    budget is used up. If no model meets the latency budget, the fastest
+    models that fit the cost budget are used instead.
+    """
+
+    def __init__(self, latency_tracker: Optional[LatencyTracker] = None,
+                 default_budget: Optional[RoutingBudget] = None, learning_rate: float = 0.1):
+        self.latency_tracker = latency_tracker or LatencyTracker()
+        self.default_budget = default_budget or RoutingBudget()
+        self.learning_rate = learning_rate
+        self.profiles: Dict[str, ModelProfile] = {}
+
+    def register_model(self, model_id: str, config: LLMConfig) -> ModelProfile:
+        """Create a profile for a model, seeding prices from DEFAULT_PRICING when known"""
+        if model_id in self.profiles:
+            return self.profiles[model_id]
+
+        input_price, output_price = 0.0, 0.0
+        # Longest prefix match so "gpt-4o-mini-2024-07-18" doesn't price as "gpt-4"
+        for name in sorted(DEFAULT_PRICING, key=len, reverse=True):
+            if config.model_name.startswith(name):
+                input_price, output_price = DEFAULT_PRICING[name]
+                break
+
+        profile = ModelProfile(
+            model_id=model_id,
+            cost_per_1k_input=input_price,
+            cost_per_1k_output=output_price,
+            default_output_tokens=config.parameters.get("max_tokens", 500)
+        )
+        self.profiles[model_id] = profile
+        return profile
+
+    def set_profile(self, model_id: str, **fields: Any) -> None:
+        """Override profile fields (prices, quality prior, output tokens)"""
+        profile = self.profiles.setdefault(model_id, ModelProfile(model_id=model_id))
+        for name, value in fields.items():
+            setattr(profile, name, value)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (~4 characters per token)"""
+        return max(1, len(text) // 4)
+
+    def _score(self, profile: ModelProfile, prompt_tokens: int) -> float:
+        cost = profile.expected_cost(prompt_tokens)
+        # Quality per cent, so free/local models don't divide by zero
+        return profile.quality / (1.0 + cost * 100.0)
+
+    def select(self, model_ids: List[str], prompt: str,
+               budget: Optional[RoutingBudget] = None) -> List[str]:
+        """Choose the models to call for a prompt within the budget"""
+        budget = budget or self.default_budget
+        prompt_tokens = self.estimate_tokens(prompt)
+
+        candidates = []
+        for model_id in model_ids:
+            profile = self.profiles.setdefault(model_id, ModelProfile(model_id=model_id))
+            if budget.max_latency_ms is not None:
+                expected_latency = self.latency_tracker.p50(model_id)
+                # Models without latency data stay eligible so they can be learned
+                if expected_latency is not None and expected_latency * 1000.0 > budget.max_latency_ms:
+                    continue
+            candidates.append(profile)
+
+        if not candidates:
+            candidates = self._fastest_within_cost(model_ids, prompt_tokens, budget)
+
+        candidates.sort(key=lambda p: self._score(p, prompt_tokens), reverse=True)
+
+        selected: List[str] = []
+        spent = 0.0
+        for profile in candidates:
+            if budget.max_models is not None and len(selected) >= budget.max_models:
+                break
+            cost = profile.expected_cost(prompt_tokens)
+            if budget.max_cost is not None and spent + cost > budget.max_cost and len(selected) >= budget.min_models:
+                continue
+            selected.append(profile.model_id)
+            spent += cost
+
+        for model_id in selected:
+            self.profiles[model_id].selections += 1
+
+        logger.debug(f"Routed prompt to {selected} (expected cost ${spent:.4f})")
+        return selected
+
+    def _fastest_within_cost(self, model_ids: List[str], prompt_tokens: int,
+                             budget: RoutingBudget) -> List[ModelProfile]:
+        """Fallback when no model meets the latency budget: the fastest models that still fit max_cost"""
+        by_latency = sorted(
+            (self.profiles[m] for m in model_ids),
+            key=lambda p: self.latency_tracker.p50(p.model_id) or 0.0
+        )
+        chosen: List[ModelProfile] = []
+        spent = 0.0
+        for profile in by_latency:
+            if len(chosen) >= max(1, budget.min_models):
+                break
+            cost = profile.expected_cost(prompt_tokens)
+            if budget.max_cost is not None and spent + cost > budget.max_cost:
+                continue
+            chosen.append(profile)
+            spent += cost
+        if not chosen and by_latency:
+            # Nothing is affordable either; send the cheapest model rather than none
+            chosen = [min(by_latency, key=lambda p: p.expected_cost(prompt_tokens))]
+        return chosen
+
+    def record_outcome(self, credits: Dict[str, float]) -> None:
+        """Update quality estimates from a fusion outcome (model_id -> credit in [0, 1])"""
+        for model_id, credit in credits.items():
+            profile = self.profiles.setdefault(model_id, ModelProfile(model_id=model_id))
+            profile.wins += credit
+            profile.quality += self.learning_rate * (credit - profile.quality)
+
+    def get_profiles(self) -> Dict[str, Dict[str, Any]]:
+        """Export profiles as metrics"""
+        return {
+            model_id: {
+                "cost_per_1k_input": p.cost_per_1k_input,
+                "cost_per_1k_output": p.cost_per_1k_output,
+                "quality": p.quality,
+                "selections": p.selections,
+                "wins": p.wins,
+                "p50_latency": self.latency_tracker.p50(model_id)
+            }
+            for model_id, p in self.profiles.items()
+        }
@@ -1,20 +1,29 @@
-from typing import Dict, List, Optional, Any, Union, Callable
+from typing import Dict, List, Optional, Any, Union, Callable, Set
 import logging
 import asyncio
 from enum import Enum
 from dataclasses import dataclass, field
-import base64
 from pathlib import Path
 
 from ..llm.persona_llm_manager import LLMProvider, LLMConfig, PersonaTraits
 from ..llm.beam_chat import BeamChat, FusionStrategy, ModelResponse, FusionResult
 from ..messaging.message_broker import MessageBroker
-from ..messaging.shared_memory import SharedMemoryManager
+from ..messaging.shared_memory import SharedMemoryManager, WriteMode
+from .provider_pool import ProviderClientPool
+from .image_cache import EncodedImage, EncodedImageCache
+from .image_preprocessing import ImagePreprocessor, ImageSpec, get_default_image_preprocessor
+from .media_source import MediaSource, Base64Field, StreamingJSONBody
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Longest side each provider actually uses; larger images only cost upload time and tokens
+DEFAULT_IMAGE_SPECS: Dict[LLMProvider, ImageSpec] = {
+    LLMProvider.OPENAI: ImageSpec(max_resolution=2048),
+    LLMProvider.ANTHROPIC: ImageSpec(max_resolution=1568),
+}
+
 
 class ModalityType(Enum):
     """Types of modalities supported by the multimodal system"""
@@ -28,8 +37,14 @@ class ModalityType(Enum):
 class MultiModalContent:
     """Content with multiple modalities"""
     modality_type: ModalityType
-    content: Any  # Text string, image bytes, etc.
+    content: Any  # Text string, image bytes, file path, MediaSource, etc.
     metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @classmethod
+    def from_file(cls, modality_type: ModalityType, path: str,
+                  media_type: Optional[str] = None) -> 'MultiModalContent':
+        """Memory-mapped content for large audio/video/image files (close content when done)"""
+        return cls(modality_type=modality_type, content=MediaSource.from_path(path, media_type))
 
 
 @dataclass
@@ -43,17 +58,32 @@ class MultiModalPrompt:
 class MultiModalBeam(BeamChat):
     """Extension of BeamChat with multi-modal capabilities"""
     
-    def __init__(self, broker: MessageBroker):
-        super().__init__(broker)
+    def __init__(self, broker: MessageBroker, client_pool: Optional[ProviderClientPool] = None,
+                 image_cache: Optional[EncodedImageCache] = None,
+                 image_preprocessor: Optional[ImagePreprocessor] = None):
+        super().__init__(broker, client_pool)
         self.memory = SharedMemoryManager(broker, "multimodal_beam")
+        if image_preprocessor is None:
+            image_preprocessor = (ImagePreprocessor(image_cache=image_cache) if image_cache
+                                  else get_default_image_preprocessor())
+        self.image_preprocessor = image_preprocessor
+        self.image_cache = image_preprocessor.image_cache
         self.vision_models: Dict[str, LLMConfig] = {}
+        self.image_specs: Dict[str, ImageSpec] = {}
         
         # Subscribe to relevant message topics
         self.broker.subscribe_to_context("multimodal_request", self._handle_multimodal_request)
     
-    def register_vision_model(self, model_id: str, config: LLMConfig) -> None:
-        """Register a vision-capable model"""
+    def register_vision_model(self, model_id: str, config: LLMConfig,
+                              image_spec: Optional[ImageSpec] = None) -> None:
+        """Register a vision-capable model
+        
+        image_spec sets the resolution and format images are prepared at for this
+        model (see ImageSpec.from_model_config for MagmaModelConfig); by default
+        images are downscaled to the provider's maximum in their original format.
+        """
         self.vision_models[model_id] = config
+        self.image_specs[model_id] = image_spec or DEFAULT_IMAGE_SPECS.get(config.provider, ImageSpec())
         # Also register with the base BeamChat for text capabilities
         self.register_model(model_id, config)
         logger.info(f"Registered vision model {model_id}")
@@ -72,23 +102,64 @@ class MultiModalBeam(BeamChat):
             logger.warning("No vision-capable models available for multimodal processing")
             return []
         
+        # Prepare every image once per spec, off the event loop, before the fan-out
+        images = await self._prepare_images(prompt, {self.image_specs[m] for m in model_ids})
+        
         tasks = []
         for model_id in model_ids:
-            tasks.append(self._process_with_model(model_id, prompt))
+            tasks.append(self._process_with_model(model_id, prompt, images[self.image_specs[model_id]]))
         
         responses = await asyncio.gather(*tasks)
         return [r for r in responses if r is not None]
     
-    async def _process_with_model(self, model_id: str, prompt: MultiModalPrompt) -> Optional[ModelResponse]:
+    async def _prepare_images(self, prompt: MultiModalPrompt,
+                              specs: Set[ImageSpec]) -> Dict[ImageSpec, Dict[int, EncodedImage]]:
+        """Ready-to-send payloads for local image elements, per spec and element index
+        
+        URLs are passed through to providers as-is, and missing files are skipped.
+        """
+        sources: Dict[int, Union[str, bytes, memoryview]] = {}
+        for index, element in enumerate(prompt.elements):
+            if element.modality_type != ModalityType.IMAGE:
+                continue
+            content = element.content
+            if isinstance(content, MediaSource):
+                content = content.path or content.view
+            if isinstance(content, str):
+                if content.startswith(('http://', 'https://')) or not Path(content).exists():
+                    continue
+            elif not isinstance(content, (bytes, memoryview)):
+                continue
+            sources[index] = content
+        
+        jobs = [(spec, index) for spec in specs for index in sources]
+        prepared = await asyncio.gather(*(
+            self.image_preprocessor.prepare(sources[index], spec) for spec, index in jobs
+        ))
+        images: Dict[ImageSpec, Dict[int, EncodedImage]] = {spec: {} for spec in specs}
+        for (spec, index), encoded in zip(jobs, prepared):
+            images[spec][index] = encoded
+        return images
+    
+    async def _images_for_model(self, model_id: str, prompt: MultiModalPrompt) -> Dict[int, EncodedImage]:
+        spec = self.image_specs.get(model_id, ImageSpec())
+        return (await self._prepare_images(prompt, {spec}))[spec]
+    
+    async def _process_with_model(self, model_id: str, prompt: MultiModalPrompt,
+                                  images: Optional[Dict[int, EncodedImage]] = None) -> Optional[ModelResponse]:
         """Process a multimodal prompt with a specific model"""
         try:
             config = self.vision_models[model_id]
+            if images is None:
+                images = await self._images_for_model(model_id, prompt)
             
             # Implementation depends on the provider
-            if config.provider == LLMProvider.OPENAI:
-                return await self._process_openai_multimodal(model_id, config, prompt)
+            if config.provider == LLMProvider.OPENAI and self._has_streamed_media(prompt):
+                return await self._process_openai_media(model_id, config, prompt, images)
+            elif config.provider == LLMProvider.OPENAI:
+                return await self._process_openai_multimodal(model_id, config, prompt, images)
             elif config.provider == LLMProvider.ANTHROPIC:
-                return await self._process_anthropic_multimodal(model_id, config, prompt)
+                return await self._process_anthropic_multimodal(model_id, config, prompt, images)
             else:
                 logger.warning(f"Unsupported provider {config.provider} for multimodal processing")
                 return None
@@ -96,18 +167,93 @@ class MultiModalBeam(BeamChat):
             logger.error(f"Error processing multimodal prompt with model {model_id}: {str(e)}")
             return None
     
+    @staticmethod
+    def _has_streamed_media(prompt: MultiModalPrompt) -> bool:
+        return any(e.modality_type in (ModalityType.AUDIO, ModalityType.VIDEO) for e in prompt.elements)
+    
+    async def _process_openai_media(self, model_id: str, config: LLMConfig,
+                                    prompt: MultiModalPrompt,
+                                    images: Dict[int, EncodedImage]) -> ModelResponse:
+        """Process a prompt with audio/video using a streamed request body
+        
+        The SDK would build the whole JSON body (and a full base64 copy of the
+        media) in memory, so this posts through the pooled HTTP client instead,
+        base64-encoding MediaSource content chunk by chunk into the upload.
+        """
+        import time
+        
+        messages = []
+        if prompt.system_message:
+            messages.append({"role": "system", "content": prompt.system_message})
+        
+        user_message_content = []
+        opened: List[MediaSource] = []
+        try:
+            for index, element in enumerate(prompt.elements):
+                if element.modality_type == ModalityType.TEXT:
+                    user_message_content.append({"type": "text", "text": element.content})
+                elif element.modality_type == ModalityType.IMAGE:
+                    if index in images:
+                        user_message_content.append({
+                            "type": "image_url",
+                            "image_url": {"url": images[index].data_url}
+                        })
+                    elif isinstance(element.content, str) and element.content.startswith(('http://', 'https://')):
+                        user_message_content.append({
+                            "type": "image_url",
+                            "image_url": {"url": element.content}
+                        })
+                elif element.modality_type == ModalityType.AUDIO:
+                    source = element.content
+                    if not isinstance(source, MediaSource):
+                        # Paths are memory-mapped; bytes are wrapped without copying
+                        source = (MediaSource.from_path(source, element.metadata.get("media_type"))
+                                  if isinstance(source, str)
+                                  else MediaSource.from_buffer(source, element.metadata.get("media_type", "audio/wav")))
+                        opened.append(source)
+                    user_message_content.append({
+                        "type": "input_audio",
+                        "input_audio": {"data": Base64Field(source),
+                                        "format": element.metadata.get("format", source.format)}
+                    })
+                elif element.modality_type == ModalityType.VIDEO:
+                    logger.warning(f"Model {model_id} cannot take inline video; skipping video element")
+            
+            messages.append({"role": "user", "content": user_message_content})
+            body = StreamingJSONBody({"model": config.model_name, "messages": messages, **config.parameters})
+            base_url = (config.endpoint or "https://api.openai.com/v1").rstrip("/")
+            
+            start_time = time.time()
+            async with self.client_pool.acquire_http(config) as http:
+                response = await http.post(
+                    f"{base_url}/chat/completions",
+                    content=body.aiter(),
+                    headers={**body.headers(), "Authorization": f"Bearer {config.api_key}"}
+                )
+                response.raise_for_status()
+                data = response.json()
+            end_time = time.time()
+        finally:
+            for source in opened:
+                source.close()
+        
+        return ModelResponse(
+            model_id=model_id,
+            provider=config.provider,
+            content=data["choices"][0]["message"]["content"],
+            metadata={"response": data},
+            confidence=1.0,  # OpenAI doesn't provide confidence scores
+            latency=end_time - start_time
+        )
+    
     async def _process_openai_multimodal(self, model_id: str, config: LLMConfig, 
-                                       prompt: MultiModalPrompt) -> ModelResponse:
+                                       prompt: MultiModalPrompt,
+                                       images: Optional[Dict[int, EncodedImage]] = None) -> ModelResponse:
         """Process multimodal prompt using OpenAI's vision capabilities"""
-        import openai
         import time
         
-        # Set API key
-        openai.api_key = config.api_key
-        
-        # Set custom endpoint if provided
-        if config.endpoint:
-            openai.api_base = config.endpoint
+        if images is None:
+            images = await self._images_for_model(model_id, prompt)
         
         # Prepare messages
         messages = []
@@ -117,46 +263,32 @@ class MultiModalBeam(BeamChat):
         # Construct the user message with multiple modalities
         user_message_content = []
         
-        for element in prompt.elements:
+        for index, element in enumerate(prompt.elements):
             if element.modality_type == ModalityType.TEXT:
                 user_message_content.append({"type": "text", "text": element.content})
             elif element.modality_type == ModalityType.IMAGE:
-                # Handle different image input formats
-                if isinstance(element.content, str):
-                    # Assume it's a file path or URL
-                    if element.content.startswith(('http://', 'https://')):
-                        # It's a URL
-                        user_message_content.append({
-                            "type": "image_url",
-                            "image_url": {"url": element.content}
-                        })
-                    else:
-                        # It's a file path, read and encode
-                        image_path = Path(element.content)
-                        if image_path.exists():
-                            with open(image_path, "rb") as image_file:
-                                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-                                user_message_content.append({
-                                    "type": "image_url",
-                                    "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
-                                })
-                elif isinstance(element.content, bytes):
-                    # It's already bytes, encode directly
-                    base64_image = base64.b64encode(element.content).decode('utf-8')
+                if index in images:
+                    # Local file or bytes, already encoded
                     user_message_content.append({
                         "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
+                        "image_url": {"url": images[index].data_url}
+                    })
+                elif isinstance(element.content, str) and element.content.startswith(('http://', 'https://')):
+                    user_message_content.append({
+                        "type": "image_url",
+                        "image_url": {"url": element.content}
                     })
         
         messages.append({"role": "user", "content": user_message_content})
         
-        # Generate response
+        # Generate response on the pooled client for this key/endpoint
         start_time = time.time()
-        response = await openai.ChatCompletion.acreate(
-            model=config.model_name,
-            messages=messages,
-            **config.parameters
-        )
+        async with self.client_pool.acquire(config) as client:
+            response = await client.chat.completions.create(
+                model=config.model_name,
+                messages=messages,
+                **config.parameters
+            )
         end_time = time.time()
         
         return ModelResponse(
@@ -169,13 +301,13 @@ class MultiModalBeam(BeamChat):
         )
     
     async def _process_anthropic_multimodal(self, model_id: str, config: LLMConfig, 
-                                          prompt: MultiModalPrompt) -> ModelResponse:
+                                          prompt: MultiModalPrompt,
+                                          images: Optional[Dict[int, EncodedImage]] = None) -> ModelResponse:
         """Process multimodal prompt using Anthropic's vision capabilities"""
-        import anthropic
         import time
         
-        # Initialize client
-        client = anthropic.Anthropic(api_key=config.api_key)
+        if images is None:
+            images = await self._images_for_model(model_id, prompt)
         
         # Prepare system prompt
         system_message = prompt.system_message or ""
@@ -183,44 +315,35 @@ class MultiModalBeam(BeamChat):
         # Construct the user message with multiple modalities
         user_message_content = []
         
-        for element in prompt.elements:
+        for index, element in enumerate(prompt.elements):
             if element.modality_type == ModalityType.TEXT:
                 user_message_content.append({"type": "text", "text": element.content})
             elif element.modality_type == ModalityType.IMAGE:
-                # Handle different image input formats
-                if isinstance(element.content, str):
-                    # Assume it's a file path or URL
-                    if element.content.startswith(('http://', 'https://')):
-                        # It's a URL
-                        user_message_content.append({
-                            "type": "image",
-                            "source": {"type": "url", "url": element.content}
-                        })
-                    else:
-                        # It's a file path, read and encode
-                        image_path = Path(element.content)
-                        if image_path.exists():
-                            with open(image_path, "rb") as image_file:
-                                media_bytes = image_file.read()
-                                user_message_content.append({
-                                    "type": "image",
-                                    "source": {"type": "base64", "media_type": "image/jpeg", "data": base64.b64encode(media_bytes).decode('utf-8')}
-                                })
-                elif isinstance(element.content, bytes):
-                    # It's already bytes, encode directly
+                if index in images:
+                    # Local file or bytes, already encoded
                     user_message_content.append({
                         "type": "image",
-                        "source": {"type": "base64", "media_type": "image/jpeg", "data": base64.b64encode(element.content).decode('utf-8')}
+                        "source": {"type": "base64", "media_type": images[index].media_type,
+                                   "data": images[index].data}
                     })
+                elif isinstance(element.content, str) and element.content.startswith(('http://', 'https://')):
+                    user_message_content.append({
+                        "type": "image",
+                        "source": {"type": "url", "url": element.content}
+                    })
+            elif element.modality_type in (ModalityType.AUDIO, ModalityType.VIDEO):
+                logger.warning(f"Model {model_id} cannot take {element.modality_type.value} input; "
+                               f"skipping {element.modality_type.value} element")
         
-        # Generate response
+        # Generate response on the pooled client for this key/endpoint
         start_time = time.time()
-        response = await client.messages.create(
-            model=config.model_name,
-            system=system_message,
-            messages=[{"role": "user", "content": user_message_content}],
-            **config.parameters
-        )
+        async with self.client_pool.acquire(config) as client:
+            response = await client.messages.create(
+                model=config.model_name,
+                system=system_message,
+                messages=[{"role": "user", "content": user_message_content}],
+                **config.parameters
+            )
         end_time = time.time()
         
         return ModelResponse(
@@ -301,7 +424,7 @@ class MultiModalBeam(BeamChat):
                 "confidence": result.confidence,
                 "strategy": result.strategy.value,
                 "models": [r.model_id for r in result.source_responses]
-            })
+            }, mode=WriteMode.SINGLE_WRITER)
             
             # Broadcast result
             self.broker.broadcast_system_message(
@@ -0,0 +1,246 @@
+from typing import Dict, Optional, Any, Tuple, AsyncIterator, Iterator
+import logging
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+from .persona_llm_manager import LLMProvider, LLMConfig
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ClientKey = Tuple[str, Optional[str], Optional[str]]  # (provider, api_key, endpoint)
+
+
+class _LoopClients:
+    """Async clients and concurrency limits owned by one event loop"""
+
+    def __init__(self):
+        self.async_clients: Dict[ClientKey, Any] = {}
+        self.http_clients: Dict[ClientKey, Any] = {}
+        self.limits: Dict[ClientKey, asyncio.Semaphore] = {}
+        self.closer: Optional[AsyncIterator[None]] = None
+
+
+class ProviderClientPool:
+    """Pool of long-lived provider clients keyed by (provider, api_key, endpoint)
+
+    Clients keep their HTTP connections alive between requests, so connection
+    setup and TLS handshakes are paid once per key instead of once per call.
+    Each key also gets a concurrency cap shared by everything using the pool.
+
+    Async clients and their caps belong to the event loop that created them,
+    so each running loop gets its own set; they are closed when that loop
+    shuts down (asyncio.run and loop.shutdown_asyncgens do this). The
+    blocking clients are shared by every thread.
+    """
+
+    def __init__(self, max_concurrency_per_key: int = 16, timeout: float = 60.0):
+        self.max_concurrency_per_key = max_concurrency_per_key
+        self.timeout = timeout
+        self.loops: Dict[asyncio.AbstractEventLoop, _LoopClients] = {}
+        self.sync_clients: Dict[ClientKey, Any] = {}
+        self.sync_limits: Dict[ClientKey, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(config: LLMConfig) -> ClientKey:
+        return (config.provider.value, config.api_key, config.endpoint)
+
+    def _http_limits(self) -> Any:
+        import httpx
+        return httpx.Limits(
+            max_connections=self.max_concurrency_per_key,
+            max_keepalive_connections=self.max_concurrency_per_key
+        )
+
+    def _create_async_client(self, config: LLMConfig) -> Any:
+        """Create an async client for a provider"""
+        import httpx
+        http_client = httpx.AsyncClient(limits=self._http_limits(), timeout=self.timeout)
+
+        if config.provider == LLMProvider.OPENAI:
+            import openai
+            return openai.AsyncOpenAI(api_key=config.api_key, base_url=config.endpoint,
+                                      http_client=http_client)
+        elif config.provider == LLMProvider.ANTHROPIC:
+            import anthropic
+            return anthropic.AsyncAnthropic(api_key=config.api_key, base_url=config.endpoint,
+                                            http_client=http_client)
+        raise ValueError(f"Unsupported provider for client pool: {config.provider}")
+
+    def _create_http_client(self, config: LLMConfig) -> Any:
+        """Create a raw async HTTP client for requests the SDKs can't stream"""
+        import httpx
+        return httpx.AsyncClient(limits=self._http_limits(), timeout=self.timeout)
+
+    def _create_sync_client(self, config: LLMConfig) -> Any:
+        """Create a blocking client for a provider"""
+        import httpx
+        http_client = httpx.Client(limits=self._http_limits(), timeout=self.timeout)
+
+        if config.provider == LLMProvider.OPENAI:
+            import openai
+            return openai.OpenAI(api_key=config.api_key, base_url=config.endpoint,
+                                 http_client=http_client)
+        elif config.provider == LLMProvider.ANTHROPIC:
+            import anthropic
+            return anthropic.Anthropic(api_key=config.api_key, base_url=config.endpoint,
+                                       http_client=http_client)
+        raise ValueError(f"Unsupported provider for client pool: {config.provider}")
+
+    def _loop_clients(self) -> _LoopClients:
+        """Get the clients for the running event loop, registering it on first use"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self.loops.get(loop)
+            if clients is not None:
+                return clients
+            # Loops closed without shutdown_asyncgens() never ran their closer
+            for stale in [l for l in self.loops if l.is_closed()]:
+                del self.loops[stale]
+            clients = self.loops[loop] = _LoopClients()
+
+        clients.closer = self._close_on_shutdown(clients)
+        # Run the closer to its first yield so this loop tracks it; the loop's
+        # shutdown_asyncgens() then resumes it there to close the clients
+        try:
+            clients.closer.asend(None).send(None)
+        except StopIteration:
+            pass
+        return clients
+
+    async def _close_on_shutdown(self, clients: _LoopClients) -> AsyncIterator[None]:
+        try:
+            yield
+        finally:
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                if self.loops.get(loop) is clients:
+                    del self.loops[loop]
+            await self._close_loop_clients(clients)
+
+    @staticmethod
+    async def _close_loop_clients(clients: _LoopClients) -> None:
+        for client in list(clients.async_clients.values()):
+            await client.close()
+        for client in list(clients.http_clients.values()):
+            await client.aclose()
+        clients.async_clients.clear()
+        clients.http_clients.clear()
+        clients.limits.clear()
+
+    def _limit(self, clients: _LoopClients, key: ClientKey) -> asyncio.Semaphore:
+        # Caller holds the lock
+        if key not in clients.limits:
+            clients.limits[key] = asyncio.Semaphore(self.max_concurrency_per_key)
+        return clients.limits[key]
+
+    def get_async_client(self, config: LLMConfig) -> Any:
+        """Get (or lazily create) the running loop's async client for a configuration"""
+        key = self._key(config)
+        clients = self._loop_clients()
+        with self._lock:
+            if key not in clients.async_clients:
+                clients.async_clients[key] = self._create_async_client(config)
+                self._limit(clients, key)
+                logger.info(f"Created pooled async client for provider {key[0]}")
+            return clients.async_clients[key]
+
+    def get_http_client(self, config: LLMConfig) -> Any:
+        """Get (or lazily create) the running loop's raw httpx.AsyncClient for a configuration
+        
+        Used for requests the SDKs can't stream, such as large media bodies.
+        It shares the per-key concurrency cap with the SDK client.
+        """
+        key = self._key(config)
+        clients = self._loop_clients()
+        with self._lock:
+            if key not in clients.http_clients:
+                clients.http_clients[key] = self._create_http_client(config)
+                self._limit(clients, key)
+                logger.info(f"Created pooled HTTP client for provider {key[0]}")
+            return clients.http_clients[key]
+
+    def get_sync_client(self, config: LLMConfig) -> Any:
+        """Get (or lazily create) the shared blocking client for a configuration"""
+        key = self._key(config)
+        with self._lock:
+            if key not in self.sync_clients:
+                self.sync_clients[key] = self._create_sync_client(config)
+                self.sync_limits[key] = threading.BoundedSemaphore(self.max_concurrency_per_key)
+                logger.info(f"Created pooled client for provider {key[0]}")
+            return self.sync_clients[key]
+
+    @asynccontextmanager
+    async def acquire(self, config: LLMConfig) -> AsyncIterator[Any]:
+        """Borrow the async client for a configuration within its concurrency cap"""
+        client = self.get_async_client(config)
+        async with self._loop_clients().limits[self._key(config)]:
+            yield client
+
+    @asynccontextmanager
+    async def acquire_http(self, config: LLMConfig) -> AsyncIterator[Any]:
+        """Borrow the raw HTTP client for a configuration within its concurrency cap"""
+        client = self.get_http_client(config)
+        async with self._loop_clients().limits[self._key(config)]:
+            yield client
+
+    @contextmanager
+    def acquire_sync(self, config: LLMConfig) -> Iterator[Any]:
+        """Borrow the blocking client for a configuration within its concurrency cap"""
+        client = self.get_sync_client(config)
+        with self.sync_limits[self._key(config)]:
+            yield client
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of pooled clients per provider"""
+        with self._lock:
+            loops = list(self.loops.values())
+            async_keys = [key for clients in loops for key in clients.async_clients]
+            http_clients = sum(len(clients.http_clients) for clients in loops)
+            sync_keys = list(self.sync_clients)
+        counts: Dict[str, int] = {}
+        for provider, _, _ in async_keys + sync_keys:
+            counts[provider] = counts.get(provider, 0) + 1
+        return {
+            "event_loops": len(loops),
+            "async_clients": len(async_keys),
+            "sync_clients": len(sync_keys),
+            "http_clients": http_clients,
+            "clients_by_provider": counts
+        }
+
+    async def aclose(self) -> None:
+        """Close the running loop's async clients and every blocking client
+
+        Async clients of other loops are closed when those loops shut down.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self.loops.pop(loop, None)
+            sync_clients = list(self.sync_clients.values())
+            self.sync_clients.clear()
+            self.sync_limits.clear()
+
+        if clients is not None:
+            await self._close_loop_clients(clients)
+            if clients.closer is not None:
+                await clients.closer.aclose()  # Nothing left for it to close at shutdown
+        for client in sync_clients:
+            client.close()
+
+
+# Process-wide pool shared by BeamChat, MultiModalBeam and EnhancedAIPersona
+_default_pool: Optional[ProviderClientPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_client_pool() -> ProviderClientPool:
+    """Get the process-wide provider client pool"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ProviderClientPool()
+        return _default_pool
@@ -0,0 +1,186 @@
+from typing import Dict, Optional, Any, Callable, Deque
+import logging
+import asyncio
+import time
+from collections import deque
+from enum import Enum
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """States of a per-model circuit breaker"""
+    CLOSED = "closed"        # Requests flow normally
+    OPEN = "open"            # Requests are rejected without calling the provider
+    HALF_OPEN = "half_open"  # A limited number of trial requests are let through
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for a single model"""
+
+    def __init__(self, model_id: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1,
+                 on_state_change: Optional[Callable[[str, CircuitState, CircuitState], None]] = None):
+        self.model_id = model_id
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.on_state_change = on_state_change
+        self._state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_calls = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving OPEN -> HALF_OPEN once the recovery timeout has passed"""
+        if (self._state == CircuitState.OPEN and self.opened_at is not None and
+                time.monotonic() - self.opened_at >= self.recovery_timeout):
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def is_open(self) -> bool:
+        """Whether requests would currently be rejected (does not consume a trial call)"""
+        state = self.state
+        if state == CircuitState.HALF_OPEN:
+            return self.half_open_calls >= self.half_open_max_calls
+        return state == CircuitState.OPEN
+
+    def allow_request(self) -> bool:
+        """Check whether a request may go through, reserving a trial call when half-open"""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN and self.half_open_calls < self.half_open_max_calls:
+            self.half_open_calls += 1
+            return True
+        self.rejected_calls += 1
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful call"""
+        self.total_successes += 1
+        self.consecutive_failures = 0
+        if self._state != CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+
+    def record_cancelled(self) -> None:
+        """Give back a half-open trial slot when the call was cancelled before completing"""
+        if self._state == CircuitState.HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_failure(self) -> None:
+        """Record a failed call"""
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        if self._state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._transition(CircuitState.OPEN)
+
+    def _transition(self, new_state: CircuitState) -> None:
+        old_state = self._state
+        if old_state == new_state:
+            if new_state == CircuitState.OPEN:
+                self.opened_at = time.monotonic()
+            return
+
+        self._state = new_state
+        self.half_open_calls = 0
+        if new_state == CircuitState.OPEN:
+            self.opened_at = time.monotonic()
+        elif new_state == CircuitState.CLOSED:
+            self.opened_at = None
+
+        logger.info(f"Circuit for model {self.model_id}: {old_state.value} -> {new_state.value}")
+        if self.on_state_change:
+            self.on_state_change(self.model_id, old_state, new_state)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export breaker state as metrics"""
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_successes": self.total_successes,
+            "rejected_calls": self.rejected_calls
+        }
+
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit for a single model
+
+    Every successful call grows the limit by roughly `increase` per window of
+    `limit` calls; every failure (or call slower than latency_threshold)
+    multiplies it by decrease_factor. Callers beyond the current limit wait.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 increase: float = 1.0, decrease_factor: float = 0.5,
+                 latency_threshold: Optional[float] = None):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self) -> None:
+        """Wait for a free slot under the current limit"""
+        while self.in_flight >= self.current_limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken by release() but cancelled before resuming: pass the wakeup on
+                    self._wake_waiters()
+                raise
+            finally:
+                if not waiter.done():
+                    waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+        self.in_flight += 1
+
+    def release(self, success: Optional[bool] = True, latency: Optional[float] = None) -> None:
+        """Release a slot and adapt the limit (success=None releases without a signal)"""
+        if success is not None:
+            congested = (not success or
+                         (self.latency_threshold is not None and latency is not None and
+                          latency > self.latency_threshold))
+            if congested:
+                self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+            else:
+                self.limit = min(float(self.max_limit), self.limit + self.increase / max(self.limit, 1.0))
+
+        self.in_flight = max(0, self.in_flight - 1)
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        free_slots = self.current_limit - self.in_flight
+        while free_slots > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free_slots -= 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export limiter state as metrics"""
+        return {
+            "limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters)
+        }
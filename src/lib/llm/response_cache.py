@@ -0,0 +1,228 @@
+from typing import Dict, List, Optional, Any, Callable, Sequence, Tuple
+from collections import OrderedDict
+from itertools import islice
+import asyncio
+import logging
+import hashlib
+import json
+import math
+import threading
+import time
+
+from ..messaging.shared_memory import WriteMode
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], Sequence[float]]
+
+
+def _digest(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts"""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _normalize(vector: Sequence[float]) -> Tuple[float, ...]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return tuple(x / norm for x in vector) if norm else tuple(vector)
+
+
+class ResponseCache:
+    """TTL + LRU cache of model responses keyed by (model_id, system_message, prompt, parameters)
+
+    Exact matches are looked up by hash. When an embedder is configured, a miss
+    falls back to the most similar cached prompt for the same model, system
+    message and parameters, provided its cosine similarity clears
+    similarity_threshold; only the max_scan most recent prompts in that scope
+    are compared. Entries can optionally be mirrored to Redis under a
+    SharedMemoryManager namespace so other processes share the cache.
+
+    Sampled responses are not reproducible, so with deterministic_only (the
+    default) requests are only cached when their parameters pin temperature
+    to 0. From a coroutine use aget()/aset(), which keep the embedder and
+    Redis round-trips off the event loop.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 300.0,
+                 embedder: Optional[Embedder] = None, similarity_threshold: float = 0.95,
+                 memory: Optional[Any] = None, max_scan: int = 256, deterministic_only: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.memory = memory  # Optional SharedMemoryManager for the Redis tier
+        self.max_scan = max_scan
+        self.deterministic_only = deterministic_only
+        self.entries: "OrderedDict[str, Tuple[Optional[float], Dict[str, Any]]]" = OrderedDict()
+        self.embeddings: Dict[str, Dict[str, Tuple[float, ...]]] = {}  # scope -> key -> unit vector
+        self.key_meta: Dict[str, Tuple[str, str]] = {}  # key -> (scope, model_id)
+        self.stats_counters: Dict[str, int] = {
+            "hits": 0, "semantic_hits": 0, "remote_hits": 0, "misses": 0, "evictions": 0
+        }
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_id: str, system_message: Optional[str], prompt: str,
+                 parameters: Optional[Dict[str, Any]] = None) -> str:
+        """Build the exact-match cache key for a request"""
+        return _digest(model_id, system_message, prompt, parameters or {})
+
+    @staticmethod
+    def _scope(model_id: str, system_message: Optional[str],
+               parameters: Optional[Dict[str, Any]]) -> str:
+        return _digest(model_id, system_message, parameters or {})
+
+    def is_cacheable(self, parameters: Optional[Dict[str, Any]]) -> bool:
+        """Whether a request with these parameters may be served from or stored in the cache"""
+        if not self.deterministic_only:
+            return True
+        return (parameters or {}).get("temperature") == 0
+
+    def get(self, model_id: str, system_message: Optional[str], prompt: str,
+            parameters: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Look up a cached response, or None on a miss"""
+        key = self.make_key(model_id, system_message, prompt, parameters)
+        scope = self._scope(model_id, system_message, parameters)
+
+        value = self._get_local(key)
+        if value is not None:
+            self.stats_counters["hits"] += 1
+            return value
+
+        value = self._get_remote(key)
+        if value is not None:
+            self.stats_counters["remote_hits"] += 1
+            self._set_local(key, value, model_id, scope, None)
+            return value
+
+        if self.embedder and scope in self.embeddings:
+            value = self._get_similar(self.embedder(prompt), scope)
+            if value is not None:
+                self.stats_counters["semantic_hits"] += 1
+                return value
+
+        self.stats_counters["misses"] += 1
+        return None
+
+    async def aget(self, model_id: str, system_message: Optional[str], prompt: str,
+                   parameters: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """get() for coroutines: in-process hits return inline, Redis and embedder lookups run in an executor"""
+        value = self._get_local(self.make_key(model_id, system_message, prompt, parameters))
+        if value is not None:
+            self.stats_counters["hits"] += 1
+            return value
+        if self.memory is None and not (self.embedder and
+                                        self._scope(model_id, system_message, parameters) in self.embeddings):
+            self.stats_counters["misses"] += 1
+            return None
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.get, model_id, system_message, prompt, parameters)
+
+    def set(self, model_id: str, system_message: Optional[str], prompt: str,
+            parameters: Optional[Dict[str, Any]], value: Dict[str, Any]) -> None:
+        """Store a response (must be encodable by the memory codec for the Redis tier)"""
+        key = self.make_key(model_id, system_message, prompt, parameters)
+        embedding = _normalize(self.embedder(prompt)) if self.embedder else None
+        self._set_local(key, value, model_id, self._scope(model_id, system_message, parameters), embedding)
+
+        if self.memory is not None:
+            try:
+                self.memory.write(f"response_cache:{key}", value, sync=False, mode=WriteMode.SINGLE_WRITER,
+                                  ttl=self.ttl, cache=False)
+            except Exception as e:
+                logger.warning(f"Failed to write response cache entry to Redis: {str(e)}")
+
+    async def aset(self, model_id: str, system_message: Optional[str], prompt: str,
+                   parameters: Optional[Dict[str, Any]], value: Dict[str, Any]) -> None:
+        """set() for coroutines; embedding and the Redis write run in an executor"""
+        if self.embedder is None and self.memory is None:
+            self.set(model_id, system_message, prompt, parameters, value)
+            return
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.set, model_id, system_message, prompt, parameters, value)
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def _get_remote(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.memory is None:
+            return None
+        try:
+            return self.memory.read(f"response_cache:{key}", cache=False)
+        except Exception as e:
+            logger.warning(f"Failed to read response cache entry from Redis: {str(e)}")
+            return None
+
+    def _get_similar(self, query: Sequence[float], scope: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            candidates = self.embeddings.get(scope)
+            if not candidates:
+                return None
+            recent = list(islice(reversed(candidates.items()), self.max_scan))
+
+        query = _normalize(query)
+        best_key, best_score = None, self.similarity_threshold
+        for key, vector in recent:
+            score = sum(x * y for x, y in zip(query, vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        return self._get_local(best_key) if best_key else None
+
+    def _set_local(self, key: str, value: Dict[str, Any], model_id: str, scope: str,
+                   embedding: Optional[Tuple[float, ...]]) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            self.key_meta[key] = (scope, model_id)
+            if embedding is not None:
+                vectors = self.embeddings.setdefault(scope, {})
+                vectors.pop(key, None)  # Re-insert so the scan sees it as most recent
+                vectors[key] = embedding
+
+            while len(self.entries) > self.max_entries:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.stats_counters["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        """Drop a key from every index (caller holds the lock)"""
+        self.entries.pop(key, None)
+        scope, _ = self.key_meta.pop(key, (None, None))
+        if scope is not None and scope in self.embeddings:
+            self.embeddings[scope].pop(key, None)
+            if not self.embeddings[scope]:
+                del self.embeddings[scope]
+
+    def invalidate(self, model_id: Optional[str] = None) -> int:
+        """Drop in-process entries for a model (or all of them); Redis entries expire by TTL"""
+        with self._lock:
+            if model_id is None:
+                keys = list(self.entries)
+            else:
+                keys = [key for key, (_, owner) in self.key_meta.items() if owner == model_id]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        lookups = sum(self.stats_counters[k] for k in ("hits", "semantic_hits", "remote_hits", "misses"))
+        hits = lookups - self.stats_counters["misses"]
+        return {
+            **self.stats_counters,
+            "size": len(self.entries),
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
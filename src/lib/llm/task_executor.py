@@ -0,0 +1,202 @@
+from typing import Dict, List, Optional, Any, Callable, Awaitable, Set, Tuple, TYPE_CHECKING
+import logging
+import asyncio
+import heapq
+import itertools
+import time
+
+from .beam_chat import FusionStrategy
+
+if TYPE_CHECKING:
+    from .hierarchical_agent_system import HierarchicalAgentSystem, AgentTask
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TaskExecutor:
+    """Runs ready HierarchicalAgentSystem tasks concurrently on a bounded worker pool
+
+    Runnable tasks wait in a priority queue per assigned agent, ordered by
+    metadata "priority" (higher first) and then by the length of the longest
+    dependency chain still ahead of them, so the critical path is never
+    starved. At most max_concurrency tasks run at once, and at most
+    max_per_agent per agent. When an agent is saturated, an idle agent that
+    shares one of its capabilities (get_agents_by_capability) steals its
+    next task, unless the task is "pinned". Completing a task readies its
+    dependents, which are dispatched immediately.
+
+    Tasks with "agent_ids" in their metadata run through collaborate_on_task;
+    others run on the assigned persona. Pass `runner` to execute tasks some
+    other way.
+    """
+
+    def __init__(self, system: 'HierarchicalAgentSystem', max_concurrency: int = 8,
+                 max_per_agent: int = 2, work_stealing: bool = True,
+                 runner: Optional[Callable[['AgentTask'], Awaitable[Any]]] = None):
+        self.system = system
+        self.max_concurrency = max_concurrency
+        self.max_per_agent = max_per_agent
+        self.work_stealing = work_stealing
+        self.runner = runner or self._run_task
+
+        self.queues: Dict[str, List[Tuple[float, float, int, str]]] = {}  # agent_id -> heap
+        self.queued: Set[str] = set()
+        self.running: Dict[str, asyncio.Task] = {}          # task_id -> asyncio task
+        self.running_per_agent: Dict[str, int] = {}
+        self.downstream: Dict[str, float] = {}
+        self.stats_counters: Dict[str, int] = {"completed": 0, "failed": 0, "cancelled": 0, "stolen": 0}
+        self._sequence = itertools.count()
+        self._idle: Optional[asyncio.Event] = None
+
+        system.runnable_listeners.append(self.submit)
+
+    def submit(self, task_id: str) -> None:
+        """Queue a runnable task; dispatches straight away while run() is active"""
+        task = self.system.tasks.get(task_id)
+        if task is None or task_id in self.queued or task_id in self.running:
+            return
+        priority = float(task.metadata.get("priority", 0))
+        chain = self.downstream.get(task_id, self.system.task_graph.weights.get(task_id, 1.0))
+        heapq.heappush(self.queues.setdefault(task.assigned_to, []),
+                       (-priority, -chain, next(self._sequence), task_id))
+        self.queued.add(task_id)
+        if self._idle is not None:
+            self._dispatch()
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every runnable task, and everything they unblock, until nothing is left"""
+        self.downstream = self.system.task_graph.downstream_lengths()
+        self._idle = asyncio.Event()
+        started = time.perf_counter()
+        try:
+            for task_id in self.system.get_runnable_tasks():
+                self.submit(task_id)
+            self._dispatch()
+            if self.running:
+                await self._idle.wait()
+        finally:
+            self._idle = None
+        return {**self.stats(), "wall_time": time.perf_counter() - started}
+
+    def _has_capacity(self, agent_id: str) -> bool:
+        return self.running_per_agent.get(agent_id, 0) < self.max_per_agent
+
+    def _next_task(self) -> Optional[Tuple[str, str]]:
+        """(task_id, agent to run it on) for the best queued task that has a free agent"""
+        best = None
+        for agent_id, queue in self.queues.items():
+            self._drop_stale(queue)
+            if queue and self._has_capacity(agent_id) and (best is None or queue[0] < best[0]):
+                best = (queue[0], agent_id, agent_id)
+
+        if self.work_stealing:
+            for agent_id, queue in self.queues.items():
+                if not queue or self._has_capacity(agent_id) or (best is not None and best[0] <= queue[0]):
+                    continue
+                task = self.system.tasks[queue[0][3]]
+                if task.metadata.get("pinned"):
+                    continue
+                thief = self._find_thief(agent_id)
+                if thief is not None:
+                    best = (queue[0], agent_id, thief)
+
+        if best is None:
+            return None
+        entry, owner, agent_id = best
+        heapq.heappop(self.queues[owner])
+        self.queued.discard(entry[3])
+        return entry[3], agent_id
+
+    def _drop_stale(self, queue: List[Tuple[float, float, int, str]]) -> None:
+        # Tasks completed or started elsewhere since they were queued
+        while queue and self.system.tasks[queue[0][3]].status not in ("pending", "ready"):
+            self.queued.discard(heapq.heappop(queue)[3])
+
+    def _find_thief(self, agent_id: str) -> Optional[str]:
+        """Least-busy agent with free capacity sharing a capability with agent_id"""
+        info = self.system.agents.get(agent_id)
+        if not info:
+            return None
+        peers = set()
+        for capability in info["capabilities"]:
+            peers.update(self.system.get_agents_by_capability(capability))
+        peers.discard(agent_id)
+        candidates = [peer for peer in peers if self._has_capacity(peer)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda peer: (self.running_per_agent.get(peer, 0),
+                                                  len(self.queues.get(peer, ())), peer))
+
+    def _dispatch(self) -> None:
+        while len(self.running) < self.max_concurrency:
+            picked = self._next_task()
+            if picked is None:
+                break
+            task_id, agent_id = picked
+            task = self.system.tasks[task_id]
+            if agent_id != task.assigned_to:
+                logger.info(f"Agent {agent_id} stole task {task_id} from {task.assigned_to}")
+                self.system.reassign_task(task_id, agent_id)
+                self.stats_counters["stolen"] += 1
+            self.running_per_agent[agent_id] = self.running_per_agent.get(agent_id, 0) + 1
+            self.running[task_id] = asyncio.create_task(self._execute(task_id, agent_id))
+
+        if not self.running and self._idle is not None:
+            self._idle.set()
+
+    async def _execute(self, task_id: str, agent_id: str) -> None:
+        task = self.system.tasks[task_id]
+        self.system.update_task_status(task_id, "in_progress")
+        try:
+            try:
+                result = await self.runner(task)
+            finally:
+                # Free the slot however the runner ends, cancellation included
+                self._finish(task_id, agent_id)
+        except asyncio.CancelledError:
+            self.stats_counters["cancelled"] += 1
+            if task.status == "in_progress":
+                # Interrupted, not failed: leave it runnable for a later run()
+                self.system.update_task_status(task_id, "pending")
+            if not self.running and self._idle is not None:
+                self._idle.set()
+            raise
+        except Exception as e:
+            logger.error(f"Task {task_id} failed on agent {agent_id}: {str(e)}")
+            self.stats_counters["failed"] += 1
+            self.system.update_task_status(task_id, "failed", str(e))
+        else:
+            self.stats_counters["completed"] += 1
+            if task.status != "completed":
+                self.system.update_task_status(task_id, "completed", result)
+        self._dispatch()
+
+    def _finish(self, task_id: str, agent_id: str) -> None:
+        self.running.pop(task_id, None)
+        self.running_per_agent[agent_id] -= 1
+
+    async def _run_task(self, task: 'AgentTask') -> Any:
+        """Default runner: a collaboration if the task names agents, else the assigned persona"""
+        agent_ids = task.metadata.get("agent_ids")
+        if agent_ids:
+            strategy = FusionStrategy(task.metadata.get("fusion_strategy", FusionStrategy.ENSEMBLE.value))
+            result = await self.system.collaborate_on_task(task.task_id, agent_ids, strategy)
+            if result is None:
+                raise RuntimeError("No responses generated")
+            return result.content
+
+        info = self.system.agents.get(task.assigned_to)
+        if not info:
+            raise RuntimeError(f"No registered agent {task.assigned_to}")
+        # Personas call their providers with blocking clients
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, info["persona"].generate_response, task.description)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats_counters,
+            "running": len(self.running),
+            "queued": len(self.queued)
+        }
@@ -0,0 +1,162 @@
+from typing import Dict, List, Optional, Any, Iterable, Set
+import logging
+from collections import deque
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TaskCycleError(ValueError):
+    """Raised when adding a task would make the dependency graph cyclic"""
+
+    def __init__(self, task_id: str, cycle: List[str]):
+        self.task_id = task_id
+        self.cycle = cycle
+        super().__init__(f"Task {task_id} would create a dependency cycle: {' -> '.join(cycle)}")
+
+
+class TaskGraph:
+    """Dependency DAG for agent tasks with a reverse-dependency index
+
+    Each task keeps a counter of its dependencies that have not completed,
+    and each task id maps to the set of tasks waiting on it. Completing a task
+    therefore touches only its direct dependents (O(out-degree)) instead of
+    scanning every task. Dependencies may name tasks that don't exist yet;
+    they count as unfinished until the task is added and completed.
+    """
+
+    def __init__(self):
+        self.dependencies: Dict[str, List[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}   # task_id -> tasks depending on it
+        self.remaining: Dict[str, int] = {}         # task_id -> unfinished dependency count
+        self.weights: Dict[str, float] = {}         # Estimated duration, for the critical path
+        self.completed: Set[str] = set()
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.dependencies
+
+    def __len__(self) -> int:
+        return len(self.dependencies)
+
+    def add_task(self, task_id: str, dependencies: Optional[Iterable[str]] = None,
+                 weight: float = 1.0) -> None:
+        """Add a task, rejecting it with TaskCycleError if it would close a cycle"""
+        if task_id in self.dependencies:
+            raise ValueError(f"Task {task_id} already exists")
+        dependencies = list(dict.fromkeys(dependencies or []))
+
+        cycle = self._find_cycle(task_id, dependencies)
+        if cycle:
+            raise TaskCycleError(task_id, cycle)
+
+        self.dependencies[task_id] = dependencies
+        self.weights[task_id] = weight
+        self.remaining[task_id] = sum(1 for dep in dependencies if dep not in self.completed)
+        for dep in dependencies:
+            self.dependents.setdefault(dep, set()).add(task_id)
+
+    def _find_cycle(self, task_id: str, dependencies: List[str]) -> Optional[List[str]]:
+        """Path task_id -> ... -> dependency through existing dependents, if any
+
+        Only tasks that were referenced before being added can already have
+        dependents, so for freshly created tasks this returns immediately.
+        """
+        targets = set(dependencies)
+        if task_id in targets:
+            return [task_id, task_id]
+        if not targets or task_id not in self.dependents:
+            return None
+
+        parents: Dict[str, str] = {}
+        queue = deque([task_id])
+        while queue:
+            current = queue.popleft()
+            for dependent in self.dependents.get(current, ()):
+                if dependent in parents or dependent == task_id:
+                    continue
+                parents[dependent] = current
+                if dependent in targets:
+                    # dependent already (transitively) depends on task_id
+                    path = [dependent]
+                    while path[-1] != task_id:
+                        path.append(parents[path[-1]])
+                    return path[::-1] + [task_id]
+                queue.append(dependent)
+        return None
+
+    def is_ready(self, task_id: str) -> bool:
+        """Whether every dependency of a task has completed"""
+        return self.remaining.get(task_id) == 0
+
+    def mark_completed(self, task_id: str) -> List[str]:
+        """Record a completion; returns dependents whose last dependency this was"""
+        if task_id in self.completed:
+            return []
+        self.completed.add(task_id)
+        unblocked = []
+        for dependent in self.dependents.get(task_id, ()):
+            self.remaining[dependent] -= 1
+            if self.remaining[dependent] == 0:
+                unblocked.append(dependent)
+        return unblocked
+
+    def mark_incomplete(self, task_id: str) -> None:
+        """Undo a completion (e.g. a completed task is reopened or fails on retry)"""
+        if task_id not in self.completed:
+            return
+        self.completed.discard(task_id)
+        for dependent in self.dependents.get(task_id, ()):
+            self.remaining[dependent] += 1
+
+    def topological_order(self) -> List[str]:
+        """Tasks ordered so that every task comes after its dependencies (Kahn's algorithm)"""
+        in_degree = {task_id: sum(1 for dep in deps if dep in self.dependencies)
+                     for task_id, deps in self.dependencies.items()}
+        queue = deque(task_id for task_id, degree in in_degree.items() if degree == 0)
+        order = []
+        while queue:
+            task_id = queue.popleft()
+            order.append(task_id)
+            for dependent in self.dependents.get(task_id, ()):
+                if dependent in in_degree:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        queue.append(dependent)
+        return order
+
+    def downstream_lengths(self) -> Dict[str, float]:
+        """Weight of the longest chain starting at each task (the task included)
+
+        Running the tasks with the longest remaining chain first keeps the
+        critical path moving when there are more ready tasks than workers.
+        """
+        lengths: Dict[str, float] = {}
+        for task_id in reversed(self.topological_order()):
+            tail = max((lengths[d] for d in self.dependents.get(task_id, ()) if d in lengths), default=0.0)
+            lengths[task_id] = self.weights[task_id] + tail
+        return lengths
+
+    def critical_path(self) -> Dict[str, Any]:
+        """Longest chain of dependent tasks by total weight
+
+        The chain bounds how fast the graph can finish however many agents
+        work on it in parallel.
+        """
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for task_id in self.topological_order():
+            start, before = 0.0, None
+            for dep in self.dependencies[task_id]:
+                if dep in finish and finish[dep] > start:
+                    start, before = finish[dep], dep
+            finish[task_id] = start + self.weights[task_id]
+            previous[task_id] = before
+
+        if not finish:
+            return {"tasks": [], "length": 0.0}
+        last = max(finish, key=finish.get)
+        path = [last]
+        while previous[path[-1]] is not None:
+            path.append(previous[path[-1]])
+        return {"tasks": path[::-1], "length": finish[last]}
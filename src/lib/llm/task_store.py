@@ -0,0 +1,214 @@
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Union
+import logging
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import abstractmethod
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass(init=False)
+class AgentTask:
+    """Task assigned to an agent
+
+    Slotted, so each of the (possibly hundreds of thousands of) tasks costs
+    a fixed handful of pointers instead of a per-instance __dict__.
+    """
+    __slots__ = ("task_id", "description", "assigned_to", "status", "result",
+                 "metadata", "dependencies", "estimated_duration")
+    task_id: str
+    description: str
+    assigned_to: str  # persona_id
+    status: str  # pending, ready, in_progress, completed, failed
+    result: Optional[Any]
+    metadata: Dict[str, Any]
+    dependencies: List[str]  # List of task_ids this task depends on
+    estimated_duration: float
+
+    def __init__(self, task_id: str, description: str, assigned_to: str, status: str = "pending",
+                 result: Optional[Any] = None, metadata: Optional[Dict[str, Any]] = None,
+                 dependencies: Optional[List[str]] = None, estimated_duration: float = 1.0):
+        self.task_id = task_id
+        self.description = description
+        self.assigned_to = assigned_to
+        self.status = status
+        self.result = result
+        self.metadata = metadata if metadata is not None else {}
+        self.dependencies = dependencies if dependencies is not None else []
+        self.estimated_duration = estimated_duration
+
+    def to_row(self) -> tuple:
+        return (self.task_id, self.description, self.assigned_to, self.status,
+                json.dumps(self.result, default=str) if self.result is not None else None,
+                json.dumps(self.metadata, default=str) if self.metadata else None,
+                json.dumps(self.dependencies) if self.dependencies else None,
+                self.estimated_duration)
+
+    @classmethod
+    def from_row(cls, row: Iterable[Any]) -> 'AgentTask':
+        task_id, description, assigned_to, status, result, metadata, dependencies, estimated_duration = row
+        return cls(task_id, description, assigned_to, status,
+                   json.loads(result) if result is not None else None,
+                   json.loads(metadata) if metadata else None,
+                   json.loads(dependencies) if dependencies else None,
+                   estimated_duration)
+
+
+class TaskStore(Mapping):
+    """Where HierarchicalAgentSystem keeps its tasks
+
+    Reads behave like a dict of task_id -> AgentTask. Callers mutate tasks in
+    place and then call save(task) so durable backends can persist the
+    change; backends are free to batch those writes until flush().
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, AgentTask] = {}
+
+    def __getitem__(self, task_id: str) -> AgentTask:
+        return self.tasks[task_id]
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self.tasks
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tasks)
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def add(self, task: AgentTask) -> None:
+        """Store a new task"""
+        self.tasks[task.task_id] = task
+        self.save(task)
+
+    def save(self, task: AgentTask) -> None:
+        """Record that a task changed"""
+
+    def flush(self) -> None:
+        """Persist pending writes"""
+
+    @abstractmethod
+    def snapshot(self, path: Union[str, os.PathLike]) -> None:
+        """Write a point-in-time copy of every task to `path`"""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class InMemoryTaskStore(TaskStore):
+    """Default store: tasks live only in memory, with optional JSON-lines snapshots"""
+
+    def snapshot(self, path: Union[str, os.PathLike]) -> None:
+        tmp_path = f"{os.fspath(path)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for task in self.tasks.values():
+                f.write(json.dumps(task.to_row()))
+                f.write("\n")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_snapshot(cls, path: Union[str, os.PathLike]) -> 'InMemoryTaskStore':
+        store = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    task = AgentTask.from_row(json.loads(line))
+                    store.tasks[task.task_id] = task
+        return store
+
+
+class SQLiteTaskStore(TaskStore):
+    """Durable store backed by SQLite in WAL mode
+
+    Changes are buffered and written in a single transaction once batch_size
+    tasks are dirty, or by a background timer flush_interval seconds after
+    the first unflushed save, whichever comes first, so a crash loses at
+    most that window. Opening an existing database restores
+    every task with one sequential scan.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], batch_size: int = 500, flush_interval: float = 1.0):
+        super().__init__()
+        self.path = os.fspath(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dirty: Dict[str, AgentTask] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "task_id TEXT PRIMARY KEY, description TEXT, assigned_to TEXT, status TEXT, "
+            "result TEXT, metadata TEXT, dependencies TEXT, estimated_duration REAL)"
+        )
+        self.conn.commit()
+        self._load()
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        cursor = self.conn.execute(
+            "SELECT task_id, description, assigned_to, status, result, metadata, dependencies, "
+            "estimated_duration FROM tasks"
+        )
+        for row in cursor:
+            task = AgentTask.from_row(row)
+            self.tasks[task.task_id] = task
+        if self.tasks:
+            logger.info(f"Restored {len(self.tasks)} tasks from {self.path} "
+                        f"in {time.perf_counter() - started:.2f}s")
+
+    def save(self, task: AgentTask) -> None:
+        with self._lock:
+            self.dirty[task.task_id] = task
+            full = len(self.dirty) >= self.batch_size
+            if not full and self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self._flush_quietly)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            dirty, self.dirty = self.dirty, {}
+            timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                timer.cancel()
+            if not dirty:
+                return
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [task.to_row() for task in dirty.values()]
+                )
+
+    def _flush_quietly(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush tasks to {self.path}: {str(e)}")
+
+    def snapshot(self, path: Union[str, os.PathLike]) -> None:
+        """Consistent copy of the database, via SQLite's online backup API"""
+        self.flush()
+        target = sqlite3.connect(os.fspath(path))
+        try:
+            with self._lock:
+                self.conn.backup(target)
+        finally:
+            target.close()
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,244 @@
+from typing import Dict, List, Callable, Any, Optional, Iterable, Tuple
+import asyncio
+import inspect
+import logging
+import threading
+from collections import deque
+import redis.asyncio as aioredis
+
+from .codec import MessageCodec, Encoded
+from .message_broker import MessageBroker, Handler
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMessageBroker(MessageBroker):
+    """MessageBroker on redis.asyncio, running entirely on its owning event loop
+
+    The API matches MessageBroker: publish, route_message and
+    broadcast_system_message stay plain calls, so existing callers work
+    unchanged, but instead of a blocking round-trip they queue the message
+    for a sender task that pipelines everything queued since its last write.
+    Subscription handlers are called on the event loop; coroutine handlers
+    are scheduled as tasks (at most max_concurrent_handlers at a time), so
+    they can use asyncio.create_task and shared state without thread hops
+    or locks. Calls from other threads are handed to the loop with
+    call_soon_threadsafe.
+
+    Bind the loop with `await broker.start()` (or any call made from inside
+    it) and shut down with `await broker.aclose()`.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, max_concurrent_handlers: int = 100,
+                 max_batch: int = 500, poll_interval: float = 0.1, codec: Optional[MessageCodec] = None):
+        # Deliberately skips MessageBroker.__init__: no blocking client or thread pools
+        self.redis = aioredis.Redis(host=host, port=port)
+        self.codec = codec or MessageCodec()
+        self.origin: Optional[str] = None
+        self.subscriptions: Dict[str, Handler] = {}
+        self.pattern_subscriptions: Dict[str, Handler] = {}
+        self.context_routing: Dict[str, List[Handler]] = {}
+        self.max_concurrent_handlers = max_concurrent_handlers
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.outbox: deque = deque()     # (channel, encoded message)
+        self.commands: deque = deque()   # (pubsub method name, channel or pattern)
+        self.pubsub = None
+        self._outbox_ready: Optional[asyncio.Event] = None
+        self._commands_ready: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._handler_slots: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._handler_tasks: set = set()
+        self._start_lock = threading.Lock()
+
+    async def start(self) -> None:
+        """Bind the broker to the running loop and start its sender and listener tasks"""
+        self._bind(asyncio.get_running_loop())
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        with self._start_lock:
+            if self.loop is not None:
+                return
+            self.loop = loop
+        self._outbox_ready = asyncio.Event()
+        self._commands_ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._handler_slots = asyncio.Semaphore(self.max_concurrent_handlers)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._tasks = [loop.create_task(self._send_loop()), loop.create_task(self._listen_loop())]
+        # Anything queued before the loop was known
+        if self.outbox:
+            self._outbox_ready.set()
+        else:
+            self._drained.set()
+        if self.commands:
+            self._commands_ready.set()
+
+    def _on_loop(self, callback: Callable[..., None], *args: Any) -> None:
+        """Run callback on the owning loop: directly if we're on it, else via call_soon_threadsafe"""
+        if self.loop is None:
+            try:
+                self._bind(asyncio.get_running_loop())
+            except RuntimeError:
+                # No loop yet; start() picks the queues up
+                callback(*args)
+                return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            callback(*args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Queue a message for the sender task (fire-and-forget, like the blocking broker)"""
+        self._on_loop(self._queue_outgoing, channel, self.codec.encode(message))
+
+    def publish_batch(self, channels: Iterable[str], message: Dict[str, Any]) -> None:
+        """Queue one message for many channels, serializing it once"""
+        data = self.codec.encode(message)
+        self._on_loop(self._queue_outgoing_many, [(channel, data) for channel in channels])
+
+    def publish_many(self, messages: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        self._on_loop(self._queue_outgoing_many, [(channel, self.codec.encode(message)) for channel, message in messages])
+
+    def queue_system_message(self, pipe: Any, message_type: str, payload: Dict[str, Any]) -> bool:
+        """Publishes go through the sender task, never a caller's blocking pipeline"""
+        return False
+
+    async def apublish(self, channel: str, message: Dict[str, Any]) -> int:
+        """Publish immediately and return the number of receivers"""
+        return await self.redis.publish(channel, self.codec.encode(message))
+
+    def _queue_outgoing(self, channel: str, data: str) -> None:
+        self._queue_outgoing_many([(channel, data)])
+
+    def _queue_outgoing_many(self, batch: List[Tuple[str, Encoded]]) -> None:
+        self.outbox.extend(batch)
+        if self._outbox_ready is not None:
+            self._drained.clear()
+            self._outbox_ready.set()
+
+    async def flush(self) -> None:
+        """Wait until everything published so far has been sent"""
+        if self._drained is not None:
+            await self._drained.wait()
+
+    async def _send_loop(self) -> None:
+        while True:
+            await self._outbox_ready.wait()
+            self._outbox_ready.clear()
+            while self.outbox:
+                batch = [self.outbox.popleft() for _ in range(min(len(self.outbox), self.max_batch))]
+                try:
+                    if len(batch) == 1:
+                        await self.redis.publish(*batch[0])
+                    else:
+                        pipe = self.redis.pipeline(transaction=False)
+                        for channel, data in batch:
+                            pipe.publish(channel, data)
+                        await pipe.execute()
+                except Exception as e:
+                    logger.error(f"Failed to publish {len(batch)} messages: {str(e)}")
+            self._drained.set()
+
+    def subscribe(self, channel: str, callback: Handler) -> None:
+        """Subscribe to a channel; callback may be a plain function or a coroutine function"""
+        self.subscriptions[channel] = callback
+        self._on_loop(self._queue_command, 'subscribe', channel)
+
+    def psubscribe(self, pattern: str, callback: Handler) -> None:
+        self.pattern_subscriptions[pattern] = callback
+        self._on_loop(self._queue_command, 'psubscribe', pattern)
+
+    def unsubscribe(self, channel: str) -> None:
+        if self.subscriptions.pop(channel, None) is not None:
+            self._on_loop(self._queue_command, 'unsubscribe', channel)
+
+    def punsubscribe(self, pattern: str) -> None:
+        if self.pattern_subscriptions.pop(pattern, None) is not None:
+            self._on_loop(self._queue_command, 'punsubscribe', pattern)
+
+    def _queue_command(self, command: str, name: str) -> None:
+        self.commands.append((command, name))
+        if self._commands_ready is not None:
+            self._commands_ready.set()
+
+    async def _listen_loop(self) -> None:
+        while True:
+            try:
+                while self.commands:
+                    command, name = self.commands.popleft()
+                    await getattr(self.pubsub, command)(name)
+                self._commands_ready.clear()
+
+                if not self.pubsub.subscribed:
+                    # Nothing to read until someone subscribes
+                    await self._commands_ready.wait()
+                    continue
+
+                message = await self.pubsub.get_message(timeout=self.poll_interval)
+                if message is not None and message['type'] in ('message', 'pmessage'):
+                    await self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except aioredis.ConnectionError as e:
+                logger.warning(f"Async pub/sub listener lost its connection: {str(e)}")
+                await asyncio.sleep(1.0)
+            except Exception as e:
+                logger.error(f"Async pub/sub listener error: {str(e)}")
+
+    async def _dispatch(self, message: Dict[str, Any]) -> None:
+        if message['type'] == 'pmessage':
+            handler = self.pattern_subscriptions.get(self._decode(message['pattern']))
+        else:
+            handler = self.subscriptions.get(self._decode(message['channel']))
+        if handler is None:
+            return
+
+        try:
+            data = self.codec.decode(message['data'])
+            if self._is_echo(data):
+                return
+            result = handler(data)
+        except Exception as e:
+            logger.error(f"Handler for {self._decode(message['channel'])} failed: {str(e)}")
+            return
+        if inspect.isawaitable(result):
+            # Back-pressure: stop reading while too many handlers are running
+            await self._handler_slots.acquire()
+            task = asyncio.ensure_future(result)
+            self._handler_tasks.add(task)
+            task.add_done_callback(self._handler_done)
+
+    def _handler_done(self, task: asyncio.Future) -> None:
+        self._handler_tasks.discard(task)
+        self._handler_slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Async handler failed: {str(task.exception())}")
+
+    def _handle_context_message(self, message: Dict[str, Any]) -> None:
+        """Dispatch context-based messages to subscribers on the event loop"""
+        context = message.get('context')
+        for handler in self.context_routing.get(context, []) if context else []:
+            result = handler(message)
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(result)
+
+    def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    async def aclose(self) -> None:
+        """Send what's queued, then stop the background tasks and close connections"""
+        await self.flush()
+        self.close()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+        await self.redis.aclose()
@@ -0,0 +1,133 @@
+from typing import Any, Optional, Union
+import json
+import logging
+import threading
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json with the same bytes on the wire
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+Encoded = Union[str, bytes]
+
+WIRE_VERSION = 1
+
+# Second header byte: payload format in the low bits, compression in the high bit
+FORMAT_JSON = 0x01
+FORMAT_MSGPACK = 0x02
+FLAG_ZSTD = 0x80
+
+
+class MessageCodec:
+    """Serializes broker messages and shared-memory values
+
+    `format="json"` (the default) writes plain JSON text exactly like the
+    original broker, so it interoperates with processes that predate the
+    codec. "orjson" and "msgpack" write a two-byte header (WIRE_VERSION, then
+    the payload format and a zstd flag) followed by the payload; payloads of
+    at least `compress_threshold` bytes are zstd-compressed when zstandard
+    is installed.
+
+    decode() accepts every format regardless of how the codec is configured,
+    so a fleet can be rolled over in two steps: deploy everywhere with the
+    default, then switch `format`. orjson-framed payloads are ordinary JSON
+    and decode with the stdlib when orjson is missing; a missing msgpack or
+    zstandard makes the encoder fall back to framed JSON, uncompressed.
+    """
+
+    def __init__(self, format: str = "json", compress_threshold: Optional[int] = None,
+                 compress_level: int = 3):
+        if format not in ("json", "orjson", "msgpack"):
+            raise ValueError(f"Unknown codec format: {format}")
+        if format == "json" and compress_threshold is not None:
+            raise ValueError("Plain JSON is unframed and cannot be compressed; use 'orjson' or 'msgpack'")
+
+        if format == "msgpack" and msgpack is None:
+            logger.warning("msgpack is not installed; encoding messages as JSON instead")
+            format = "orjson"
+        if compress_threshold is not None and zstandard is None:
+            logger.warning("zstandard is not installed; messages will be sent uncompressed")
+            compress_threshold = None
+
+        self.format = format
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self._local = threading.local()  # zstd (de)compressors are not thread-safe
+
+    def encode(self, value: Any) -> Encoded:
+        if self.format == "json":
+            return json.dumps(value)
+
+        if self.format == "msgpack":
+            kind, payload = FORMAT_MSGPACK, msgpack.packb(value, use_bin_type=True)
+        else:
+            kind, payload = FORMAT_JSON, _dumps_json(value)
+
+        if self.compress_threshold is not None and len(payload) >= self.compress_threshold:
+            kind |= FLAG_ZSTD
+            payload = self._compressor().compress(payload)
+        return bytes((WIRE_VERSION, kind)) + payload
+
+    def decode(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, str):
+            return _loads_json(data)
+        data = bytes(data)
+        if not data or data[0] != WIRE_VERSION:
+            if data and data[0] < 0x20 and data[0] not in (0x09, 0x0a, 0x0d):
+                raise ValueError(f"Unsupported wire format version: {data[0]}")
+            return _loads_json(data)  # Unframed JSON from an older producer
+
+        kind = data[1]
+        payload = data[2:]
+        if kind & FLAG_ZSTD:
+            if zstandard is None:
+                raise ValueError("Received a zstd-compressed message but zstandard is not installed")
+            payload = self._decompressor().decompress(payload)
+            kind &= ~FLAG_ZSTD
+
+        if kind == FORMAT_JSON:
+            return _loads_json(payload)
+        if kind == FORMAT_MSGPACK:
+            if msgpack is None:
+                raise ValueError("Received a msgpack message but msgpack is not installed")
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        raise ValueError(f"Unknown payload format: {kind}")
+
+    def _compressor(self) -> Any:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.compress_level)
+        return compressor
+
+    def _decompressor(self) -> Any:
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+
+def _dumps_json(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _loads_json(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity, which stdlib json writes but orjson rejects
+    return json.loads(data)
@@ -0,0 +1,138 @@
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
+import fnmatch
+import time
+import uuid
+
+from .codec import MessageCodec
+from .message_broker import MessageBroker, Handler, ORIGIN_KEY
+
+
+class LocalMessageBroker(MessageBroker):
+    """MessageBroker that delivers to subscribers in this process without Redis
+
+    Publishes are handed straight to the handler pool, with the same
+    per-channel ordering as MessageBroker but no serialization, network
+    round-trip or listener thread. Every subscriber receives the same
+    message object, so handlers must treat messages as read-only.
+    route_message delivers to the context's subscribers directly.
+
+    With `remote` (a MessageBroker on Redis) the broker runs in hybrid mode.
+    Local subscribers are served in-process and are also subscribed on
+    Redis so other processes can reach them, and every publish is forwarded
+    to Redis except on channels matching a `local_only` glob pattern, which
+    never leave the process. Forwarded messages carry an `_origin` tag so the
+    remote broker can drop this process's own echoes; MessageBroker strips
+    the tag before calling handlers.
+    """
+
+    def __init__(self, remote: Optional[MessageBroker] = None, handler_workers: int = 10,
+                 max_pending: Optional[int] = None, local_only: Iterable[str] = (),
+                 codec: Optional[MessageCodec] = None):
+        super().__init__(handler_workers=handler_workers, max_pending=max_pending,
+                         codec=codec or (remote.codec if remote is not None else None))
+        self.redis = remote.redis if remote is not None else None
+        self.remote = remote
+        self.origin = uuid.uuid4().hex
+        self.local_only: Set[str] = set(local_only)
+        if remote is not None:
+            remote.origin = self.origin
+
+    def set_local_only(self, pattern: str, local_only: bool = True) -> None:
+        """Keep channels matching pattern in this process (or forward them again)"""
+        if local_only:
+            self.local_only.add(pattern)
+        else:
+            self.local_only.discard(pattern)
+
+    def _forwards(self, channel: str) -> bool:
+        if self.remote is None:
+            return False
+        return not any(fnmatch.fnmatchcase(channel, pattern) for pattern in self.local_only)
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Deliver to local subscribers, and to Redis unless the channel is local-only"""
+        self._deliver(channel, message)
+        if self._forwards(channel):
+            self.remote.publish(channel, {**message, ORIGIN_KEY: self.origin})
+
+    def publish_batch(self, channels: Iterable[str], message: Dict[str, Any]) -> None:
+        remote_channels = []
+        for channel in channels:
+            self._deliver(channel, message)
+            if self._forwards(channel):
+                remote_channels.append(channel)
+        if remote_channels:
+            self.remote.publish_batch(remote_channels, {**message, ORIGIN_KEY: self.origin})
+
+    def publish_many(self, messages: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        remote_messages = []
+        for channel, message in messages:
+            self._deliver(channel, message)
+            if self._forwards(channel):
+                remote_messages.append((channel, {**message, ORIGIN_KEY: self.origin}))
+        if remote_messages:
+            self.remote.publish_many(remote_messages)
+
+    def queue_system_message(self, pipe: Any, message_type: str, payload: Dict[str, Any]) -> bool:
+        """Local subscribers can't be reached through a Redis pipeline"""
+        return False
+
+    def _deliver(self, channel: str, message: Dict[str, Any]) -> None:
+        if channel in self.subscriptions:
+            self._enqueue_for(('channel', channel), None, message)
+        for pattern in list(self.pattern_subscriptions):
+            if fnmatch.fnmatchcase(channel, pattern):
+                self._enqueue_for(('pattern', pattern), None, message)
+
+    def _load(self, data: Any) -> Any:
+        return data  # Already a message object; nothing to decode
+
+    def subscribe(self, channel: str, callback: Handler) -> None:
+        self.subscriptions[channel] = callback
+        if self.remote is not None:
+            self.remote.subscribe(channel, lambda message: self._enqueue_for(('channel', channel), None, message))
+
+    def psubscribe(self, pattern: str, callback: Handler) -> None:
+        self.pattern_subscriptions[pattern] = callback
+        if self.remote is not None:
+            self.remote.psubscribe(pattern, lambda message: self._enqueue_for(('pattern', pattern), None, message))
+
+    def unsubscribe(self, channel: str) -> None:
+        if self.subscriptions.pop(channel, None) is not None and self.remote is not None:
+            self.remote.unsubscribe(channel)
+
+    def punsubscribe(self, pattern: str) -> None:
+        if self.pattern_subscriptions.pop(pattern, None) is not None and self.remote is not None:
+            self.remote.punsubscribe(pattern)
+
+    def route_message(self, sender_id: str, context: str, payload: Dict[str, Any]) -> None:
+        """Deliver to the context's subscribers in-process, in order per context
+
+        Receivers that are channel names (from an overridden
+        _evaluate_context) are published to `agent:{id}` as usual.
+        """
+        receivers = self._evaluate_context(context, payload)
+        message = {
+            'sender': sender_id,
+            'context': context,
+            'timestamp': time.time(),
+            'payload': payload
+        }
+        channels: List[str] = []
+        for receiver in receivers:
+            if callable(receiver):
+                self._enqueue_for(('context', context), receiver, message)
+            else:
+                channels.append(f"agent:{receiver}")
+        if channels:
+            self.publish_batch(channels, message)
+
+    def flush(self) -> None:
+        if self.remote is not None:
+            self.remote.flush()
+
+    def close(self) -> None:
+        """Stop the handler pool, and the remote broker in hybrid mode"""
+        if self.remote is not None:
+            self.remote.close()
+        self.executor.shutdown(wait=False)
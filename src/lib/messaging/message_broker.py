@@ -1,32 +1,293 @@
-from typing import Dict, Callable, Any
+from typing import Dict, List, Callable, Any, Optional, Set, Tuple, Iterable
+import logging
+import threading
+import time
+import zlib
+from collections import deque
 import redis
 from concurrent.futures import ThreadPoolExecutor
 
+from .codec import MessageCodec, Encoded
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], None]
+
+# Set by LocalMessageBroker's hybrid mode on messages it forwards to Redis
+ORIGIN_KEY = '_origin'
+
+
+def _same_server(pool: Any, other: Any) -> bool:
+    """Whether two redis-py connection pools reach the same server and database"""
+    if pool is other:
+        return True
+    return all(pool.connection_kwargs.get(name) == other.connection_kwargs.get(name)
+               for name in ('host', 'port', 'path', 'db'))
+
+
+class _PubSubListener:
+    """One pub/sub connection and thread serving a shard of the broker's channels
+
+    redis-py PubSub objects are not thread-safe, so (un)subscribe requests
+    are queued and applied by the listener thread between reads.
+    """
+
+    def __init__(self, broker: 'MessageBroker', index: int):
+        self.broker = broker
+        self.index = index
+        self.pubsub = broker.redis.pubsub(ignore_subscribe_messages=True)
+        self.commands: deque = deque()  # (pubsub method name, channel or pattern)
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self._lock = threading.Lock()
+
+    def request(self, command: str, name: str) -> None:
+        self.commands.append((command, name))
+        with self._lock:
+            if self.thread is None:
+                self.running = True
+                self.thread = threading.Thread(target=self._run, daemon=True,
+                                               name=f"message-broker-listener-{self.index}")
+                self.thread.start()
+
+    def _run(self) -> None:
+        while self.running:
+            try:
+                while self.commands:
+                    # Peek, and pop only once applied: a command that hits a dropped
+                    # connection stays at the head and is retried after reconnecting
+                    command, name = self.commands[0]
+                    try:
+                        getattr(self.pubsub, command)(name)
+                    except redis.ConnectionError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Pub/sub listener {self.index} failed to {command} {name}: {str(e)}")
+                    self.commands.popleft()
+                message = self.pubsub.get_message(timeout=self.broker.poll_interval)
+                if message is not None and message['type'] in ('message', 'pmessage'):
+                    self.broker._enqueue(message)
+            except redis.ConnectionError as e:
+                # redis-py resubscribes everything when the connection comes back
+                logger.warning(f"Pub/sub listener {self.index} lost its connection: {str(e)}")
+                time.sleep(1.0)
+            except Exception as e:
+                logger.error(f"Pub/sub listener {self.index} error: {str(e)}")
+
+    def stop(self) -> None:
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=self.broker.poll_interval + 1.0)
+        self.pubsub.close()
+
+
 class MessageBroker:
-    def __init__(self, host: str = 'localhost', port: int = 6379):
+    """Redis pub/sub broker for agents and personas
+
+    All channel and pattern subscriptions share a small fixed set of
+    listener connections (channels are sharded across `listeners`), and
+    handlers run on a bounded worker pool, so thousands of subscriptions cost
+    no extra threads or connections. Messages for the same channel (or
+    pattern) are handled in order; at most `max_pending` received messages
+    wait for a worker before the listeners stop reading.
+
+    Fan-outs are serialized once and sent in one pipeline. With `linger` > 0,
+    publishes are buffered for up to that many seconds (or until `max_batch`
+    messages are waiting) and bursts such as task status updates go out in a
+    single round-trip; call flush() to send immediately.
+
+    Messages are serialized by `codec` (plain JSON unless configured
+    otherwise; see MessageCodec).
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, listeners: int = 1,
+                 handler_workers: int = 10, max_pending: Optional[int] = 10000, poll_interval: float = 0.1,
+                 linger: float = 0.0, max_batch: int = 500, codec: Optional[MessageCodec] = None):
         self.redis = redis.Redis(host=host, port=port)
-        self.executor = ThreadPoolExecutor(max_workers=10)
-        self.subscriptions: Dict[str, Callable[[Dict[str, Any]], None]] = {}
-        self.context_routing: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self.codec = codec or MessageCodec()
+        self.origin: Optional[str] = None  # Drop messages tagged with this origin (our own echoes)
+        self.executor = ThreadPoolExecutor(max_workers=handler_workers)
+        self.subscriptions: Dict[str, Handler] = {}
+        self.pattern_subscriptions: Dict[str, Handler] = {}
+        self.context_routing: Dict[str, List[Handler]] = {}
+        self.listener_count = listeners
+        self.poll_interval = poll_interval
+        self.listeners: List[_PubSubListener] = []
+        self._listeners_lock = threading.Lock()
+
+        # Per-channel queues drained in order by the worker pool
+        self._pending = threading.BoundedSemaphore(max_pending) if max_pending else None
+        self._queues: Dict[Tuple[str, str], deque] = {}  # (handler override or None, data)
+        self._scheduled: Set[Tuple[str, str]] = set()
+        self._dispatch_lock = threading.Lock()
+
+        # Outgoing buffer used when linger > 0
+        self.linger = linger
+        self.max_batch = max_batch
+        self._outbox: List[Tuple[str, Encoded]] = []
+        self._outbox_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
 
     def publish(self, channel: str, message: Dict[str, Any]) -> None:
         """Publish a message to a specific channel"""
-        self.redis.publish(channel, json.dumps(message))
+        data = self.codec.encode(message)
+        if self.linger > 0:
+            self._buffer([(channel, data)])
+        else:
+            self.redis.publish(channel, data)
+
+    def publish_batch(self, channels: Iterable[str], message: Dict[str, Any]) -> None:
+        """Publish one message to many channels, serializing it once"""
+        data = self.codec.encode(message)
+        self._publish_encoded([(channel, data) for channel in channels])
+
+    def publish_many(self, messages: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Publish (channel, message) pairs in one round-trip"""
+        self._publish_encoded([(channel, self.codec.encode(message)) for channel, message in messages])
+
+    def _publish_encoded(self, batch: List[Tuple[str, Encoded]]) -> None:
+        if self.linger > 0:
+            self._buffer(batch)
+        else:
+            with self._send_lock:
+                self._send(batch)
 
-    def subscribe(self, channel: str, callback: Callable[[Dict[str, Any]], None]) -> None:
+    def _buffer(self, batch: List[Tuple[str, Encoded]]) -> None:
+        with self._outbox_lock:
+            self._outbox.extend(batch)
+            full = len(self._outbox) >= self.max_batch
+            if not full and self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.linger, self._flush_quietly)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send everything buffered by the linger window now"""
+        with self._send_lock:
+            with self._outbox_lock:
+                batch, self._outbox = self._outbox, []
+                timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                timer.cancel()
+            self._send(batch)
+
+    def _flush_quietly(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush buffered messages: {str(e)}")
+
+    def _send(self, batch: List[Tuple[str, Encoded]]) -> None:
+        """Publish encoded messages: a single PUBLISH, or one pipeline for several"""
+        if not batch:
+            return
+        if len(batch) == 1:
+            self.redis.publish(*batch[0])
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for channel, data in batch:
+            pipe.publish(channel, data)
+        pipe.execute()
+
+    def subscribe(self, channel: str, callback: Handler) -> None:
         """Subscribe to a channel with a callback handler"""
         self.subscriptions[channel] = callback
-        self.executor.submit(self._listen, channel)
-
-    def _listen(self, channel: str) -> None:
-        """Internal method to continuously listen on a channel"""
-        pubsub = self.redis.pubsub()
-        pubsub.subscribe(channel)
-        for message in pubsub.listen():
-            if message['type'] == 'message':
-                data = json.loads(message['data'])
-                if channel in self.subscriptions:
-                    self.subscriptions[channel](data)
+        self._listener_for(channel).request('subscribe', channel)
+
+    def psubscribe(self, pattern: str, callback: Handler) -> None:
+        """Subscribe to every channel matching a glob-style pattern (e.g. "agent:*")"""
+        self.pattern_subscriptions[pattern] = callback
+        self._listener_for(pattern).request('psubscribe', pattern)
+
+    def unsubscribe(self, channel: str) -> None:
+        if self.subscriptions.pop(channel, None) is not None:
+            self._listener_for(channel).request('unsubscribe', channel)
+
+    def punsubscribe(self, pattern: str) -> None:
+        if self.pattern_subscriptions.pop(pattern, None) is not None:
+            self._listener_for(pattern).request('punsubscribe', pattern)
+
+    def _listener_for(self, name: str) -> _PubSubListener:
+        with self._listeners_lock:
+            if not self.listeners:
+                self.listeners = [_PubSubListener(self, i) for i in range(self.listener_count)]
+        return self.listeners[zlib.crc32(name.encode('utf-8')) % len(self.listeners)]
+
+    @staticmethod
+    def _decode(value: Any) -> Any:
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def _enqueue(self, message: Dict[str, Any]) -> None:
+        """Queue a received message for its channel's handler (called by listener threads)"""
+        if message['type'] == 'pmessage':
+            key = ('pattern', self._decode(message['pattern']))
+        else:
+            key = ('channel', self._decode(message['channel']))
+
+        self._enqueue_for(key, None, message['data'])
+
+    def _enqueue_for(self, key: Tuple[str, str], handler: Optional[Handler], data: Any) -> None:
+        """Queue data for key's subscriber, or for `handler` when given"""
+        if self._pending is not None:
+            self._pending.acquire()  # Back-pressure: blocks the caller while workers catch up
+        with self._dispatch_lock:
+            self._queues.setdefault(key, deque()).append((handler, data))
+            if key in self._scheduled:
+                return
+            self._scheduled.add(key)
+        self.executor.submit(self._drain, key)
+
+    def _drain(self, key: Tuple[str, str], batch: int = 64) -> None:
+        """Run a channel's handler over its queued messages, in arrival order"""
+        kind, name = key
+        handlers = self.pattern_subscriptions if kind == 'pattern' else self.subscriptions
+        for _ in range(batch):
+            with self._dispatch_lock:
+                queue = self._queues.get(key)
+                if not queue:
+                    break
+                handler, data = queue.popleft()
+            if self._pending is not None:
+                self._pending.release()
+
+            handler = handler or handlers.get(name)
+            if handler is None:
+                continue
+            try:
+                message = self._load(data)
+                if self._is_echo(message):
+                    continue
+                handler(message)
+            except Exception as e:
+                logger.error(f"Handler for {kind} {name} failed: {str(e)}")
+
+        with self._dispatch_lock:
+            if self._queues.get(key):
+                # Yield the worker to other channels, then carry on
+                self.executor.submit(self._drain, key)
+                return
+            self._queues.pop(key, None)
+            self._scheduled.discard(key)
+
+    def _load(self, data: Any) -> Any:
+        return self.codec.decode(data)
+
+    def _is_echo(self, message: Any) -> bool:
+        """Strip the hybrid-mode origin tag; True if the message came from this broker's own process"""
+        if isinstance(message, dict) and ORIGIN_KEY in message:
+            origin = message.pop(ORIGIN_KEY)
+            return self.origin is not None and origin == self.origin
+        return False
+
+    def close(self) -> None:
+        """Send buffered messages, then stop the listeners and the handler pool"""
+        self._flush_quietly()
+        for listener in self.listeners:
+            listener.stop()
+        self.executor.shutdown(wait=False)
 
     def route_message(self, sender_id: str, context: str, payload: Dict[str, Any]) -> None:
         """Route messages based on task context"""
@@ -37,11 +298,10 @@ class MessageBroker:
             'timestamp': time.time(),
             'payload': payload
         }
-        for receiver_id in receivers:
-            channel = f"agent:{receiver_id}"
-            self.publish(channel, message)
+        if receivers:
+            self.publish_batch([f"agent:{receiver_id}" for receiver_id in receivers], message)
 
-    def subscribe_to_context(self, context: str, callback: Callable[[Dict[str, Any]], None]) -> None:
+    def subscribe_to_context(self, context: str, callback: Handler) -> None:
         """Subscribe to messages matching specific context"""
         if context not in self.context_routing:
             self.context_routing[context] = []
@@ -62,8 +322,24 @@ class MessageBroker:
 
     def broadcast_system_message(self, message_type: str, payload: Dict[str, Any]) -> None:
         """Broadcast system-wide notifications"""
-        self.publish('system:notifications', {
+        self.publish('system:notifications', self._system_message(message_type, payload))
+
+    def queue_system_message(self, pipe: Any, message_type: str, payload: Dict[str, Any]) -> bool:
+        """Add a system notification's PUBLISH to a caller's Redis pipeline
+
+        Lets a write and its notification share one round-trip. Returns False,
+        queuing nothing, if the pipeline is on another Redis server or this
+        broker buffers publishes; broadcast_system_message is needed then.
+        """
+        if self.linger > 0 or not _same_server(pipe.connection_pool, self.redis.connection_pool):
+            return False
+        pipe.publish('system:notifications', self.codec.encode(self._system_message(message_type, payload)))
+        return True
+
+    @staticmethod
+    def _system_message(message_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             'type': message_type,
             'payload': payload,
             'timestamp': time.time()
-        })
\ No newline at end of file
+        }
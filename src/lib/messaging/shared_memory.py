@@ -1,48 +1,252 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+from contextlib import contextmanager
+from enum import Enum
+import time
+import uuid
 import redis
-from redlock import Redlock
+from redlock import Redlock, CannotObtainLock
+from .codec import MessageCodec
 from .message_broker import MessageBroker
 
+# KEYS: value key, version key. ARGV: encoded value, expected version
+_CAS_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+if tonumber(ARGV[2]) ~= current then
+    return {0, current}
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[2], current + 1)
+return {1, current + 1}
+"""
+
+# KEYS: value key, lock key. ARGV: encoded value, lease token, lease ttl (ms)
+_LEASE_WRITE_SCRIPT = """
+if redis.call('GET', KEYS[2]) ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('PEXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+# KEYS: lock key. ARGV: lease token
+_LEASE_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class WriteMode(Enum):
+    """How SharedMemoryManager.write guards a key against concurrent writers"""
+    LOCKED = "locked"                # Redlock around every write (several round-trips)
+    SINGLE_WRITER = "single_writer"  # Plain SET; for keys only one process ever writes
+    CAS = "cas"                      # Versioned compare-and-set in one Lua call
+    LEASE = "lease"                  # Hold a renewable lease on hot keys; one Lua call per write
+
+
+class VersionConflictError(Exception):
+    """Raised when a CAS write finds the key at a different version than expected"""
+
+    def __init__(self, key: str, expected: int, actual: int):
+        self.key = key
+        self.expected = expected
+        self.actual = actual
+        super().__init__(f"Shared memory key {key} is at version {actual}, expected {expected}")
+
+
 class SharedMemoryManager:
-    def __init__(self, broker: MessageBroker, namespace: str = 'global'):
+    """Redis-backed key/value memory shared between processes
+
+    write() takes a WriteMode (default_mode unless overridden per call):
+    LOCKED takes a Redlock per write; SINGLE_WRITER is a single SET, for
+    write-once keys such as per-request results, pipelined with its
+    memory_update broadcast when the broker publishes on the same Redis; CAS checks and bumps a
+    version stored next to the value, raising VersionConflictError on a
+    lost race (see update() for a retry loop); LEASE keeps a lock on the
+    key for lease_ttl ms, renewed by every write, so repeated writes from
+    the owning process cost one round-trip. A key should always be written
+    with the same mode.
+    """
+
+    def __init__(self, broker: MessageBroker, namespace: str = 'global', codec: Optional[MessageCodec] = None,
+                 default_mode: WriteMode = WriteMode.LOCKED, lease_ttl: int = 30000):
         self.redis = redis.Redis()
         self.redlock = Redlock([{'host': 'localhost', 'port': 6379}])
         self.broker = broker
+        # Values are stored with the broker's codec unless told otherwise
+        self.codec = codec or getattr(broker, 'codec', None) or MessageCodec()
         self.namespace = namespace
+        self.default_mode = default_mode
+        self.lease_ttl = lease_ttl
         self.local_cache: Dict[str, Any] = {}
+        self.versions: Dict[str, int] = {}  # Last version seen per CAS key
+        self.leases: Dict[str, str] = {}    # key -> lease token
+        self._cas_script = self.redis.register_script(_CAS_SCRIPT)
+        self._lease_write_script = self.redis.register_script(_LEASE_WRITE_SCRIPT)
+        self._lease_release_script = self.redis.register_script(_LEASE_RELEASE_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return f'{self.namespace}:{key}'
 
-    def write(self, key: str, value: Any, sync: bool = True) -> None:
-        """Write to shared memory with optional synchronization"""
-        with self.acquire_lock(f'{self.namespace}:{key}'):
+    def write(self, key: str, value: Any, sync: bool = True, mode: Optional[WriteMode] = None,
+              expected_version: Optional[int] = None, ttl: Optional[float] = None,
+              cache: bool = True) -> Optional[int]:
+        """Write to shared memory with optional synchronization
+
+        Returns the key's new version for CAS writes. expected_version
+        defaults to the version last read or written by this manager, or 0
+        (the key must not exist yet) if there is none. ttl (seconds) expires
+        LOCKED and SINGLE_WRITER keys; cache=False skips local_cache, for
+        keys that are rarely read back by the writer.
+        """
+        mode = mode or self.default_mode
+        if ttl is not None and mode in (WriteMode.CAS, WriteMode.LEASE):
+            raise ValueError(f"ttl is not supported for {mode.value} writes")
+        data = self.codec.encode(value)
+        expiry = int(ttl * 1000) if ttl else None
+        version = None
+
+        if mode is WriteMode.SINGLE_WRITER and sync:
+            # The SET and its memory_update PUBLISH share a round-trip when the broker allows
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(self._key(key), data, px=expiry)
+            sync = not self.broker.queue_system_message(pipe, 'memory_update', self._update_payload(key, value))
+            pipe.execute()
+        elif mode is WriteMode.SINGLE_WRITER:
+            self.redis.set(self._key(key), data, px=expiry)
+        elif mode is WriteMode.CAS:
+            version = self._write_cas(key, data, expected_version)
+        elif mode is WriteMode.LEASE:
+            self._write_leased(key, data)
+        else:
+            with self._locked(key):
+                self.redis.set(self._key(key), data, px=expiry)
+
+        if cache:
             self.local_cache[key] = value
-            self.redis.set(f'{self.namespace}:{key}', json.dumps(value))
-            if sync:
-                self.sync(key)
+        if sync:
+            self._broadcast(key, value)
+        return version
+
+    def _write_cas(self, key: str, data: Any, expected_version: Optional[int]) -> int:
+        if expected_version is None:
+            expected_version = self.versions.get(key, 0)
+        written, version = self._cas_script(keys=[self._key(key), f'{self._key(key)}:version'],
+                                            args=[data, expected_version], client=self.redis)
+        self.versions[key] = int(version)
+        if not written:
+            raise VersionConflictError(key, expected_version, int(version))
+        return int(version)
 
-    def read(self, key: str) -> Any:
-        """Read from shared memory with local cache check"""
-        if key in self.local_cache:
+    def _write_leased(self, key: str, data: Any) -> None:
+        keys = [self._key(key), f'{self._key(key)}:lock']
+        token = self.leases.get(key)
+        if token is not None and self._lease_write_script(keys=keys, args=[data, token, self.lease_ttl],
+                                                          client=self.redis):
+            return
+        # No lease yet, or it expired and someone else may have written since
+        token = self._acquire_lease(key)
+        if not self._lease_write_script(keys=keys, args=[data, token, self.lease_ttl], client=self.redis):
+            self.leases.pop(key, None)
+            raise CannotObtainLock(f"Lost the lease on {self._key(key)} before writing")
+
+    def _acquire_lease(self, key: str) -> str:
+        self.leases.pop(key, None)
+        token = uuid.uuid4().hex
+        for attempt in range(self.redlock.retry_count):
+            if self.redis.set(f'{self._key(key)}:lock', token, nx=True, px=self.lease_ttl):
+                self.leases[key] = token
+                return token
+            time.sleep(self.redlock.retry_delay)
+        raise CannotObtainLock(f"Could not lease {self._key(key)}")
+
+    def release_lease(self, key: str) -> None:
+        """Give up a lease so other writers can take the key"""
+        token = self.leases.pop(key, None)
+        if token is not None:
+            self._lease_release_script(keys=[f'{self._key(key)}:lock'], args=[token], client=self.redis)
+
+    def release_leases(self) -> None:
+        for key in list(self.leases):
+            self.release_lease(key)
+
+    def read(self, key: str, cache: bool = True) -> Any:
+        """Read from shared memory with local cache check
+
+        cache=False always goes to Redis and leaves local_cache untouched.
+        """
+        if cache and key in self.local_cache:
             return self.local_cache[key]
-        
-        value = self.redis.get(f'{self.namespace}:{key}')
+
+        value = self.redis.get(self._key(key))
+        if not value:
+            return self.local_cache.get(key) if cache else None
+        value = self.codec.decode(value)
+        if cache:
+            self.local_cache[key] = value
+        return value
+
+    def delete(self, key: str) -> None:
+        """Remove a key from Redis and the local cache"""
+        self.redis.delete(self._key(key))
+        self.local_cache.pop(key, None)
+
+    def read_versioned(self, key: str) -> Tuple[Any, int]:
+        """Read a CAS key and its version from Redis in one round-trip"""
+        value, version = self.redis.mget(self._key(key), f'{self._key(key)}:version')
+        version = int(version or 0)
+        self.versions[key] = version
         if value:
-            self.local_cache[key] = json.loads(value)
-        return self.local_cache.get(key)
+            value = self.codec.decode(value)
+            self.local_cache[key] = value
+        return value, version
+
+    def update(self, key: str, fn: Callable[[Any], Any], sync: bool = True, retries: int = 10) -> Any:
+        """Apply fn to a contended key's current value with optimistic CAS, retrying on conflicts
+
+        Raises the last attempt's VersionConflictError once retries run out.
+        """
+        conflict = None
+        for attempt in range(max(1, retries)):
+            current, version = self.read_versioned(key)
+            value = fn(current)
+            try:
+                self.write(key, value, sync=sync, mode=WriteMode.CAS, expected_version=version)
+                return value
+            except VersionConflictError as e:
+                conflict = e
+        raise conflict
 
     def acquire_lock(self, resource: str, ttl: int = 3000) -> Any:
         """Distributed lock acquisition for concurrent access"""
         return self.redlock.lock(resource, ttl)
 
+    @contextmanager
+    def _locked(self, key: str, ttl: int = 3000) -> Iterator[None]:
+        # Lock a sibling key: Redlock's SET NX must not collide with the value itself
+        lock = self.acquire_lock(f'{self._key(key)}:lock', ttl)
+        if not lock:
+            raise CannotObtainLock(f"Could not lock {self._key(key)}")
+        try:
+            yield
+        finally:
+            self.redlock.unlock(lock)
+
     def sync(self, key: str) -> None:
         """Broadcast memory updates through the message broker"""
-        self.broker.broadcast_system_message(
-            'memory_update',
-            {
-                'namespace': self.namespace,
-                'key': key,
-                'value': self.local_cache[key]
-            }
-        )
+        self._broadcast(key, self.local_cache[key])
+
+    def _broadcast(self, key: str, value: Any) -> None:
+        self.broker.broadcast_system_message('memory_update', self._update_payload(key, value))
+
+    def _update_payload(self, key: str, value: Any) -> Dict[str, Any]:
+        return {
+            'namespace': self.namespace,
+            'key': key,
+            'value': value
+        }
 
     def register_handler(self, context: str = 'memory_update') -> None:
         """Register callback for memory synchronization events"""
@@ -51,4 +255,4 @@ class SharedMemoryManager:
     def _handle_memory_update(self, message: Dict[str, Any]) -> None:
         """Update local cache from broadcasted memory changes"""
         if message['payload']['namespace'] == self.namespace:
-            self.local_cache[message['payload']['key']] = message['payload']['value']
\ No newline at end of file
+            self.local_cache[message['payload']['key']] = message['payload']['value']
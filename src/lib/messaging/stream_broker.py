@@ -0,0 +1,240 @@
+from typing import Dict, List, Any, Optional, Set, Tuple
+from functools import partial
+import logging
+import os
+import socket
+import threading
+import time
+import redis
+
+from .message_broker import MessageBroker, Handler
+
+logger = logging.getLogger(__name__)
+
+
+class _AckBatch:
+    """Entries of one stream from one read, acknowledged together once all have run"""
+
+    def __init__(self, stream: str, entry_ids: List[Any]):
+        self.stream = stream
+        self.entry_ids = entry_ids
+        self.remaining = len(entry_ids)
+        self.handled: List[Any] = []
+
+
+class StreamMessageBroker(MessageBroker):
+    """MessageBroker whose route_message delivers through Redis Streams consumer groups
+
+    Each agent channel `agent:{id}` is a stream capped at roughly `maxlen`
+    entries. Every process that calls consume_agent(id, handler) joins the
+    stream's consumer group, so one agent's traffic can be spread across
+    worker processes, and a message is only acknowledged after its handler
+    returns. Messages a consumer took but never acknowledged (it crashed or
+    was restarted) are reclaimed by another consumer once they have been
+    idle for reclaim_idle_ms; after max_deliveries attempts they are moved
+    to `{stream}:dead`. Within a process, each stream's entries are handled
+    in order on the worker pool (different streams run in parallel), and
+    the entries from one read are acknowledged with a single XACK once their
+    handlers have all run. Delivery is
+    at-least-once, so handlers should be idempotent. Pub/sub (subscribe,
+    broadcast_system_message) is unchanged.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, group: str = 'agents',
+                 consumer: Optional[str] = None, maxlen: int = 10000, batch_size: int = 100,
+                 block_ms: int = 1000, reclaim_idle_ms: int = 60000, reclaim_interval: float = 30.0,
+                 max_deliveries: int = 5, **kwargs: Any):
+        super().__init__(host, port, **kwargs)
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.maxlen = maxlen
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.reclaim_idle_ms = reclaim_idle_ms
+        self.reclaim_interval = reclaim_interval
+        self.max_deliveries = max_deliveries
+        self.consumers: Dict[str, Handler] = {}  # stream -> handler
+        self.stats_counters: Dict[str, int] = {
+            "delivered": 0, "acked": 0, "failed": 0, "reclaimed": 0, "dead_lettered": 0
+        }
+        self._groups: Set[str] = set()
+        self._inflight: Set[Tuple[str, Any]] = set()  # (stream, entry id) queued or running here
+        self._consumer_thread: Optional[threading.Thread] = None
+        self._consuming = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def agent_stream(agent_id: str) -> str:
+        return f"agent:{agent_id}"
+
+    def route_message(self, sender_id: str, context: str, payload: Dict[str, Any]) -> None:
+        """Append the message to each receiver's stream in one pipelined round-trip"""
+        receivers = self._evaluate_context(context, payload)
+        if not receivers:
+            return
+        data = self.codec.encode({
+            'sender': sender_id,
+            'context': context,
+            'timestamp': time.time(),
+            'payload': payload
+        })
+        pipe = self.redis.pipeline(transaction=False)
+        for receiver_id in receivers:
+            pipe.xadd(self.agent_stream(receiver_id), {'data': data}, maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+
+    def consume(self, stream: str, callback: Handler) -> None:
+        """Join the stream's consumer group and handle its messages"""
+        self._ensure_group(stream)
+        self.consumers[stream] = callback
+        with self._lock:
+            if self._consumer_thread is None:
+                self._consuming = True
+                self._consumer_thread = threading.Thread(target=self._consume_loop, daemon=True,
+                                                         name="message-broker-streams")
+                self._consumer_thread.start()
+
+    def consume_agent(self, agent_id: str, callback: Handler) -> None:
+        self.consume(self.agent_stream(agent_id), callback)
+
+    def stop_consuming(self, stream: str) -> None:
+        """Stop reading a stream; entries already taken stay pending for reclaim"""
+        self.consumers.pop(stream, None)
+
+    def _ensure_group(self, stream: str) -> None:
+        if stream in self._groups:
+            return
+        try:
+            # From id 0 so messages routed before the first consumer started are delivered
+            self.redis.xgroup_create(stream, self.group, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._groups.add(stream)
+
+    def _consume_loop(self) -> None:
+        last_reclaim = 0.0
+        while self._consuming:
+            try:
+                if time.monotonic() - last_reclaim >= self.reclaim_interval:
+                    last_reclaim = time.monotonic()
+                    self._reclaim()
+
+                streams = {stream: '>' for stream in list(self.consumers)}
+                if not streams:
+                    time.sleep(self.block_ms / 1000)
+                    continue
+                response = self.redis.xreadgroup(self.group, self.consumer, streams,
+                                                 count=self.batch_size, block=self.block_ms)
+                for stream, entries in response or []:
+                    self._handle(self._decode(stream), entries)
+            except redis.ResponseError as e:
+                if 'NOGROUP' in str(e):
+                    # Stream was deleted; recreate the groups on the next read
+                    self._groups.clear()
+                    for stream in list(self.consumers):
+                        self._ensure_group(stream)
+                else:
+                    logger.error(f"Stream consumer error: {str(e)}")
+                    time.sleep(1.0)
+            except redis.ConnectionError as e:
+                logger.warning(f"Stream consumer lost its connection: {str(e)}")
+                time.sleep(1.0)
+            except Exception as e:
+                logger.error(f"Stream consumer error: {str(e)}")
+                time.sleep(1.0)
+
+    def _handle(self, stream: str, entries: List[Tuple[Any, Dict[Any, Any]]]) -> None:
+        """Queue entries behind the stream's earlier ones; they run in order and are acked as a batch"""
+        queued = []
+        for entry_id, fields in entries:
+            try:
+                message = self.codec.decode(fields.get(b'data', fields.get('data')))
+            except Exception as e:
+                # Left pending; dead-lettered once it runs out of deliveries
+                self.stats_counters["failed"] += 1
+                logger.error(f"Undecodable entry {self._decode(entry_id)} on stream {stream}: {str(e)}")
+                continue
+            with self._lock:
+                if (stream, entry_id) in self._inflight:
+                    continue
+                self._inflight.add((stream, entry_id))
+            queued.append((entry_id, message))
+        if not queued:
+            return
+
+        self.stats_counters["delivered"] += len(queued)
+        batch = _AckBatch(stream, [entry_id for entry_id, _ in queued])
+        for entry_id, message in queued:
+            # Same per-key ordered drain as pub/sub channels, with the entry's handling as the handler
+            self._enqueue_for(('stream', stream), partial(self._handle_entry, batch, entry_id), message)
+
+    def _handle_entry(self, batch: _AckBatch, entry_id: Any, message: Dict[str, Any]) -> None:
+        try:
+            handler = self.consumers.get(batch.stream)
+            if handler is None:
+                return  # Stopped consuming; left pending for reclaim
+            try:
+                handler(message)
+            except Exception as e:
+                # Left pending; reclaimed and retried after reclaim_idle_ms
+                self.stats_counters["failed"] += 1
+                logger.error(f"Handler for stream {batch.stream} failed on {self._decode(entry_id)}: {str(e)}")
+                return
+            batch.handled.append(entry_id)
+        finally:
+            # A stream's entries run one at a time, so the batch needs no lock
+            batch.remaining -= 1
+            if batch.remaining == 0:
+                self._ack(batch)
+
+    def _ack(self, batch: _AckBatch) -> None:
+        try:
+            if batch.handled:
+                self.redis.xack(batch.stream, self.group, *batch.handled)
+                self.stats_counters["acked"] += len(batch.handled)
+        finally:
+            # Handled entries stay in flight until acked, so reclaim can't re-run them
+            with self._lock:
+                self._inflight.difference_update((batch.stream, entry_id) for entry_id in batch.entry_ids)
+
+    def _load(self, data: Any) -> Any:
+        # Stream entries are decoded by _handle before they are queued
+        return data if isinstance(data, dict) else super()._load(data)
+
+    def _reclaim(self) -> None:
+        """Take over entries other consumers left unacknowledged for too long"""
+        for stream in list(self.consumers):
+            pending = self.redis.xpending_range(stream, self.group, min='-', max='+',
+                                                count=self.batch_size, idle=self.reclaim_idle_ms)
+            if not pending:
+                continue
+            with self._lock:
+                # Entries still queued here look idle to Redis but are not abandoned
+                pending = [p for p in pending if (stream, p['message_id']) not in self._inflight]
+            retry = [p['message_id'] for p in pending if p['times_delivered'] < self.max_deliveries]
+            dead = [p['message_id'] for p in pending if p['times_delivered'] >= self.max_deliveries]
+
+            if dead:
+                entries = self.redis.xclaim(stream, self.group, self.consumer, self.reclaim_idle_ms, dead)
+                pipe = self.redis.pipeline(transaction=False)
+                for entry_id, fields in entries:
+                    pipe.xadd(f"{stream}:dead", fields, maxlen=self.maxlen, approximate=True)
+                pipe.xack(stream, self.group, *dead)
+                pipe.execute()
+                self.stats_counters["dead_lettered"] += len(entries)
+                logger.warning(f"Moved {len(entries)} undeliverable messages to {stream}:dead")
+
+            if retry:
+                entries = self.redis.xclaim(stream, self.group, self.consumer, self.reclaim_idle_ms, retry)
+                self.stats_counters["reclaimed"] += len(entries)
+                self._handle(stream, entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.stats_counters, "streams": len(self.consumers)}
+
+    def close(self) -> None:
+        self._consuming = False
+        if self._consumer_thread is not None:
+            self._consumer_thread.join(timeout=self.block_ms / 1000 + 1.0)
+        super().close()
@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional, Any, Union
 import logging
 from ..llm.persona_llm_manager import PersonaLLMManager, LLMConfig, PersonaTraits, LLMProvider
+from ..llm.provider_pool import ProviderClientPool, get_default_client_pool
 from ...lib.messaging.message_broker import MessageBroker
 from ...lib.messaging.shared_memory import SharedMemoryManager
 
@@ -20,7 +21,8 @@ class EnhancedAIPersona:
                  tone: Optional[str] = None,
                  emotion: Optional[str] = None,
                  knowledge_areas: List[str] = None,
-                 competence_maps: Dict[str, List[str]] = None):
+                 competence_maps: Dict[str, List[str]] = None,
+                 client_pool: Optional[ProviderClientPool] = None):
         
         self.persona_id = persona_id
         self.name = name
@@ -37,8 +39,9 @@ class EnhancedAIPersona:
         self.broker = MessageBroker()
         self.memory = SharedMemoryManager(self.broker, f"persona:{self.persona_id}")
         
-        # Initialize LLM manager
+        # Initialize LLM manager and the shared provider client pool
         self.llm_manager = PersonaLLMManager()
+        self.client_pool = client_pool or get_default_client_pool()
         
         # Load or create LLM configuration
         self._initialize_llm_config()
@@ -150,15 +153,6 @@ class EnhancedAIPersona:
     def _generate_openai_response(self, prompt: str, system_message: Optional[str] = None) -> str:
         """Generate response using OpenAI"""
         try:
-            import openai
-            
-            # Set API key
-            openai.api_key = self.llm_config.api_key
-            
-            # Set custom endpoint if provided
-            if self.llm_config.endpoint:
-                openai.api_base = self.llm_config.endpoint
-            
             # Prepare messages
             messages = []
             
@@ -178,12 +172,13 @@ class EnhancedAIPersona:
             # Add user message
             messages.append({"role": "user", "content": prompt})
             
-            # Generate response
-            response = openai.ChatCompletion.create(
-                model=self.llm_config.model_name,
-                messages=messages,
-                **self.llm_config.parameters
-            )
+            # Generate response on the pooled client for this key/endpoint
+            with self.client_pool.acquire_sync(self.llm_config) as client:
+                response = client.chat.completions.create(
+                    model=self.llm_config.model_name,
+                    messages=messages,
+                    **self.llm_config.parameters
+                )
             
             return response.choices[0].message.content
         except Exception as e:
@@ -193,11 +188,6 @@ class EnhancedAIPersona:
     def _generate_anthropic_response(self, prompt: str, system_message: Optional[str] = None) -> str:
         """Generate response using Anthropic"""
         try:
-            import anthropic
-            
-            # Initialize client
-            client = anthropic.Anthropic(api_key=self.llm_config.api_key)
-            
             # Prepare system prompt
             if not system_message:
                 system_message = f"You are {self.name}, {self.title}."
@@ -206,15 +196,16 @@ class EnhancedAIPersona:
                 if self.tone:
                     system_message += f" Use a {self.tone} tone."
             
-            # Generate response
-            response = client.messages.create(
-                model=self.llm_config.model_name,
-                system=system_message,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                **self.llm_config.parameters
-            )
+            # Generate response on the pooled client for this key/endpoint
+            with self.client_pool.acquire_sync(self.llm_config) as client:
+                response = client.messages.create(
+                    model=self.llm_config.model_name,
+                    system=system_message,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    **self.llm_config.parameters
+                )
             
             return response.content[0].text
         except Exception as e:
@@ -2,6 +2,7 @@ from typing import Dict, Any, List, Optional
 import logging
 from .enhanced_ai_persona import EnhancedAIPersona
 from ..llm.persona_llm_manager import LLMProvider
+from ..messaging.shared_memory import WriteMode
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -109,7 +110,7 @@ class RyotaVarella(EnhancedAIPersona):
         
         if context == 'symbolic_processing' and payload.get('type') == 'compress':
             compressed = self.apply_optimizations(payload['content'])
-            self.memory.write(f'compressed:{payload["request_id"]}', compressed)
+            self.memory.write(f'compressed:{payload["request_id"]}', compressed, mode=WriteMode.SINGLE_WRITER)
             self.broadcast_message('compression_result', {
                 'request_id': payload['request_id'],
                 'compressed_content': compressed
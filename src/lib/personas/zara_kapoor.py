@@ -2,6 +2,7 @@ from typing import Dict, Any, List, Optional
 import logging
 from .enhanced_ai_persona import EnhancedAIPersona
 from ..llm.persona_llm_manager import LLMProvider
+from ..messaging.shared_memory import WriteMode
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -92,7 +93,7 @@ class ZaraKapoor(EnhancedAIPersona):
         
         if context == 'content_optimization' and payload.get('type') == 'collaborative_edit':
             optimized = self.apply_optimizations(payload['content'])
-            self.memory.write(f'optimized:{payload["request_id"]}', optimized)
+            self.memory.write(f'optimized:{payload["request_id"]}', optimized, mode=WriteMode.SINGLE_WRITER)
             self.broadcast_message('optimization_result', {
                 'request_id': payload['request_id'],
                 'optimized_content': optimized
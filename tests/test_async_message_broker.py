@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import unittest
+from src.lib.messaging.async_message_broker import AsyncMessageBroker
+
+class _FakeAsyncPubSub:
+    def __init__(self, server):
+        self.server = server
+        self.channels = set()
+        self.inbox = asyncio.Queue()
+
+    @property
+    def subscribed(self):
+        return bool(self.channels)
+
+    async def subscribe(self, channel):
+        self.channels.add(channel)
+
+    async def get_message(self, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        pass
+
+class _FakePipeline:
+    def __init__(self, server):
+        self.server, self.calls = server, []
+
+    def publish(self, channel, data):
+        self.calls.append((channel, data))
+
+    async def execute(self):
+        self.server.round_trips += 1
+        return [self.server.deliver(*call) for call in self.calls]
+
+class _FakeAsyncRedis:
+    """Just enough of redis.asyncio.Redis to exercise the broker"""
+    def __init__(self):
+        self.pubsubs, self.round_trips = [], 0
+
+    def pubsub(self, **kwargs):
+        self.pubsubs.append(_FakeAsyncPubSub(self))
+        return self.pubsubs[-1]
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    async def publish(self, channel, data):
+        self.round_trips += 1
+        return self.deliver(channel, data)
+
+    def deliver(self, channel, data):
+        targets = [p for p in self.pubsubs if channel in p.channels]
+        for pubsub in targets:
+            pubsub.inbox.put_nowait({'type': 'message', 'channel': channel.encode(), 'data': data})
+        return len(targets)
+
+    async def aclose(self):
+        pass
+
+class TestAsyncMessageBroker(unittest.TestCase):
+    def test_handlers_run_on_loop_and_publishes_are_pipelined(self):
+        async def run():
+            broker = AsyncMessageBroker(poll_interval=0.01)
+            broker.redis = _FakeAsyncRedis()
+            loop = asyncio.get_running_loop()
+            received, threads = [], set()
+
+            async def on_update(message):
+                threads.add(threading.get_ident())
+                asyncio.get_running_loop()  # Would raise off the loop
+                received.append(message['payload']['seq'])
+
+            broker.subscribe("system:notifications", on_update)
+            await asyncio.sleep(0.02)
+            for seq in range(20):
+                broker.broadcast_system_message("task_status_update", {"seq": seq})
+            # Publishing from a worker thread is handed to the loop
+            await loop.run_in_executor(None, broker.publish, "system:notifications", {"payload": {"seq": 20}})
+            await broker.flush()
+            async def all_received():
+                while len(received) < 21:
+                    await asyncio.sleep(0.01)
+
+            await asyncio.wait_for(all_received(), 5)
+            round_trips = broker.redis.round_trips
+            await broker.aclose()
+            return received, threads, round_trips
+
+        received, threads, round_trips = asyncio.run(run())
+        self.assertEqual(received, list(range(21)))
+        self.assertEqual(threads, {threading.get_ident()})
+        self.assertLessEqual(round_trips, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+from src.lib.llm.beam_chat import BeamChat
+from src.lib.llm.beam_request_queue import BeamRequestQueue, QueuedBeamRequest
+from src.lib.llm.mock_provider import MockModelSpec, MockProviderClientPool
+from src.lib.llm.persona_llm_manager import LLMConfig, LLMProvider
+from src.lib.messaging.local_broker import LocalMessageBroker
+
+def _request(request_id, prompt="plan the launch", strategy="auto_select"):
+    return QueuedBeamRequest(request_id=request_id, prompt=prompt, options={'strategy': strategy})
+
+class TestBeamRequestQueue(unittest.TestCase):
+    def test_coalesces_compatible_requests(self):
+        batches, rejected = [], []
+
+        async def process(batch):
+            batches.append(sorted(batch.request_ids))
+
+        async def run():
+            queue = BeamRequestQueue(process, lambda r, reason: rejected.append(r), coalesce_window=0.02)
+            queue.submit(_request("a"))
+            queue.submit(_request("b"))
+            queue.submit(_request("c", strategy="checklist"))  # Same fan-out, fused differently
+            queue.submit(_request("d", prompt="something else"))
+            await asyncio.sleep(0.1)
+            await queue.stop()
+            return queue.get_metrics()
+
+        metrics = asyncio.run(run())
+        self.assertEqual(sorted(batches), [["a", "b", "c"], ["d"]])
+        self.assertEqual(metrics["coalesced"], 2)
+        self.assertEqual(rejected, [])
+
+    def test_rejects_when_full(self):
+        release = None
+        rejected = []
+
+        async def process(batch):
+            await release.wait()
+
+        async def run():
+            nonlocal release
+            release = asyncio.Event()
+            queue = BeamRequestQueue(process, lambda r, reason: rejected.append((r.request_id, reason)),
+                                     max_size=1, workers=1, coalesce_window=0.0)
+            queue.submit(_request("running", prompt="p1"))
+            while queue.in_flight == 0:
+                await asyncio.sleep(0.001)
+            queue.submit(_request("queued", prompt="p2"))
+            queue.submit(_request("overflow", prompt="p3"))
+            release.set()
+            await asyncio.sleep(0.01)
+            await queue.stop()
+            return queue.get_metrics()
+
+        metrics = asyncio.run(run())
+        self.assertEqual(rejected, [("overflow", "BeamChat request queue is full")])
+        self.assertEqual(metrics["processed"], 2)
+        self.assertEqual(metrics["rejected"], 1)
+
+    def test_submit_from_a_thread_without_a_loop(self):
+        processed = threading.Event()
+
+        async def process(batch):
+            processed.set()
+
+        queue = BeamRequestQueue(process, Mock(), coalesce_window=0.0)
+        queue.submit(_request("a"))
+        self.assertTrue(processed.wait(5.0))
+        asyncio.run(queue.stop())
+        self.assertFalse(queue.running)
+
+class TestBeamChatBrokerPath(unittest.TestCase):
+    def test_broker_request_is_processed(self):
+        broker = LocalMessageBroker()
+        self.addCleanup(broker.close)
+        pool = MockProviderClientPool(default_spec=MockModelSpec(latency_mean=0.001, latency_stddev=0.0))
+        beam_chat = BeamChat(broker, client_pool=pool)
+        beam_chat.memory.redis = Mock()
+        for name, provider in (("a", LLMProvider.OPENAI), ("b", LLMProvider.ANTHROPIC)):
+            beam_chat.register_model(name, LLMConfig(provider=provider, model_name=name, api_key=f"mock-{name}"))
+
+        notifications = []
+        broker.subscribe("system:notifications", notifications.append)
+        broker.route_message("client", "beam_chat_request", {"request_id": "r1", "prompt": "plan the launch"})
+
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline and not any(n['type'] == 'beam_chat_result' for n in notifications):
+            time.sleep(0.01)
+        types = [n['type'] for n in notifications]
+        self.assertIn('beam_chat_result', types)
+        self.assertNotIn('beam_chat_error', types)
+        asyncio.run(beam_chat.stop())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import unittest
+from unittest import mock
+from src.lib.messaging import codec as codec_module
+from src.lib.messaging.codec import MessageCodec, WIRE_VERSION
+
+MESSAGE = {
+    'sender': 'planner',
+    'context': 'memory_update',
+    'payload': {'key': 'draft', 'value': 'lorem ipsum ' * 200, 'scores': [0.5, 1, None, True]}
+}
+
+class TestMessageCodec(unittest.TestCase):
+    def test_default_is_plain_json(self):
+        codec = MessageCodec()
+        encoded = codec.encode(MESSAGE)
+        self.assertEqual(encoded, json.dumps(MESSAGE))
+        self.assertEqual(codec.decode(encoded.encode()), MESSAGE)
+
+    def test_framed_json_round_trip_and_reads_legacy(self):
+        codec = MessageCodec("orjson")
+        encoded = codec.encode(MESSAGE)
+        self.assertEqual(encoded[0], WIRE_VERSION)
+        self.assertEqual(codec.decode(encoded), MESSAGE)
+        # Consumers on the new codec still read producers that haven't rolled over
+        self.assertEqual(codec.decode(json.dumps(MESSAGE).encode()), MESSAGE)
+        self.assertEqual(MessageCodec().decode(encoded), MESSAGE)
+
+    def test_framed_json_without_orjson(self):
+        encoded = MessageCodec("orjson").encode(MESSAGE)
+        with mock.patch.object(codec_module, "orjson", None):
+            self.assertEqual(MessageCodec().decode(encoded), MESSAGE)
+            self.assertEqual(MessageCodec().decode(MessageCodec("orjson").encode(MESSAGE)), MESSAGE)
+
+    @unittest.skipUnless(codec_module.msgpack is not None, "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        codec = MessageCodec("msgpack")
+        self.assertEqual(codec.decode(codec.encode(MESSAGE)), MESSAGE)
+
+    @unittest.skipUnless(codec_module.zstandard is not None, "zstandard is not installed")
+    def test_compresses_above_threshold(self):
+        codec = MessageCodec("orjson", compress_threshold=1024)
+        small, large = {'n': 1}, MESSAGE
+        self.assertLess(len(codec.encode(large)), len(MessageCodec("orjson").encode(large)))
+        self.assertEqual(codec.encode(small), MessageCodec("orjson").encode(small))
+        self.assertEqual(MessageCodec().decode(codec.encode(large)), large)
+
+    def test_missing_optional_libraries_fall_back(self):
+        with mock.patch.object(codec_module, "msgpack", None), \
+                mock.patch.object(codec_module, "zstandard", None):
+            codec = MessageCodec("msgpack", compress_threshold=16)
+            self.assertEqual(codec.format, "orjson")
+            self.assertIsNone(codec.compress_threshold)
+            self.assertEqual(codec.decode(codec.encode(MESSAGE)), MESSAGE)
+
+    def test_rejects_unknown_versions(self):
+        with self.assertRaises(ValueError):
+            MessageCodec().decode(bytes((WIRE_VERSION + 1, 1)) + b'{}')
+        with self.assertRaises(ValueError):
+            MessageCodec("json", compress_threshold=10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, Mock
+from src.lib.llm.beam_chat import FusionStrategy, FusionResult
+from src.lib.llm.collaboration_cache import CollaborationCache
+from src.lib.llm.hierarchical_agent_system import HierarchicalAgentSystem
+from src.lib.messaging.message_broker import MessageBroker
+
+class _LocalBroker(MessageBroker):
+    def publish(self, channel, message):
+        pass
+
+class TestCollaborationCache(unittest.TestCase):
+    def setUp(self):
+        self.system = HierarchicalAgentSystem(_LocalBroker())
+        async def generate_responses(**kwargs):
+            await asyncio.sleep(0.01)
+            return ["response"]
+
+        self.system.beam_chat.generate_responses = AsyncMock(side_effect=generate_responses)
+        self.system.beam_chat.fuse_responses = AsyncMock(
+            side_effect=lambda responses, strategy: FusionResult("fused plan", [], strategy, 0.8))
+
+    def test_identical_subtasks_reuse_result(self):
+        first = self.system.create_task("Draft a launch plan", assigned_to="lead")
+        second = self.system.create_task("Draft a launch plan", assigned_to="lead")
+        opted_out = self.system.create_task("Draft a launch plan", assigned_to="lead", metadata={"memoize": False})
+
+        async def run():
+            await self.system.collaborate_on_task(first, ["b", "a"], FusionStrategy.CHECKLIST)
+            await self.system.collaborate_on_task(second, ["a", "b"], FusionStrategy.CHECKLIST)
+            await self.system.collaborate_on_task(opted_out, ["a", "b"], FusionStrategy.CHECKLIST)
+
+        asyncio.run(run())
+        self.assertEqual(self.system.beam_chat.generate_responses.await_count, 2)
+        self.assertEqual(self.system.tasks[second].status, "completed")
+        self.assertEqual(self.system.tasks[second].result, "fused plan")
+
+    def test_concurrent_identical_collaborations_share_one_run(self):
+        tasks = [self.system.create_task("Audit the pricing page", assigned_to="lead") for _ in range(5)]
+
+        async def run():
+            return await asyncio.gather(*(self.system.collaborate_on_task(t, ["a", "b"]) for t in tasks))
+
+        results = asyncio.run(run())
+        self.assertEqual(self.system.beam_chat.generate_responses.await_count, 1)
+        self.assertTrue(all(r.content == "fused plan" for r in results))
+        self.assertEqual(self.system.collaboration_cache.stats()["coalesced"], 4)
+
+    def test_invalidation(self):
+        cache = CollaborationCache()
+        result = FusionResult("plan", [], FusionStrategy.ENSEMBLE)
+        cache.set(cache.make_key("Plan", ["a", "b"], FusionStrategy.ENSEMBLE), result, ["a", "b"])
+        cache.set(cache.make_key("Review", ["c"], FusionStrategy.ENSEMBLE), result, ["c"])
+
+        self.assertEqual(cache.invalidate_agent("a"), 1)
+        self.assertIsNone(cache.get(cache.make_key("Plan", ["a", "b"], FusionStrategy.ENSEMBLE)))
+        self.assertEqual(cache.invalidate("Review", ["c"], FusionStrategy.ENSEMBLE), 1)
+        with self.assertRaises(ValueError):
+            cache.invalidate("Review")
+
+    def test_redis_tier_goes_through_the_memory_manager(self):
+        memory = Mock()
+        cache = CollaborationCache(ttl=60, memory=memory)
+        key = cache.make_key("Plan", ["a", "b"], FusionStrategy.ENSEMBLE)
+        cache.set(key, FusionResult("plan", [], FusionStrategy.ENSEMBLE, 0.7), ["b", "a"])
+        remote_key, value = memory.write.call_args.args
+        self.assertEqual(remote_key, f"collaboration_cache:{key}")
+        self.assertEqual(value["agent_ids"], ["a", "b"])
+        self.assertEqual(memory.write.call_args.kwargs["ttl"], 60)
+        self.assertFalse(memory.write.call_args.kwargs["cache"])
+
+        memory.read.return_value = value
+        other = CollaborationCache(memory=memory)
+        self.assertEqual(other.get(key).content, "plan")
+        self.assertEqual(other.stats()["remote_hits"], 1)
+        other.invalidate("Plan", ["a", "b"], FusionStrategy.ENSEMBLE)
+        memory.delete.assert_called_once_with(f"collaboration_cache:{key}")
+
+if __name__ == '__main__':
+    unittest.main()
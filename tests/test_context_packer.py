@@ -0,0 +1,55 @@
+import unittest
+from src.lib.llm.context_packer import ContextPacker
+from src.lib.llm.persona_llm_manager import LLMConfig, LLMProvider
+
+class TestContextPacker(unittest.TestCase):
+    def setUp(self):
+        self.packer = ContextPacker(context_windows={"tiny": 120})
+        self.prompt = "\n\n".join([
+            "Instruction: summarise the findings below.",
+            "Background. " * 40,
+            "Details. " * 40,
+            "Question: what should we do next?",
+        ])
+
+    def test_short_prompt_unchanged_and_unknown_model_unlimited(self):
+        config = LLMConfig(provider=LLMProvider.OPENAI, model_name="local-model")
+        packed = self.packer.pack_for_model(self.prompt, config)
+        self.assertEqual(packed.text, self.prompt)
+        self.assertIsNone(packed.budget)
+
+    def test_packs_within_budget_keeping_instruction_and_question(self):
+        config = LLMConfig(provider=LLMProvider.OPENAI, model_name="tiny-1",
+                           parameters={"max_tokens": 20})
+        packed = self.packer.pack_for_model(self.prompt, config)
+        self.assertTrue(packed.truncated)
+        self.assertLessEqual(packed.packed_tokens, 100)
+        self.assertTrue(packed.text.startswith("Instruction:"))
+        self.assertIn("Question: what should we do next?", packed.text)
+        self.assertIn("omitted", packed.text)
+
+    def test_packing_is_shared_across_models_with_same_budget(self):
+        first = LLMConfig(provider=LLMProvider.OPENAI, model_name="tiny-a", parameters={"max_tokens": 20})
+        second = LLMConfig(provider=LLMProvider.ANTHROPIC, model_name="tiny-b", parameters={"max_tokens": 20})
+        a = self.packer.pack_for_model(self.prompt, first)
+        b = self.packer.pack_for_model(self.prompt, second)
+        self.assertIs(a, b)
+        stats = self.packer.stats()
+        self.assertEqual(stats["packed"], 1)
+        self.assertEqual(stats["pack_hits"], 1)
+
+    def test_context_window_uses_longest_prefix(self):
+        windows = {name: self.packer.context_window(LLMConfig(provider=LLMProvider.OPENAI, model_name=name))
+                   for name in ("gpt-4-0613", "gpt-4-32k-0613", "gpt-4o-mini-2024-07-18", "claude-3-haiku")}
+        self.assertEqual(windows, {"gpt-4-0613": 8192, "gpt-4-32k-0613": 32768,
+                                   "gpt-4o-mini-2024-07-18": 128000, "claude-3-haiku": 200000})
+
+    def test_budget_too_small_for_the_markers_is_an_error(self):
+        config = LLMConfig(provider=LLMProvider.OPENAI, model_name="tiny-1", parameters={"max_tokens": 115})
+        with self.assertRaises(ValueError):
+            self.packer.pack_for_model(self.prompt, config)
+        # A prompt that already fits needs no markers
+        self.assertEqual(self.packer.pack("ok", 1).text, "ok")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import random
+import string
+import timeit
+import unittest
+from src.lib.llm.fusion_scoring import FusionScorer, hash_tokens
+
+class TestFusionScorer(unittest.TestCase):
+    def test_agreement_favours_consensus(self):
+        scorer = FusionScorer(weights={"confidence": 0, "length": 0, "prior": 0})
+        result = scorer.score([
+            "Paris is the capital of France.",
+            "The capital of France is Paris.",
+            "Bananas are yellow and rich in potassium.",
+        ])
+        self.assertLess(result.features["agreement"][2], result.features["agreement"][0])
+        self.assertNotEqual(result.best_index, 2)
+
+    def test_checklist_coverage_and_priors(self):
+        scorer = FusionScorer(checklist=["security", "latency"])
+        result = scorer.score(
+            ["Covers security and latency budgets.", "Covers security only."],
+            confidences=[0.5, 0.5],
+            priors=[None, 0.5]
+        )
+        self.assertEqual(list(result.features["checklist"]), [1.0, 0.5])
+        self.assertEqual(result.best_index, 0)
+        self.assertAlmostEqual(float(result.weights().sum()), 1.0)
+
+    def test_unknown_feature_weight_rejected(self):
+        with self.assertRaises(ValueError):
+            FusionScorer(weights={"novelty": 1.0})
+
+    def test_hashed_tokens_match_tokenize(self):
+        texts = ["Café au lait, s'il vous plaît!", "CAFÉ\u00a0au\u2003lait\tplaît", "", "x"]
+        hashes, counts = hash_tokens(texts)
+        tokens = [t for text in texts for t in FusionScorer.tokenize(text)]
+        self.assertEqual(list(counts), [len(FusionScorer.tokenize(text)) for text in texts])
+        ids = {}
+        for token, token_hash in zip(tokens, hashes.tolist()):
+            self.assertEqual(ids.setdefault(token, token_hash), token_hash)
+        self.assertEqual(len(set(ids.values())), len(ids))
+
+    def test_scores_many_candidates_quickly(self):
+        rng = random.Random(0)
+        vocabulary = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(3000)]
+        # 24 responses of ~400 words, with some shared vocabulary
+        contents = [" ".join(rng.choices(vocabulary[:1500 + 50 * i], k=400)) + "." for i in range(24)]
+        scorer = FusionScorer(checklist=["cost", "risk"])
+
+        def best_time(fn):
+            return min(timeit.repeat(fn, number=10, repeat=5)) / 10
+
+        scoring = best_time(lambda: scorer.score(contents))
+        # Relative to merely splitting the responses into words in Python, so slow
+        # machines don't flake; hashing each token in Python cost over 4x this
+        splitting = best_time(lambda: [FusionScorer.tokenize(c) for c in contents])
+        self.assertEqual(len(scorer.score(contents).scores), 24)
+        self.assertLess(scoring, 3 * splitting)
+
+if __name__ == '__main__':
+    unittest.main()
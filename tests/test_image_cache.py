@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from src.lib.llm.image_cache import EncodedImageCache, detect_media_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+class TestEncodedImageCache(unittest.TestCase):
+    def test_bytes_and_paths_share_entries(self):
+        cache = EncodedImageCache()
+        first = cache.get_or_encode(PNG)
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
+            f.write(PNG)
+        try:
+            from_path = cache.get_or_encode(f.name)
+            again = cache.get_or_encode(f.name)
+        finally:
+            os.unlink(f.name)
+        self.assertIs(first, from_path)
+        self.assertIs(from_path, again)
+        self.assertEqual(first.media_type, "image/png")
+        self.assertTrue(first.data_url.startswith("data:image/png;base64,"))
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    def test_lru_eviction_by_bytes(self):
+        images = [bytes([i]) * 300 for i in range(3)]
+        cache = EncodedImageCache(max_bytes=900)  # Two 400-byte base64 payloads fit
+        a = cache.get_or_encode(images[0])
+        cache.get_or_encode(images[1])
+        cache.get_or_encode(images[0])  # Touch a so b is least recently used
+        cache.get_or_encode(images[2])
+        self.assertIn(a.content_hash, cache.entries)
+        self.assertEqual(len(cache.entries), 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.total_bytes, 900)
+
+    def test_detect_media_type(self):
+        self.assertEqual(detect_media_type(b"\xff\xd8\xff\xe0"), "image/jpeg")
+        self.assertEqual(detect_media_type(b"RIFF\x00\x00\x00\x00WEBPVP8 "), "image/webp")
+        self.assertEqual(detect_media_type(b"unknown"), "image/jpeg")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import base64
+import io
+import unittest
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from src.lib.llm.image_cache import EncodedImageCache
+from src.lib.llm.image_preprocessing import ImagePreprocessor, ImageSpec
+
+def _png(width, height, alpha=255):
+    output = io.BytesIO()
+    Image.new("RGBA", (width, height), (200, 30, 30, alpha)).save(output, format="PNG")
+    return output.getvalue()
+
+class TestImagePreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.cache = EncodedImageCache()
+        self.preprocessor = ImagePreprocessor(executor=ThreadPoolExecutor(max_workers=2), image_cache=self.cache)
+
+    def tearDown(self):
+        self.preprocessor.shutdown()
+
+    def test_downscales_and_recompresses(self):
+        encoded = asyncio.run(self.preprocessor.prepare(_png(3000, 1000), ImageSpec(max_resolution=512, format="JPEG")))
+        self.assertEqual(encoded.media_type, "image/jpeg")
+        with Image.open(io.BytesIO(base64.b64decode(encoded.data))) as image:
+            self.assertEqual(image.size, (512, 171))
+
+    def test_downscaled_png_keeps_alpha_by_default(self):
+        encoded = asyncio.run(self.preprocessor.prepare(_png(3000, 1000, alpha=128), ImageSpec(max_resolution=512)))
+        self.assertEqual(encoded.media_type, "image/png")
+        with Image.open(io.BytesIO(base64.b64decode(encoded.data))) as image:
+            self.assertEqual(image.size, (512, 171))
+            self.assertEqual(image.mode, "RGBA")
+            self.assertEqual(image.getpixel((10, 10))[3], 128)
+
+    def test_specs_cached_separately_and_reused(self):
+        data = _png(800, 600)
+
+        async def run():
+            small = await self.preprocessor.prepare(data, ImageSpec(max_resolution=256))
+            again = await self.preprocessor.prepare(data, ImageSpec(max_resolution=256))
+            webp = await self.preprocessor.prepare(data, ImageSpec(max_resolution=256, format="WEBP"))
+            return small, again, webp
+
+        small, again, webp = asyncio.run(run())
+        self.assertIs(small, again)
+        self.assertEqual(webp.media_type, "image/webp")
+        self.assertEqual(small.content_hash, webp.content_hash)
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+    def test_undecodable_bytes_pass_through(self):
+        encoded = asyncio.run(self.preprocessor.prepare(b"not an image", ImageSpec(max_resolution=64)))
+        self.assertEqual(base64.b64decode(encoded.data), b"not an image")
+
+    def test_spec_from_model_config(self):
+        config = SimpleNamespace(model_id="magma-8b-edge", vision_resolution=512)
+        self.assertEqual(ImageSpec.from_model_config(config, format="WEBP"),
+                         ImageSpec(max_resolution=512, format="WEBP"))
+
+if __name__ == '__main__':
+    unittest.main()
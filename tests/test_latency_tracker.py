@@ -0,0 +1,30 @@
+import unittest
+from src.lib.llm.latency_tracker import LatencyTracker
+
+class TestLatencyTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = LatencyTracker(window_size=100, min_samples=5)
+
+    def test_not_enough_samples(self):
+        for latency in (0.1, 0.2, 0.3):
+            self.tracker.record("gpt-4", latency)
+        self.assertIsNone(self.tracker.p95("gpt-4"))
+        self.assertIsNone(self.tracker.p95("unknown"))
+
+    def test_percentiles(self):
+        for i in range(1, 101):
+            self.tracker.record("gpt-4", i / 100.0)
+        self.assertAlmostEqual(self.tracker.p50("gpt-4"), 0.50)
+        self.assertAlmostEqual(self.tracker.p95("gpt-4"), 0.95)
+        self.assertAlmostEqual(self.tracker.p99("gpt-4"), 0.99)
+
+    def test_rolling_window(self):
+        for _ in range(100):
+            self.tracker.record("claude", 5.0)
+        for _ in range(100):
+            self.tracker.record("claude", 1.0)
+        self.assertEqual(self.tracker.p99("claude"), 1.0)
+        self.assertEqual(self.tracker.snapshot()["claude"]["samples"], 100)
+
+if __name__ == '__main__':
+    unittest.main()
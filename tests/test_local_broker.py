@@ -0,0 +1,145 @@
+import fnmatch
+import queue
+import threading
+import time
+import unittest
+from src.lib.llm.hierarchical_agent_system import HierarchicalAgentSystem
+from src.lib.messaging.local_broker import LocalMessageBroker
+from src.lib.messaging.message_broker import MessageBroker
+
+class _FakePubSub:
+    def __init__(self):
+        self.channels, self.patterns = set(), set()
+        self.inbox = queue.Queue()
+
+    def subscribe(self, channel):
+        self.channels.add(channel)
+
+    def psubscribe(self, pattern):
+        self.patterns.add(pattern)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        pass
+
+class _FakeRedisServer:
+    """Pub/sub shared by several simulated processes"""
+    def __init__(self):
+        self.pubsubs = []
+        self.published = []
+
+    def pubsub(self, **kwargs):
+        pubsub = _FakePubSub()
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    def publish(self, channel, data):
+        self.published.append(channel)
+        for pubsub in self.pubsubs:
+            if channel in pubsub.channels:
+                pubsub.inbox.put({'type': 'message', 'channel': channel.encode(), 'data': data})
+            for pattern in pubsub.patterns:
+                if fnmatch.fnmatchcase(channel, pattern):
+                    pubsub.inbox.put({'type': 'pmessage', 'pattern': pattern.encode(),
+                                      'channel': channel.encode(), 'data': data})
+
+
+class TestLocalMessageBroker(unittest.TestCase):
+    def _wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def _hybrid(self, server, **kwargs):
+        remote = MessageBroker(poll_interval=0.01)
+        remote.redis = server
+        broker = LocalMessageBroker(remote=remote, **kwargs)
+        self.addCleanup(broker.close)
+        return broker
+
+    def test_delivers_in_process_and_in_order(self):
+        broker = LocalMessageBroker(handler_workers=4)
+        self.addCleanup(broker.close)
+        self.assertIsNone(broker.redis)
+        received, patterns = [], []
+        broker.subscribe("agent:a", lambda m: received.append(m['seq']))
+        broker.psubscribe("agent:*", lambda m: patterns.append(m['seq']))
+        for seq in range(100):
+            broker.publish("agent:a", {'seq': seq})
+        self._wait_for(lambda: len(received) == 100 and len(patterns) == 100)
+        self.assertEqual(received, list(range(100)))
+        self.assertEqual(patterns, list(range(100)))
+
+    def test_route_message_reaches_context_subscribers(self):
+        broker = LocalMessageBroker()
+        self.addCleanup(broker.close)
+        received = []
+        broker.subscribe_to_context("agent_task_ready", received.append)
+        broker.route_message("system", "agent_task_ready", {"task_id": "t1"})
+        self._wait_for(lambda: len(received) == 1)
+        self.assertEqual(received[0]['payload'], {"task_id": "t1"})
+        self.assertEqual(received[0]['sender'], "system")
+
+    def test_agent_system_runs_without_redis(self):
+        broker = LocalMessageBroker()
+        self.addCleanup(broker.close)
+        system = HierarchicalAgentSystem(broker)
+        created = []
+        broker.subscribe_to_context("agent_task_created", created.append)
+        broker.route_message("client", "agent_task_request", {
+            "description": "Draft the outline", "assigned_to": "unassigned"
+        })
+        self._wait_for(lambda: len(created) == 1)
+        self.assertIn(created[0]['payload']['task_id'], system.tasks)
+
+    def test_hybrid_forwards_everything_except_local_only_channels(self):
+        server = _FakeRedisServer()
+        here = self._hybrid(server, local_only=["internal:*"])
+        there = self._hybrid(server)
+        local, remote = [], []
+        here.subscribe("internal:metrics", local.append)
+        there.subscribe("agent:remote", remote.append)
+        time.sleep(0.05)  # Let the listeners apply the subscriptions
+
+        here.publish("internal:metrics", {'n': 1})
+        self._wait_for(lambda: local == [{'n': 1}])
+        here.publish("agent:remote", {'n': 2})
+        self._wait_for(lambda: remote == [{'n': 2}])
+        self.assertEqual(server.published, ["agent:remote"])
+
+    def test_hybrid_brokers_sharing_a_pattern(self):
+        server = _FakeRedisServer()
+        here, there = self._hybrid(server), self._hybrid(server)
+        received = {'here': [], 'there': []}
+        here.psubscribe("agent:*", received['here'].append)
+        there.psubscribe("agent:*", received['there'].append)
+        time.sleep(0.05)
+
+        here.publish("agent:a", {'n': 1})
+        there.publish("agent:b", {'n': 2})
+        self._wait_for(lambda: len(received['here']) == 2 and len(received['there']) == 2)
+        time.sleep(0.05)  # Echoes would show up as extra copies
+        self.assertEqual(sorted(m['n'] for m in received['here']), [1, 2])
+        self.assertEqual(sorted(m['n'] for m in received['there']), [1, 2])
+
+    def test_plain_subscribers_never_see_the_origin_tag(self):
+        server = _FakeRedisServer()
+        here = self._hybrid(server)
+        plain = MessageBroker(poll_interval=0.01)
+        plain.redis = server
+        self.addCleanup(plain.close)
+        received = []
+        plain.subscribe("agent:plain", received.append)
+        time.sleep(0.05)
+
+        here.publish("agent:plain", {'n': 1})
+        self._wait_for(lambda: received == [{'n': 1}])
+
+if __name__ == '__main__':
+    unittest.main()
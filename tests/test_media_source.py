@@ -0,0 +1,102 @@
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from src.lib.llm.media_source import MediaSource, Base64Field, StreamingJSONBody, DEFAULT_CHUNK_SIZE
+from src.lib.llm.multimodal_beam import ModalityType, MultiModalBeam, MultiModalContent, MultiModalPrompt
+from src.lib.llm.persona_llm_manager import LLMConfig, LLMProvider
+from src.lib.llm.provider_pool import ProviderClientPool
+from src.lib.messaging.local_broker import LocalMessageBroker
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+class TestMediaSource(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".wav")
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(12 * 1024 * 1024 + 7))
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_streamed_body_matches_json_encoding(self):
+        with MediaSource.from_path(self.path) as source:
+            self.assertEqual(source.media_type, "audio/x-wav")
+            self.assertEqual(source.format, "wav")
+            body = StreamingJSONBody({
+                "model": "gpt-4o-audio-preview",
+                "messages": [{"role": "user", "content": [
+                    {"type": "input_audio", "input_audio": {"data": Base64Field(source), "format": "wav"}}
+                ]}]
+            }, chunk_size=3 * 1024)
+            raw = b"".join(body)
+            self.assertEqual(len(raw), body.content_length)
+            decoded = json.loads(raw)
+            data = decoded["messages"][0]["content"][0]["input_audio"]["data"]
+            with open(self.path, "rb") as f:
+                self.assertEqual(base64.b64decode(data), f.read())
+
+    def test_streaming_never_holds_full_copy(self):
+        with MediaSource.from_path(self.path) as source:
+            body = StreamingJSONBody({"data": Base64Field(source, prefix="data:audio/wav;base64,")})
+            tracemalloc.start()
+            total = sum(len(chunk) for chunk in body)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.assertEqual(total, body.content_length)
+        # A few base64 chunks at most, never a copy of the 12 MB file
+        self.assertLess(peak, 4 * DEFAULT_CHUNK_SIZE)
+
+    def test_buffer_source_is_zero_copy(self):
+        data = bytearray(b"abcdef")
+        source = MediaSource.from_buffer(data, "audio/mpeg")
+        data[0:1] = b"z"
+        self.assertEqual(bytes(next(source.iter_chunks())), b"zbcdef")
+        self.assertEqual(source.format, "mp3")
+        with self.assertRaises(ValueError):
+            list(source.iter_base64(chunk_size=4))
+
+class _MockHTTPPool(ProviderClientPool):
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+
+    def _create_http_client(self, config):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+@unittest.skipUnless(httpx is not None, "httpx is not installed")
+class TestStreamedMediaRequest(unittest.TestCase):
+    def test_audio_body_streams_through_async_client(self):
+        audio = os.urandom(100 * 1024 + 1)
+        sent = {}
+
+        async def handler(request):
+            sent["length"] = request.headers["Content-Length"]
+            sent["body"] = json.loads(await request.aread())
+            return httpx.Response(200, json={"choices": [{"message": {"content": "heard it"}}]})
+
+        broker = LocalMessageBroker()
+        self.addCleanup(broker.close)
+        beam = MultiModalBeam(broker, client_pool=_MockHTTPPool(handler))
+        config = LLMConfig(provider=LLMProvider.OPENAI, model_name="gpt-4o-audio-preview", api_key="key")
+        beam.register_vision_model("audio", config)
+        prompt = MultiModalPrompt(elements=[
+            MultiModalContent(ModalityType.TEXT, "transcribe this"),
+            MultiModalContent(ModalityType.AUDIO, audio, {"media_type": "audio/wav"}),
+        ])
+
+        response = asyncio.run(beam._process_openai_media("audio", config, prompt, {}))
+        self.assertEqual(response.content, "heard it")
+        part = sent["body"]["messages"][0]["content"][1]["input_audio"]
+        self.assertEqual(base64.b64decode(part["data"]), audio)
+        self.assertEqual(part["format"], "wav")
+        self.assertEqual(int(sent["length"]), len(json.dumps(sent["body"], separators=(",", ":"))))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import fnmatch
+import queue
+import threading
+import time
+import unittest
+import redis
+from src.lib.messaging.codec import MessageCodec
+from src.lib.messaging.message_broker import MessageBroker
+
+class _FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.channels, self.patterns = set(), set()
+        self.inbox = queue.Queue()
+        self.subscribed = False
+
+    def subscribe(self, channel):
+        self.channels.add(channel)
+        self.subscribed = True
+
+    def psubscribe(self, pattern):
+        self.patterns.add(pattern)
+        self.subscribed = True
+
+    def unsubscribe(self, channel):
+        self.channels.discard(channel)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        pass
+
+class _FakePipeline:
+    def __init__(self, server):
+        self.server = server
+        self.commands = []
+
+    def publish(self, channel, data):
+        self.commands.append((channel, data))
+
+    def execute(self):
+        self.server.round_trips += 1
+        for channel, data in self.commands:
+            self.server._deliver(channel, data)
+        self.commands = []
+
+class _FakeRedis:
+    """Just enough of redis.Redis pub/sub to exercise the listener"""
+    def __init__(self):
+        self.pubsubs = []
+        self.round_trips = 0
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def pubsub(self, **kwargs):
+        pubsub = _FakePubSub(self)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    def publish(self, channel, data):
+        self.round_trips += 1
+        self._deliver(channel, data)
+
+    def _deliver(self, channel, data):
+        self.published.append((channel, data))
+        for pubsub in self.pubsubs:
+            if channel in pubsub.channels:
+                pubsub.inbox.put({'type': 'message', 'channel': channel.encode(), 'data': data})
+            for pattern in pubsub.patterns:
+                if fnmatch.fnmatchcase(channel, pattern):
+                    pubsub.inbox.put({'type': 'pmessage', 'pattern': pattern.encode(),
+                                      'channel': channel.encode(), 'data': data})
+
+class TestMessageBroker(unittest.TestCase):
+    def setUp(self):
+        self.broker = MessageBroker(listeners=2, handler_workers=4, poll_interval=0.01)
+        self.broker.redis = _FakeRedis()
+        self.addCleanup(self.broker.close)
+
+    def _wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_many_channels_share_listeners_and_keep_order(self):
+        received = {}
+        lock = threading.Lock()
+
+        def handler_for(channel):
+            def handler(message):
+                with lock:
+                    received.setdefault(channel, []).append(message['seq'])
+            return handler
+
+        threads_before = threading.active_count()
+        channels = [f"agent:{i}" for i in range(200)]
+        for channel in channels:
+            self.broker.subscribe(channel, handler_for(channel))
+        time.sleep(0.05)  # Let the listeners apply the subscriptions
+        for seq in range(5):
+            for channel in channels:
+                self.broker.publish(channel, {'seq': seq})
+
+        self._wait_for(lambda: sum(len(v) for v in received.values()) == 1000)
+        self.assertTrue(all(received[c] == [0, 1, 2, 3, 4] for c in channels))
+        self.assertEqual(len(self.broker.redis.pubsubs), 2)
+        self.assertLessEqual(threading.active_count() - threads_before, 2 + 4)
+
+    def test_pattern_subscription_and_unsubscribe(self):
+        received = []
+        self.broker.psubscribe("agent:*", received.append)
+        self.broker.subscribe("system:notifications", received.append)
+        self.broker.unsubscribe("system:notifications")
+        time.sleep(0.05)
+        self.broker.publish("agent:ryota", {'hello': 1})
+        self.broker.publish("system:notifications", {'ignored': True})
+        self._wait_for(lambda: received == [{'hello': 1}])
+
+    def test_subscribe_survives_a_dropped_connection(self):
+        received = []
+        broker = MessageBroker(listeners=1, poll_interval=0.01)
+        broker.redis = _FakeRedis()
+        self.addCleanup(broker.close)
+        listener = broker._listener_for("agent:ryota")
+        failures = [redis.ConnectionError("connection reset")]
+        subscribe = listener.pubsub.subscribe
+
+        def flaky_subscribe(channel):
+            if failures:
+                raise failures.pop()
+            subscribe(channel)
+
+        listener.pubsub.subscribe = flaky_subscribe
+        broker.subscribe("agent:ryota", received.append)
+        self._wait_for(lambda: "agent:ryota" in listener.pubsub.channels)
+        broker.publish("agent:ryota", {'hello': 1})
+        self._wait_for(lambda: received == [{'hello': 1}])
+
+    def test_route_message_fans_out_in_one_pipeline(self):
+        receivers = [f"persona_{i}" for i in range(50)]
+        self.broker._evaluate_context = lambda context, payload: receivers
+        self.broker.route_message("planner", "task_update", {"task_id": "t1"})
+
+        fake = self.broker.redis
+        self.assertEqual(fake.round_trips, 1)
+        self.assertEqual([c for c, _ in fake.published], [f"agent:{r}" for r in receivers])
+        # Serialized once: every publish carries the same string object
+        self.assertEqual(len({id(data) for _, data in fake.published}), 1)
+
+    def test_linger_coalesces_bursts(self):
+        broker = MessageBroker(linger=0.05, max_batch=100)
+        broker.redis = _FakeRedis()
+        self.addCleanup(broker.close)
+
+        for i in range(20):
+            broker.broadcast_system_message("task_status", {"task_id": f"t{i}", "status": "completed"})
+        self.assertEqual(broker.redis.round_trips, 0)
+        self._wait_for(lambda: len(broker.redis.published) == 20)
+        self.assertEqual(broker.redis.round_trips, 1)
+
+        # Reaching max_batch sends at once instead of waiting for the timer
+        broker.publish_many([("agent:a", {"n": n}) for n in range(150)])
+        self.assertEqual(broker.redis.round_trips, 2)
+        broker.flush()
+        self.assertEqual(broker.redis.round_trips, 2)
+        self.assertEqual(len(broker.redis.published), 170)
+
+    def test_custom_codec_on_the_wire(self):
+        broker = MessageBroker(poll_interval=0.01, codec=MessageCodec("orjson"))
+        broker.redis = _FakeRedis()
+        self.addCleanup(broker.close)
+        received = []
+        broker.subscribe("agent:a", received.append)
+        time.sleep(0.05)
+        broker.publish("agent:a", {'content': 'hello'})
+        self._wait_for(lambda: received == [{'content': 'hello'}])
+        self.assertIsInstance(broker.redis.published[0][1], bytes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+from src.lib.llm.mock_provider import MockModelSpec, MockProviderClient, MockProviderError
+from src.lib.llm.benchmark import BenchmarkConfig, BenchmarkRunner
+
+class TestMockProvider(unittest.TestCase):
+    def test_calls_are_deterministic_per_seed(self):
+        spec = MockModelSpec(latency_mean=0.0, latency_stddev=0.0, output_tokens=20)
+
+        async def run(seed):
+            client = MockProviderClient({}, spec, seed=seed)
+            response = await client.chat.completions.create(
+                model="mock", messages=[{"role": "user", "content": "plan the launch"}]
+            )
+            return response.choices[0].message.content
+
+        self.assertEqual(asyncio.run(run(1)), asyncio.run(run(1)))
+        self.assertNotEqual(asyncio.run(run(1)), asyncio.run(run(2)))
+
+    def test_streaming_and_errors(self):
+        spec = MockModelSpec(latency_distribution="constant", latency_mean=0.0, output_tokens=10,
+                             chunk_tokens=3, error_rate=1.0)
+
+        async def run():
+            client = MockProviderClient({}, MockModelSpec(latency_mean=0.0, output_tokens=10, chunk_tokens=3))
+            stream = await client.messages.create(model="mock", system="", stream=True,
+                                                  messages=[{"role": "user", "content": "hi"}])
+            chunks = [event.delta.text async for event in stream]
+
+            failing = MockProviderClient({"bad": spec}, MockModelSpec(latency_mean=0.0))
+            with self.assertRaises(MockProviderError):
+                await failing.messages.create(model="bad", messages=[{"role": "user", "content": "hi"}])
+            return chunks
+
+        self.assertEqual(len(asyncio.run(run())), 4)
+
+class TestBenchmarkRunner(unittest.TestCase):
+    def test_report_covers_each_scenario_and_level(self):
+        config = BenchmarkConfig(
+            concurrency_levels=[1, 2],
+            requests_per_level=3,
+            models={"a": MockModelSpec(latency_mean=0.001, latency_stddev=0.0),
+                    "b": MockModelSpec(latency_mean=0.001, latency_stddev=0.0)},
+            trace_memory=False
+        )
+        report = asyncio.run(BenchmarkRunner(config).run())
+        self.assertEqual(len(report["results"]), 6)
+        for result in report["results"]:
+            self.assertEqual(result["requests"], 3)
+            self.assertEqual(result["errors"], 0)
+            self.assertIsNotNone(result["p99_ms"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import unittest
+from src.lib.llm.beam_chat import BeamChat, FusionStrategy, ModelResponse
+from src.lib.llm.fusion_scoring import FusionScorer
+from src.lib.llm.latency_tracker import LatencyTracker
+from src.lib.llm.model_router import ModelRouter, RoutingBudget
+from src.lib.llm.persona_llm_manager import LLMConfig, LLMProvider
+from src.lib.messaging.local_broker import LocalMessageBroker
+
+PROMPT = "x" * 400  # ~100 tokens
+
+def _config(model_name, provider=LLMProvider.OPENAI):
+    return LLMConfig(provider=provider, model_name=model_name, api_key="key")
+
+class TestModelRouter(unittest.TestCase):
+    def setUp(self):
+        self.tracker = LatencyTracker(min_samples=1)
+        self.router = ModelRouter(self.tracker)
+        for model_id in ("gpt-4", "gpt-4o-mini", "claude-3-haiku"):
+            self.router.register_model(model_id, _config(model_id))
+
+    def test_longest_prefix_pricing(self):
+        mini = self.router.register_model("mini-dated", _config("gpt-4o-mini-2024-07-18"))
+        turbo = self.router.register_model("turbo-preview", _config("gpt-4-turbo-preview"))
+        unknown = self.router.register_model("local", _config("llama-3"))
+        self.assertEqual((mini.cost_per_1k_input, mini.cost_per_1k_output), (0.00015, 0.0006))
+        self.assertEqual((turbo.cost_per_1k_input, turbo.cost_per_1k_output), (0.01, 0.03))
+        self.assertEqual(unknown.expected_cost(100), 0.0)
+
+    def test_selects_within_cost_budget(self):
+        models = ["gpt-4", "gpt-4o-mini", "claude-3-haiku"]
+        selected = self.router.select(models, PROMPT, RoutingBudget(max_cost=0.001))
+        self.assertEqual(sorted(selected), ["claude-3-haiku", "gpt-4o-mini"])
+        self.assertEqual(self.router.select(models, PROMPT, RoutingBudget(max_models=1)), ["gpt-4o-mini"])
+        # min_models is a floor even when the budget is too small
+        self.assertEqual(len(self.router.select(models, PROMPT, RoutingBudget(max_cost=0.0, min_models=2))), 2)
+
+    def test_latency_filter_and_fallback(self):
+        self.tracker.record("gpt-4", 1.0)
+        self.tracker.record("gpt-4o-mini", 0.1)
+        selected = self.router.select(["gpt-4", "gpt-4o-mini", "claude-3-haiku"], PROMPT,
+                                      RoutingBudget(max_latency_ms=500))
+        # haiku has no latency data yet, so it stays eligible
+        self.assertEqual(sorted(selected), ["claude-3-haiku", "gpt-4o-mini"])
+
+        self.tracker.record("gpt-4o-mini", 3.0)
+        self.tracker.record("gpt-4o-mini", 3.0)
+        # Nothing meets 50ms: gpt-4 is fastest but over max_cost, so the fallback takes mini
+        fallback = self.router.select(["gpt-4", "gpt-4o-mini"], PROMPT,
+                                      RoutingBudget(max_latency_ms=50, max_cost=0.001))
+        self.assertEqual(fallback, ["gpt-4o-mini"])
+        # Without a cost budget the fastest model is used
+        self.assertEqual(self.router.select(["gpt-4", "gpt-4o-mini"], PROMPT,
+                                            RoutingBudget(max_latency_ms=50)), ["gpt-4"])
+
+    def test_fusion_credit_ignores_the_router_prior(self):
+        broker = LocalMessageBroker()
+        self.addCleanup(broker.close)
+        scorer = FusionScorer(weights={"prior": 5.0}, checklist=["risk", "cost", "delivery"])
+        beam_chat = BeamChat(broker, fusion_scorer=scorer)
+        beam_chat.router.set_profile("favoured", quality=0.95)
+        beam_chat.router.set_profile("accurate", quality=0.05)
+        responses = [
+            ModelResponse("favoured", LLMProvider.OPENAI, "a plan for launch", confidence=1.0),
+            ModelResponse("accurate", LLMProvider.ANTHROPIC, "risk cost delivery", confidence=1.0),
+        ]
+
+        result = asyncio.run(beam_chat.fuse_responses(responses, FusionStrategy.CHECKLIST))
+        self.assertEqual(result.content, "a plan for launch")  # The prior still shapes the answer
+        profiles = beam_chat.router.profiles
+        self.assertLess(profiles["favoured"].quality, 0.95)
+        self.assertGreater(profiles["accurate"].quality, 0.05)
+
+    def test_auto_select_tie_is_not_credited(self):
+        broker = LocalMessageBroker()
+        self.addCleanup(broker.close)
+        beam_chat = BeamChat(broker)
+        beam_chat.router.set_profile("first", quality=0.5)
+        beam_chat.router.set_profile("second", quality=0.5)
+        responses = [
+            ModelResponse("first", LLMProvider.ANTHROPIC, "one answer", confidence=1.0),
+            ModelResponse("second", LLMProvider.ANTHROPIC, "another answer", confidence=1.0),
+        ]
+
+        asyncio.run(beam_chat.fuse_responses(responses, FusionStrategy.AUTO_SELECT))
+        self.assertEqual(beam_chat.router.profiles["first"].quality, 0.5)
+        self.assertEqual(beam_chat.router.profiles["second"].quality, 0.5)
+
+        responses[1].confidence = 0.6
+        asyncio.run(beam_chat.fuse_responses(responses, FusionStrategy.AUTO_SELECT))
+        self.assertGreater(beam_chat.router.profiles["first"].quality, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
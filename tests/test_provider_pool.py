@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import unittest
+from src.lib.llm.persona_llm_manager import LLMConfig, LLMProvider
+from src.lib.llm.provider_pool import ProviderClientPool
+
+class _FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+class _FakePool(ProviderClientPool):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.created = []
+
+    def _create_async_client(self, config):
+        client = _FakeClient()
+        self.created.append(client)
+        return client
+
+def _config(api_key="key-a"):
+    return LLMConfig(provider=LLMProvider.OPENAI, model_name="gpt-4", api_key=api_key)
+
+class TestProviderClientPool(unittest.TestCase):
+    def test_reuses_clients_per_key(self):
+        pool = _FakePool()
+
+        async def run():
+            async with pool.acquire(_config()) as first:
+                pass
+            async with pool.acquire(_config()) as second:
+                pass
+            async with pool.acquire(_config("key-b")) as other:
+                pass
+            return first, second, other, pool.stats()
+
+        first, second, other, stats = asyncio.run(run())
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(stats["async_clients"], 2)
+
+    def test_concurrency_limit_per_key(self):
+        pool = _FakePool(max_concurrency_per_key=2)
+        active = peak = 0
+
+        async def call():
+            nonlocal active, peak
+            async with pool.acquire(_config()):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(run())
+        self.assertEqual(peak, 2)
+
+    def test_each_loop_gets_its_own_clients_closed_at_shutdown(self):
+        pool = _FakePool(max_concurrency_per_key=1)
+
+        async def use():
+            async with pool.acquire(_config()) as client:
+                await asyncio.sleep(0.02)
+                return client
+
+        first = asyncio.run(use())
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()["event_loops"], 0)
+
+        # A loop on another thread runs alongside this one without sharing its semaphore
+        results = {}
+        thread = threading.Thread(target=lambda: results.setdefault("thread", asyncio.run(use())))
+
+        async def main():
+            thread.start()
+            results["main"] = await use()
+
+        asyncio.run(main())
+        thread.join()
+        self.assertIsNot(results["main"], results["thread"])
+        self.assertNotIn(first, (results["main"], results["thread"]))
+        self.assertTrue(all(client.closed for client in pool.created))
+        self.assertEqual(len(pool.created), 3)
+
+    def test_aclose_closes_the_running_loops_clients(self):
+        pool = _FakePool()
+
+        async def run():
+            async with pool.acquire(_config()) as client:
+                pass
+            await pool.aclose()
+            return client
+
+        self.assertTrue(asyncio.run(run()).closed)
+        self.assertEqual(pool.loops, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from unittest.mock import Mock, patch
+from src.lib.llm.beam_chat import BeamChat
+from src.lib.llm.persona_llm_manager import LLMConfig, LLMProvider
+from src.lib.llm.resilience import CircuitBreaker, CircuitState, AIMDLimiter
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_recovers(self):
+        transitions = []
+        breaker = CircuitBreaker("gpt-4", failure_threshold=2, recovery_timeout=10,
+                                 on_state_change=lambda m, old, new: transitions.append(new))
+        with patch("src.lib.llm.resilience.time.monotonic", return_value=0.0):
+            breaker.record_failure()
+            self.assertTrue(breaker.allow_request())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitState.OPEN)
+            self.assertFalse(breaker.allow_request())
+
+        with patch("src.lib.llm.resilience.time.monotonic", return_value=11.0):
+            self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+            self.assertTrue(breaker.allow_request())
+            # Only one trial call while half-open
+            self.assertFalse(breaker.allow_request())
+            breaker.record_success()
+
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertEqual(transitions, [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED])
+
+    def test_half_open_failure_reopens(self):
+        breaker = CircuitBreaker("claude", failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.to_dict()["total_failures"], 2)
+
+    def test_registered_breaker_is_broadcast_and_keeps_its_callback(self):
+        broker = Mock()
+        beam_chat = BeamChat(broker)
+        transitions = []
+        breaker = CircuitBreaker("gpt-4", failure_threshold=1,
+                                 on_state_change=lambda m, old, new: transitions.append(new))
+        beam_chat.register_model("gpt-4", LLMConfig(provider=LLMProvider.OPENAI, model_name="gpt-4"),
+                                 circuit_breaker=breaker)
+        breaker.record_failure()
+        self.assertEqual(transitions, [CircuitState.OPEN])
+        broker.broadcast_system_message.assert_called_once_with(
+            'model_circuit_state', {'model_id': 'gpt-4', 'old_state': 'closed', 'state': 'open'})
+
+    def test_cancel_while_waiting_for_a_slot_keeps_the_trial_call(self):
+        beam_chat = BeamChat(Mock())
+        breaker = CircuitBreaker("gpt-4", failure_threshold=1, recovery_timeout=0)
+        limiter = AIMDLimiter(initial_limit=1)
+        beam_chat.register_model("gpt-4", LLMConfig(provider=LLMProvider.OPENAI, model_name="gpt-4"),
+                                 circuit_breaker=breaker, concurrency_limiter=limiter)
+        breaker.record_failure()
+
+        async def scenario():
+            await limiter.acquire()
+            call = asyncio.create_task(beam_chat._generate_response("gpt-4", "hi", use_cache=False))
+            await asyncio.sleep(0)
+            call.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await call
+
+        asyncio.run(scenario())
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        self.assertFalse(breaker.is_open())
+
+class TestAIMDLimiter(unittest.TestCase):
+    def test_multiplicative_decrease_and_additive_increase(self):
+        limiter = AIMDLimiter(initial_limit=8, min_limit=1, max_limit=16)
+        limiter.in_flight = 1
+        limiter.release(success=False)
+        self.assertEqual(limiter.current_limit, 4)
+        for _ in range(4):
+            limiter.in_flight = 1
+            limiter.release(success=True)
+        self.assertEqual(limiter.current_limit, 4)
+        self.assertGreater(limiter.limit, 4.9)
+
+    def test_waiters_block_until_release(self):
+        async def scenario():
+            limiter = AIMDLimiter(initial_limit=1)
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            self.assertFalse(waiter.done())
+            limiter.release(success=None)
+            await asyncio.wait_for(waiter, timeout=1)
+            self.assertEqual(limiter.in_flight, 1)
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_passes_its_wakeup_on(self):
+        async def scenario():
+            limiter = AIMDLimiter(initial_limit=1)
+            await limiter.acquire()
+            first = asyncio.create_task(limiter.acquire())
+            second = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            limiter.release(success=None)  # Wakes first...
+            first.cancel()  # ...which is cancelled before it resumes
+            await asyncio.wait_for(second, timeout=1)
+            self.assertTrue(first.cancelled())
+            self.assertEqual(limiter.in_flight, 1)
+
+        asyncio.run(scenario())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import Mock, patch
+from src.lib.llm.response_cache import ResponseCache
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(max_entries=2, ttl=60)
+        self.params = {"temperature": 0.2}
+
+    def test_exact_hit_and_miss(self):
+        self.assertIsNone(self.cache.get("gpt-4", "sys", "hello", self.params))
+        self.cache.set("gpt-4", "sys", "hello", self.params, {"content": "hi"})
+        self.assertEqual(self.cache.get("gpt-4", "sys", "hello", self.params)["content"], "hi")
+        # Different parameters are a different key
+        self.assertIsNone(self.cache.get("gpt-4", "sys", "hello", {"temperature": 0.9}))
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_lru_eviction(self):
+        self.cache.set("m", None, "a", None, {"content": "A"})
+        self.cache.set("m", None, "b", None, {"content": "B"})
+        self.cache.get("m", None, "a", None)
+        self.cache.set("m", None, "c", None, {"content": "C"})
+        self.assertIsNone(self.cache.get("m", None, "b", None))
+        self.assertIsNotNone(self.cache.get("m", None, "a", None))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        with patch("src.lib.llm.response_cache.time.monotonic", return_value=100.0):
+            self.cache.set("m", None, "a", None, {"content": "A"})
+        with patch("src.lib.llm.response_cache.time.monotonic", return_value=161.0):
+            self.assertIsNone(self.cache.get("m", None, "a", None))
+
+    def test_semantic_lookup(self):
+        vectors = {"summarize the report": [1.0, 0.0], "summarise the report": [0.99, 0.05],
+                   "write a poem": [0.0, 1.0]}
+        cache = ResponseCache(embedder=lambda text: vectors[text], similarity_threshold=0.95)
+        cache.set("m", None, "summarize the report", None, {"content": "summary"})
+        self.assertEqual(cache.get("m", None, "summarise the report", None)["content"], "summary")
+        self.assertIsNone(cache.get("m", None, "write a poem", None))
+        self.assertEqual(cache.stats()["semantic_hits"], 1)
+
+    def test_semantic_scan_is_bounded_to_recent_prompts(self):
+        vectors = {"old": [1.0, 0.0], "new": [0.0, 1.0], "query": [1.0, 0.01]}
+        cache = ResponseCache(embedder=lambda text: vectors[text], max_scan=1)
+        cache.set("m", None, "old", None, {"content": "old"})
+        cache.set("m", None, "new", None, {"content": "new"})
+        self.assertIsNone(cache.get("m", None, "query", None))
+
+    def test_only_deterministic_requests_are_cacheable(self):
+        self.assertTrue(self.cache.is_cacheable({"temperature": 0}))
+        self.assertFalse(self.cache.is_cacheable({"temperature": 0.2}))
+        self.assertFalse(self.cache.is_cacheable(None))  # Provider default temperature samples
+        self.assertTrue(ResponseCache(deterministic_only=False).is_cacheable({"temperature": 0.7}))
+
+    def test_async_lookups_embed_off_the_event_loop(self):
+        threads = []
+
+        def embedder(text):
+            threads.append(threading.current_thread())
+            return [1.0, 0.0]
+
+        cache = ResponseCache(embedder=embedder)
+
+        async def run():
+            await cache.aset("m", None, "a", None, {"content": "A"})
+            return await cache.aget("m", None, "b", None)
+
+        self.assertEqual(asyncio.run(run())["content"], "A")
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_redis_tier_goes_through_the_memory_manager(self):
+        memory = Mock()
+        memory.read.return_value = {"content": "shared"}
+        cache = ResponseCache(ttl=30, memory=memory)
+        cache.set("m", None, "a", None, {"content": "A"})
+        key, value = memory.write.call_args.args
+        self.assertTrue(key.startswith("response_cache:"))
+        self.assertEqual(value, {"content": "A"})
+        self.assertEqual(memory.write.call_args.kwargs["ttl"], 30)
+        self.assertEqual(cache.get("m", None, "b", None)["content"], "shared")
+        self.assertEqual(cache.stats()["remote_hits"], 1)
+
+    def test_invalidate_by_model(self):
+        self.cache.set("m1", None, "a", None, {"content": "A"})
+        self.cache.set("m2", None, "a", None, {"content": "B"})
+        self.assertEqual(self.cache.invalidate("m1"), 1)
+        self.assertIsNone(self.cache.get("m1", None, "a", None))
+        self.assertIsNotNone(self.cache.get("m2", None, "a", None))
+
+if __name__ == '__main__':
+    unittest.main()
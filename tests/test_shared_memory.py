@@ -0,0 +1,203 @@
+import hashlib
+import unittest
+from unittest.mock import Mock
+from redlock import CannotObtainLock, Lock
+from src.lib.messaging import shared_memory as shared_memory_module
+from src.lib.messaging.message_broker import MessageBroker
+from src.lib.messaging.shared_memory import SharedMemoryManager, WriteMode, VersionConflictError
+
+def _sha(script):
+    return hashlib.sha1(script.encode()).hexdigest()
+
+class _FakeRedis:
+    """Key/value commands plus the manager's Lua scripts, counting round-trips"""
+    def __init__(self):
+        self.connection_pool = object()
+        self.data = {}
+        self.expiries = {}
+        self.published = []
+        self.round_trips = 0
+        self.scripts = {
+            _sha(shared_memory_module._CAS_SCRIPT): self._cas,
+            _sha(shared_memory_module._LEASE_WRITE_SCRIPT): self._lease_write,
+            _sha(shared_memory_module._LEASE_RELEASE_SCRIPT): self._lease_release,
+        }
+
+    def set(self, key, value, nx=False, px=None):
+        self.round_trips += 1
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        if px is not None:
+            self.expiries[key] = px
+        return True
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.data.get(key)
+
+    def publish(self, channel, data):
+        self.round_trips += 1
+        self.published.append((channel, data))
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def mget(self, *keys):
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    def evalsha(self, sha, numkeys, *keys_and_args):
+        self.round_trips += 1
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        return self.scripts[sha](keys, args)
+
+    def _cas(self, keys, args):
+        current = int(self.data.get(keys[1], b'0'))
+        if int(args[1]) != current:
+            return [0, current]
+        self.data[keys[0]] = args[0]
+        self.data[keys[1]] = str(current + 1).encode()
+        return [1, current + 1]
+
+    def _lease_write(self, keys, args):
+        if self.data.get(keys[1]) != args[1].encode():
+            return 0
+        self.data[keys[0]] = args[0]
+        return 1
+
+    def _lease_release(self, keys, args):
+        if self.data.get(keys[0]) == args[0].encode():
+            del self.data[keys[0]]
+            return 1
+        return 0
+
+class _FakePipeline:
+    """Queues commands and runs them against the server as one round-trip"""
+    def __init__(self, server):
+        self.server = server
+        self.connection_pool = server.connection_pool
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        results = [getattr(self.server, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.server.round_trips -= len(self.commands) - 1
+        return results
+
+class _FakeRedlock:
+    retry_count = 1
+    retry_delay = 0.0
+
+    def __init__(self, server):
+        self.server = server
+
+    def lock(self, resource, ttl):
+        return Lock(ttl, resource, b'token') if self.server.set(resource, b'token', nx=True) else False
+
+    def unlock(self, lock):
+        self.server.round_trips += 1
+        self.server.data.pop(lock.resource, None)
+
+class TestSharedMemoryManager(unittest.TestCase):
+    def setUp(self):
+        self.server = _FakeRedis()
+        self.broker = Mock()
+        self.broker.codec = None
+        self.broker.queue_system_message.return_value = False
+        self.memory = self._manager()
+
+    def _manager(self):
+        memory = SharedMemoryManager(self.broker, "beam_chat")
+        memory.redis = self.server
+        memory.redlock = _FakeRedlock(self.server)
+        return memory
+
+    def test_single_writer_is_one_round_trip(self):
+        self.memory.write("result:r1", {"content": "done"}, sync=False, mode=WriteMode.SINGLE_WRITER)
+        self.assertEqual(self.server.round_trips, 1)
+        self.assertEqual(self._manager().read("result:r1"), {"content": "done"})
+        self.broker.broadcast_system_message.assert_not_called()
+
+    def test_uncached_write_with_ttl(self):
+        self.memory.write("response_cache:k", {"content": "hi"}, sync=False,
+                          mode=WriteMode.SINGLE_WRITER, ttl=1.5, cache=False)
+        self.assertEqual(self.server.expiries["beam_chat:response_cache:k"], 1500)
+        self.assertNotIn("response_cache:k", self.memory.local_cache)
+        self.assertEqual(self.memory.read("response_cache:k", cache=False), {"content": "hi"})
+        self.assertNotIn("response_cache:k", self.memory.local_cache)
+        with self.assertRaises(ValueError):
+            self.memory.write("counter", 1, mode=WriteMode.CAS, ttl=1.0)
+
+    def test_locked_write_uses_a_separate_lock_key(self):
+        self.memory.write("plan", {"step": 1})
+        self.memory.write("plan", {"step": 2})  # Would fail if the lock collided with the value key
+        self.assertEqual(self._manager().read("plan"), {"step": 2})
+        self.assertNotIn(b"beam_chat:plan:lock", self.server.data)
+        self.assertEqual(self.broker.broadcast_system_message.call_count, 2)
+
+    def test_cas_detects_conflicts_and_update_retries(self):
+        other = self._manager()
+        self.assertEqual(self.memory.write("counter", 1, sync=False, mode=WriteMode.CAS), 1)
+        self.assertEqual(other.read_versioned("counter"), (1, 1))
+        self.memory.write("counter", 2, sync=False, mode=WriteMode.CAS)
+
+        with self.assertRaises(VersionConflictError) as raised:
+            other.write("counter", 10, sync=False, mode=WriteMode.CAS)
+        self.assertEqual((raised.exception.expected, raised.exception.actual), (1, 2))
+
+        self.assertEqual(other.update("counter", lambda n: n + 1, sync=False), 3)
+        self.assertEqual(self.memory.read_versioned("counter"), (3, 3))
+
+    def test_update_reports_the_last_observed_version(self):
+        other = self._manager()
+        self.memory.write("counter", 0, sync=False, mode=WriteMode.CAS)
+
+        def contended(n):
+            other.update("counter", lambda m: m + 1, sync=False)  # Another writer wins every race
+            return n + 1
+
+        with self.assertRaises(VersionConflictError) as raised:
+            self.memory.update("counter", contended, sync=False, retries=3)
+        self.assertEqual((raised.exception.expected, raised.exception.actual), (3, 4))
+
+    def test_result_writes_still_broadcast(self):
+        self.memory.write("result:r1", {"content": "done"}, mode=WriteMode.SINGLE_WRITER)
+        self.broker.broadcast_system_message.assert_called_once_with(
+            'memory_update', {'namespace': 'beam_chat', 'key': 'result:r1', 'value': {"content": "done"}})
+
+    def test_result_write_and_broadcast_share_a_round_trip(self):
+        broker = MessageBroker()
+        self.addCleanup(broker.close)
+        broker.redis = self.server
+        memory = SharedMemoryManager(broker, "beam_chat")
+        memory.redis = self.server
+        memory.write("result:r1", {"content": "done"}, mode=WriteMode.SINGLE_WRITER)
+        self.assertEqual(self.server.round_trips, 1)
+        self.assertEqual(self._manager().read("result:r1"), {"content": "done"})
+        [(channel, data)] = self.server.published
+        self.assertEqual(channel, 'system:notifications')
+        self.assertEqual(broker.codec.decode(data)['payload']['key'], 'result:r1')
+
+        # Buffered publishes can't join the pipeline, so the broadcast is sent on its own
+        broker.linger = 60.0
+        memory.write("result:r2", {"content": "done"}, mode=WriteMode.SINGLE_WRITER)
+        self.assertEqual(len(broker._outbox), 1)
+
+    def test_lease_is_taken_once_and_blocks_other_writers(self):
+        self.memory.write("hot", 1, sync=False, mode=WriteMode.LEASE)
+        before = self.server.round_trips
+        for n in range(5):
+            self.memory.write("hot", n, sync=False, mode=WriteMode.LEASE)
+        self.assertEqual(self.server.round_trips - before, 5)
+
+        with self.assertRaises(CannotObtainLock):
+            self._manager().write("hot", 99, sync=False, mode=WriteMode.LEASE)
+        self.memory.release_leases()
+        self._manager().write("hot", 99, sync=False, mode=WriteMode.LEASE)
+        self.assertEqual(self._manager().read("hot"), 99)
+
+if __name__ == '__main__':
+    unittest.main()
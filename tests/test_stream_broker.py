@@ -0,0 +1,149 @@
+import threading
+import time
+import unittest
+from src.lib.messaging.stream_broker import StreamMessageBroker
+
+class _FakeStreams:
+    """Just enough of redis.Redis streams (one consumer group per stream) for the broker"""
+    def __init__(self):
+        self.streams, self.pending, self.next_id = {}, {}, 0
+        self.acks = []
+        self.lock = threading.Lock()
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def xgroup_create(self, name, groupname, id='$', mkstream=False):
+        with self.lock:
+            self.streams.setdefault(name, [])
+            self.pending.setdefault(name, {"cursor": 0, "entries": {}})
+
+    def xadd(self, name, fields, maxlen=None, approximate=True):
+        with self.lock:
+            self.next_id += 1
+            entry_id = f"{self.next_id}-0".encode()
+            self.streams.setdefault(name, []).append((entry_id, {k.encode() if isinstance(k, str) else k: v
+                                                                 for k, v in fields.items()}))
+            if maxlen and len(self.streams[name]) > maxlen:
+                del self.streams[name][:-maxlen]
+            return entry_id
+
+    def xreadgroup(self, groupname, consumername, streams, count=None, block=None):
+        with self.lock:
+            response = []
+            for name in streams:
+                group = self.pending[name]
+                fresh = [e for e in self.streams[name] if int(e[0].split(b"-")[0]) > group["cursor"]][:count]
+                for entry_id, fields in fresh:
+                    group["cursor"] = int(entry_id.split(b"-")[0])
+                    group["entries"][entry_id] = [fields, time.monotonic(), 1]
+                if fresh:
+                    response.append([name.encode(), fresh])
+        if not response:
+            time.sleep(0.01)
+        return response
+
+    def xack(self, name, groupname, *ids):
+        with self.lock:
+            self.acks.append(ids)
+            for entry_id in ids:
+                self.pending[name]["entries"].pop(entry_id, None)
+
+    def xpending_range(self, name, groupname, min, max, count, idle=None):
+        now = time.monotonic()
+        with self.lock:
+            return [{"message_id": entry_id, "times_delivered": deliveries}
+                    for entry_id, (_, delivered_at, deliveries) in self.pending[name]["entries"].items()
+                    if (now - delivered_at) * 1000 >= (idle or 0)][:count]
+
+    def xclaim(self, name, groupname, consumername, min_idle_time, message_ids):
+        with self.lock:
+            claimed = []
+            for entry_id in message_ids:
+                entry = self.pending[name]["entries"][entry_id]
+                entry[1], entry[2] = time.monotonic(), entry[2] + 1
+                claimed.append((entry_id, entry[0]))
+            return claimed
+
+class _FakePipeline:
+    def __init__(self, server):
+        self.server, self.calls = server, []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.server, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+class TestStreamMessageBroker(unittest.TestCase):
+    def _broker(self, server, **kwargs):
+        broker = StreamMessageBroker(block_ms=10, reclaim_idle_ms=0, reclaim_interval=0.0, **kwargs)
+        broker.redis = server
+        broker.subscribe_to_context("agent_task_ready", lambda message: None)
+        self.addCleanup(broker.close)
+        return broker
+
+    def _wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_consumer_group_acks_and_retries_failures(self):
+        server = _FakeStreams()
+        broker = self._broker(server, max_deliveries=3)
+        receiver = broker.context_routing["agent_task_ready"][0]
+        stream = broker.agent_stream(receiver)
+
+        # Routed before anyone consumes: kept in the stream, not dropped
+        for i in range(3):
+            broker.route_message("system", "agent_task_ready", {"task_id": f"t{i}"})
+
+        attempts = {}
+        def handler(message):
+            task_id = message["payload"]["task_id"]
+            attempts[task_id] = attempts.get(task_id, 0) + 1
+            if task_id == "t1" and attempts[task_id] < 2:
+                raise RuntimeError("worker restarting")
+            if task_id == "t2":
+                raise RuntimeError("poison message")
+
+        broker.consume(stream, handler)
+        self._wait_for(lambda: broker.stats()["dead_lettered"] == 1)
+        self.assertEqual(attempts["t0"], 1)
+        self.assertEqual(attempts["t1"], 2)
+        self.assertEqual(attempts["t2"], 3)
+        self.assertEqual(server.pending[stream]["entries"], {})
+        self.assertEqual(len(server.streams[f"{stream}:dead"]), 1)
+
+    def test_entries_are_handled_in_order_and_acked_per_read(self):
+        server = _FakeStreams()
+        broker = self._broker(server, batch_size=10)  # Reclaims constantly: queued entries must not be re-run
+        stream = broker.agent_stream(broker.context_routing["agent_task_ready"][0])
+        for i in range(20):
+            broker.route_message("system", "agent_task_ready", {"task_id": i})
+
+        seen, release = [], threading.Event()
+        def handler(message):
+            task_id = message["payload"]["task_id"]
+            if task_id == 5:
+                release.wait(5.0)
+            if task_id == 7:
+                raise RuntimeError("left pending")
+            time.sleep(0.001 * (task_id % 3))  # Uneven handler times would reorder a parallel batch
+            seen.append(task_id)
+
+        broker.consume(stream, handler)
+        self._wait_for(lambda: len(seen) == 5)
+        # The first read's entries are acknowledged together, after the blocked one
+        self.assertEqual(broker.stats()["acked"], 0)
+        self.assertEqual(server.acks, [])
+        release.set()
+        self._wait_for(lambda: len(server.acks) == 2)
+        self.assertEqual(seen, [i for i in range(20) if i != 7])
+        self.assertEqual(len(server.acks[0]), 9)  # One XACK per read, without the failed entry
+        self.assertEqual(len(server.acks[1]), 10)
+        self.assertEqual(broker.stats()["acked"], 19)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from src.lib.llm.beam_chat import BeamChat, FusionStrategy, ModelResponse, ResponseChunk
+from src.lib.llm.mock_provider import MockModelSpec, MockProviderClientPool
+from src.lib.llm.persona_llm_manager import LLMConfig, LLMProvider
+from src.lib.messaging.local_broker import LocalMessageBroker
+
+def _spec(latency, error_rate=0.0):
+    return MockModelSpec(latency_distribution="constant", latency_mean=latency, output_tokens=12,
+                         chunk_tokens=3, error_rate=error_rate)
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        broker = LocalMessageBroker()
+        self.addCleanup(broker.close)
+        pool = MockProviderClientPool({"fast": _spec(0.01), "slow": _spec(0.08), "broken": _spec(0.04, 1.0)})
+        self.beam_chat = BeamChat(broker, client_pool=pool)
+        for name, provider in (("fast", LLMProvider.OPENAI), ("slow", LLMProvider.ANTHROPIC),
+                               ("broken", LLMProvider.OPENAI)):
+            self.beam_chat.register_model(name, LLMConfig(provider=provider, model_name=name, api_key=f"mock-{name}"))
+
+    def _collect(self, **kwargs):
+        async def run():
+            return [item async for item in self.beam_chat.stream_responses("plan the launch", **kwargs)]
+        return asyncio.run(run())
+
+    def test_chunks_are_ordered_per_model_and_precede_the_response(self):
+        items = self._collect(stream_tokens=True)
+        responses = [item for item in items if isinstance(item, ModelResponse)]
+        self.assertEqual([r.model_id for r in responses], ["fast", "slow"])  # Completion order
+
+        for response in responses:
+            position = items.index(response)
+            chunks = [item for item in items[:position]
+                      if isinstance(item, ResponseChunk) and item.model_id == response.model_id]
+            self.assertEqual([c.index for c in chunks], [0, 1, 2, 3])
+            self.assertEqual("".join(c.delta for c in chunks), response.content)
+            self.assertFalse(any(isinstance(item, ResponseChunk) and item.model_id == response.model_id
+                                 for item in items[position:]))
+
+    def test_model_failing_mid_stream_is_dropped(self):
+        items = self._collect(stream_tokens=True)
+        broken = [item for item in items if item.model_id == "broken"]
+        # Its first chunks arrive before the dropped connection, but no response follows
+        self.assertTrue(broken)
+        self.assertTrue(all(isinstance(item, ResponseChunk) for item in broken))
+        self.assertEqual(self.beam_chat.circuit_breakers["broken"].consecutive_failures, 1)
+
+    def test_auto_select_publishes_partial_fusion(self):
+        partials = []
+
+        async def on_partial(result):
+            partials.append(result)
+
+        async def run():
+            stream = self.beam_chat.stream_responses("plan the launch", stream_tokens=True)
+            return await self.beam_chat.fuse_stream(stream, FusionStrategy.AUTO_SELECT, on_partial)
+
+        result = asyncio.run(run())
+        # Mock responses tie on confidence, so only the first arrival is published early
+        self.assertEqual(len(partials), 1)
+        self.assertTrue(partials[0].metadata["partial"])
+        self.assertEqual([r.model_id for r in partials[0].source_responses], ["fast"])
+        self.assertEqual(partials[0].content, partials[0].source_responses[0].content)
+        self.assertEqual(sorted(r.model_id for r in result.source_responses), ["fast", "slow"])
+        self.assertNotIn("partial", result.metadata)
+
+if __name__ == '__main__':
+    unittest.main()
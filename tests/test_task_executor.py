@@ -0,0 +1,99 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from src.lib.llm.hierarchical_agent_system import HierarchicalAgentSystem, AgentRole
+from src.lib.llm.task_executor import TaskExecutor
+from src.lib.messaging.message_broker import MessageBroker
+
+class _LocalBroker(MessageBroker):
+    def publish(self, channel, message):
+        pass
+
+def _agent(persona_id):
+    return SimpleNamespace(persona_id=persona_id, name=persona_id, get_llm_config=lambda: None)
+
+class TestTaskExecutor(unittest.TestCase):
+    def setUp(self):
+        self.system = HierarchicalAgentSystem(_LocalBroker())
+        for agent_id in ("alice", "bob", "carol"):
+            self.system.register_agent(_agent(agent_id), AgentRole.SPECIALIST, ["research"])
+
+    def test_runs_dag_in_parallel_respecting_dependencies(self):
+        finished = []
+
+        async def runner(task):
+            for dep in task.dependencies:
+                self.assertIn(dep, finished)
+            await asyncio.sleep(0.05)
+            finished.append(task.task_id)
+            return task.description.upper()
+
+        a = self.system.create_task("a", assigned_to="alice")
+        b = self.system.create_task("b", assigned_to="bob")
+        c = self.system.create_task("c", assigned_to="carol")
+        d = self.system.create_task("d", assigned_to="alice", dependencies=[a, b, c])
+        executor = TaskExecutor(self.system, max_concurrency=4, runner=runner)
+        stats = asyncio.run(executor.run())
+
+        self.assertEqual(stats["completed"], 4)
+        self.assertEqual(finished[-1], d)
+        self.assertEqual(self.system.tasks[d].result, "D")
+        self.assertLess(stats["wall_time"], 0.15)  # Two tasks deep; serially it would take 0.2s
+
+    def test_cancelled_task_frees_its_slot(self):
+        started = []
+
+        async def runner(task):
+            started.append(task.task_id)
+            await asyncio.sleep(10)
+
+        task_id = self.system.create_task("slow", assigned_to="alice")
+        executor = TaskExecutor(self.system, runner=runner)
+
+        async def scenario():
+            run = asyncio.ensure_future(executor.run())
+            while not started:
+                await asyncio.sleep(0.001)
+            executor.running[task_id].cancel()
+            return await asyncio.wait_for(run, 1.0)
+
+        stats = asyncio.run(scenario())
+        self.assertEqual(stats["cancelled"], 1)
+        self.assertEqual(executor.running, {})
+        self.assertEqual(executor.running_per_agent["alice"], 0)
+        self.assertEqual(self.system.tasks[task_id].status, "pending")
+
+    def test_limits_per_agent_and_steals_work(self):
+        active = {"alice": 0}
+        peak = []
+
+        async def runner(task):
+            active[task.assigned_to] = active.get(task.assigned_to, 0) + 1
+            peak.append(active["alice"])
+            await asyncio.sleep(0.01)
+            active[task.assigned_to] -= 1
+
+        tasks = [self.system.create_task(f"t{i}", assigned_to="alice") for i in range(6)]
+        pinned = self.system.create_task("pinned", assigned_to="alice", metadata={"pinned": True})
+        executor = TaskExecutor(self.system, max_per_agent=1, runner=runner)
+        stats = asyncio.run(executor.run())
+
+        self.assertEqual(stats["completed"], 7)
+        self.assertGreater(stats["stolen"], 0)
+        self.assertLessEqual(max(peak), 1)
+        self.assertEqual(self.system.tasks[pinned].assigned_to, "alice")
+        self.assertTrue(all(self.system.tasks[t].status == "completed" for t in tasks))
+
+    def test_failure_blocks_dependents(self):
+        async def runner(task):
+            raise RuntimeError("provider down")
+
+        a = self.system.create_task("a", assigned_to="alice")
+        b = self.system.create_task("b", assigned_to="alice", dependencies=[a])
+        stats = asyncio.run(TaskExecutor(self.system, runner=runner).run())
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(self.system.tasks[a].status, "failed")
+        self.assertEqual(self.system.tasks[b].status, "pending")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from types import SimpleNamespace
+from src.lib.llm.task_graph import TaskGraph, TaskCycleError
+from src.lib.llm.hierarchical_agent_system import HierarchicalAgentSystem, AgentRole
+from src.lib.messaging.message_broker import MessageBroker
+
+class _RecordingBroker(MessageBroker):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def publish(self, channel, message):
+        self.messages.append(message)
+
+class TestTaskGraph(unittest.TestCase):
+    def test_completion_unblocks_only_when_last_dependency_finishes(self):
+        graph = TaskGraph()
+        graph.add_task("a")
+        graph.add_task("b")
+        graph.add_task("c", ["a", "b"])
+        self.assertEqual(graph.mark_completed("a"), [])
+        self.assertFalse(graph.is_ready("c"))
+        self.assertEqual(graph.mark_completed("b"), ["c"])
+        graph.mark_incomplete("b")
+        self.assertFalse(graph.is_ready("c"))
+
+    def test_rejects_cycles_through_forward_references(self):
+        graph = TaskGraph()
+        graph.add_task("b", ["a"])
+        graph.add_task("c", ["b"])
+        with self.assertRaises(TaskCycleError) as ctx:
+            graph.add_task("a", ["c"])
+        self.assertEqual(ctx.exception.cycle, ["a", "b", "c", "a"])
+        self.assertNotIn("a", graph)
+        with self.assertRaises(TaskCycleError):
+            graph.add_task("d", ["d"])
+
+    def test_critical_path(self):
+        graph = TaskGraph()
+        graph.add_task("research", weight=3)
+        graph.add_task("outline", weight=1)
+        graph.add_task("draft", ["research", "outline"], weight=2)
+        graph.add_task("review", ["draft"], weight=1)
+        path = graph.critical_path()
+        self.assertEqual(path["tasks"], ["research", "draft", "review"])
+        self.assertEqual(path["length"], 6)
+
+class TestHierarchicalScheduling(unittest.TestCase):
+    def test_dependents_become_ready(self):
+        system = HierarchicalAgentSystem(_RecordingBroker())
+        first = system.create_task("Research frameworks", assigned_to="researcher")
+        second = system.create_task("Draft framework", assigned_to="writer", dependencies=[first])
+        self.assertEqual(system.tasks[second].status, "pending")
+
+        system.update_task_status(first, "completed", "notes")
+        self.assertEqual(system.tasks[second].status, "ready")
+
+        # Dependencies that are already done make a new task ready immediately
+        third = system.create_task("Summarise research", assigned_to="writer", dependencies=[first])
+        self.assertEqual(system.tasks[third].status, "ready")
+
+        with self.assertRaises(TaskCycleError):
+            system.create_task("Loop", assigned_to="writer", dependencies=["loop"], task_id="loop")
+
+    def test_agent_indexes_and_least_loaded_coordinator(self):
+        system = HierarchicalAgentSystem(_RecordingBroker())
+        for agent_id, role, capabilities in [("lead", AgentRole.COORDINATOR, ["planning"]),
+                                             ("deputy", AgentRole.COORDINATOR, ["planning", "review"]),
+                                             ("analyst", AgentRole.RESEARCHER, ["review"])]:
+            persona = SimpleNamespace(persona_id=agent_id, name=agent_id, get_llm_config=lambda: None)
+            system.register_agent(persona, role, capabilities)
+
+        self.assertEqual(system.get_agents_by_role(AgentRole.COORDINATOR), ["lead", "deputy"])
+        self.assertEqual(system.get_agents_by_capability("review"), ["deputy", "analyst"])
+        self.assertEqual(system.pick_agent(AgentRole.COORDINATOR, "review"), "deputy")
+
+        first = system.create_task("Plan the launch")
+        second = system.create_task("Plan the retro")
+        self.assertEqual([system.tasks[first].assigned_to, system.tasks[second].assigned_to], ["lead", "deputy"])
+        system.update_task_status(first, "completed")
+        self.assertEqual(system.tasks[system.create_task("Plan Q3")].assigned_to, "lead")
+
+        # Re-registering moves the agent between indexes
+        system.register_agent(SimpleNamespace(persona_id="analyst", name="analyst", get_llm_config=lambda: None),
+                              AgentRole.CRITIC, [])
+        self.assertEqual(system.get_agents_by_capability("review"), ["deputy"])
+        self.assertEqual(system.get_agents_by_role(AgentRole.RESEARCHER), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from src.lib.llm.task_store import AgentTask, TaskStore, InMemoryTaskStore, SQLiteTaskStore
+from src.lib.llm.hierarchical_agent_system import HierarchicalAgentSystem
+from src.lib.messaging.message_broker import MessageBroker
+
+class _LocalBroker(MessageBroker):
+    def publish(self, channel, message):
+        pass
+
+class TestTaskStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_agent_task_is_slotted(self):
+        task = AgentTask("t1", "Research", "alice")
+        self.assertFalse(hasattr(task, "__dict__"))
+        self.assertEqual((task.status, task.metadata, task.dependencies), ("pending", {}, []))
+
+    def test_in_memory_snapshot_round_trip(self):
+        store = InMemoryTaskStore()
+        store.add(AgentTask("t1", "Research", "alice", status="completed", result={"notes": [1, 2]},
+                            metadata={"priority": 2}, dependencies=["t0"], estimated_duration=3.5))
+        path = os.path.join(self.tmp.name, "tasks.jsonl")
+        store.snapshot(path)
+        self.assertEqual(InMemoryTaskStore.from_snapshot(path)["t1"], store["t1"])
+
+    def test_sqlite_batches_writes_and_system_restores_after_restart(self):
+        path = os.path.join(self.tmp.name, "tasks.db")
+        store = SQLiteTaskStore(path, batch_size=100, flush_interval=60)
+        system = HierarchicalAgentSystem(_LocalBroker(), task_store=store)
+        first = system.create_task("Research", assigned_to="alice")
+        second = system.create_task("Draft", assigned_to="bob", dependencies=[first])
+        third = system.create_task("Review", assigned_to="bob", dependencies=[second])
+        self.assertEqual(len(store.dirty), 3)  # Nothing written yet
+        system.update_task_status(first, "completed", "notes")
+        system.update_task_status(second, "in_progress")
+        store.snapshot(os.path.join(self.tmp.name, "snapshot.db"))
+        store.close()
+
+        for restored_path in (path, os.path.join(self.tmp.name, "snapshot.db")):
+            restored = HierarchicalAgentSystem(_LocalBroker(), task_store=SQLiteTaskStore(restored_path))
+            self.assertEqual(restored.tasks[first].result, "notes")
+            # The interrupted task is rescheduled, and completing it still unblocks the rest
+            self.assertEqual(restored.tasks[second].status, "ready")
+            self.assertEqual(restored.outstanding_tasks["bob"], 2)
+            restored.update_task_status(second, "completed")
+            self.assertEqual(restored.tasks[third].status, "ready")
+            restored.tasks.close()
+
+    def test_restore_is_independent_of_store_order(self):
+        store = InMemoryTaskStore()
+        # Dependents stored before their completed dependency, as a restore from any backend may yield them
+        store.add(AgentTask("review", "Review", "bob", status="in_progress", dependencies=["draft"]))
+        store.add(AgentTask("publish", "Publish", "bob", status="pending", dependencies=["draft"]))
+        store.add(AgentTask("draft", "Draft", "alice", status="completed", result="text"))
+
+        broker = _LocalBroker()
+        routed = []
+        broker.route_message = lambda sender, context, payload: routed.append(payload["task_id"])
+        system = HierarchicalAgentSystem(broker, task_store=store)
+        self.assertEqual(system.tasks["review"].status, "ready")
+        # Its dependency completed but the crash came before it was readied
+        self.assertEqual(system.tasks["publish"].status, "ready")
+        self.assertEqual(sorted(routed), ["publish", "review"])
+
+    def test_sqlite_flushes_on_a_timer_without_further_saves(self):
+        path = os.path.join(self.tmp.name, "tasks.db")
+        store = SQLiteTaskStore(path, batch_size=100, flush_interval=0.05)
+        self.addCleanup(store.close)
+        store.add(AgentTask("t1", "Research", "alice"))
+
+        reader = sqlite3.connect(path)
+        self.addCleanup(reader.close)
+        deadline = time.monotonic() + 5.0
+        while not reader.execute("SELECT task_id FROM tasks").fetchall() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(reader.execute("SELECT task_id FROM tasks").fetchall(), [("t1",)])
+        self.assertEqual(store.dirty, {})
+
+    def test_backends_must_implement_snapshot(self):
+        with self.assertRaises(TypeError):
+            TaskStore()
+
+if __name__ == '__main__':
+    unittest.main()